@@ -0,0 +1,182 @@
+import numpy as np
+import pandas as pd
+
+from material import Material
+from ship import Ship
+from ship import ShipContext
+from ship import as_ship_context
+from structural_element import compile_element_arrays
+
+PLATE_BUCKLING_SAFETY_FACTOR = 1.0
+STIFFENER_BUCKLING_SAFETY_FACTOR = 1.1
+
+
+class BucklingAssessment:
+    def __init__(self, vessel: Ship | ShipContext, mat: Material) -> None:
+        """
+        Buckling of platings and secondary stiffeners under hull girder compression
+
+        Plating between stiffeners buckles elastically at 3.6*E*(t/s)**2.
+        Stiffeners (with their effective plating) are checked for column buckling
+        over the transverse span, and flat bars for torsional buckling.
+        Elastic stresses above half the yield stress get the Johnson-Ostenfeld correction.
+
+        The utilisation factor is safety_factor*sigma_a/sigma_c, to be below 1.0
+        """
+        self._vessel = as_ship_context(vessel)
+        self._material = mat
+
+    def calculate_buckling_utilisation(self, structure_list: list, compressive_stress: np.ndarray,
+                                       stiffener_stress: np.ndarray = None) -> dict:
+        """
+            compressive_stress: array of shape (num_load_cases, num_elements), in N/mm2.
+                Positive values are compression; tensile values are ignored
+            stiffener_stress: compressive stress of the secondary stiffeners, same shape.
+                Defaults to compressive_stress
+
+            Returns a dictionary of (num_load_cases, num_elements) arrays with the
+            critical stresses, in N/mm2, and the utilisation factors of the plating
+            ('plate'), of the stiffener column ('column') and torsional ('torsional')
+            buckling. Unstiffened elements get zero stiffener utilisation.
+            The 'stiffened' entry is a boolean mask over the elements
+        """
+        element_arrays = compile_element_arrays(structure_list)
+        sigma_a = np.maximum(np.atleast_2d(compressive_stress), 0.0)
+        if stiffener_stress is None:
+            sigma_a_stiffener = sigma_a
+        else:
+            sigma_a_stiffener = np.maximum(np.atleast_2d(stiffener_stress), 0.0)
+        sigma_F = element_arrays['yield_stress']
+        E_young = element_arrays['young_modulus']
+        stiffened = element_arrays['num_stiffeners'] != 0
+        span = self._vessel.transverse_span/1000.
+
+        # Plating
+        sigma_E_plate = calculate_plate_elastic_buckling_stress(E_young, element_arrays['thickness'],
+                                                                element_arrays['stiffener_spacing'])
+        sigma_c_plate = apply_johnson_ostenfeld_correction(sigma_E_plate, sigma_F)
+
+        # Secondary stiffening
+        with np.errstate(divide='ignore', invalid='ignore'):
+            sigma_E_column = np.where(stiffened,
+                                      calculate_stiffener_column_buckling_stress(E_young,
+                                                                                 element_arrays['stiffener_second_moment'],
+                                                                                 element_arrays['stiffener_area'],
+                                                                                 span),
+                                      np.inf)
+            sigma_E_torsional = np.where(stiffened,
+                                         calculate_flat_bar_torsional_buckling_stress(E_young,
+                                                                                      element_arrays['stiffener_web_thickness'],
+                                                                                      element_arrays['stiffener_height']),
+                                         np.inf)
+        sigma_c_column = apply_johnson_ostenfeld_correction(sigma_E_column, sigma_F)
+        sigma_c_torsional = apply_johnson_ostenfeld_correction(sigma_E_torsional, sigma_F)
+
+        buckling = dict()
+        buckling['plate'] = dict(critical_stress=sigma_c_plate,
+                                 utilisation=PLATE_BUCKLING_SAFETY_FACTOR*sigma_a/sigma_c_plate)
+        buckling['column'] = dict(critical_stress=sigma_c_column,
+                                  utilisation=np.where(stiffened, STIFFENER_BUCKLING_SAFETY_FACTOR*sigma_a_stiffener/sigma_c_column, 0.0))
+        buckling['torsional'] = dict(critical_stress=sigma_c_torsional,
+                                     utilisation=np.where(stiffened, STIFFENER_BUCKLING_SAFETY_FACTOR*sigma_a_stiffener/sigma_c_torsional, 0.0))
+        buckling['compressive_stress'] = sigma_a
+        buckling['stiffener_compressive_stress'] = sigma_a_stiffener
+        buckling['stiffened'] = stiffened
+        buckling['name'] = element_arrays['name']
+        return buckling
+
+    def calculate_structural_buckling(self, structure_list: list, compressive_stress: np.ndarray,
+                                      load_cases: list = None, stiffener_stress: np.ndarray = None) -> None:
+        """
+            Builds the buckling and criteria tables of the governing load case of each element
+        """
+        buckling = self.calculate_buckling_utilisation(structure_list, compressive_stress, stiffener_stress)
+        num_load_cases = buckling['compressive_stress'].shape[0]
+        if load_cases is None:
+            load_cases = ['Load case {:d}'.format(k + 1) for k in range(num_load_cases)]
+        load_cases = np.array(load_cases, dtype=object)
+
+        plating_list = list(buckling['name'])
+        stiffened = buckling['stiffened']
+        stiffened_plating_list = list(buckling['name'][stiffened])
+
+        plate_utilisation = buckling['plate']['utilisation']
+        plate_case = np.argmax(plate_utilisation, axis=0)
+        plate_max_utilisation = np.max(plate_utilisation, axis=0)
+        elements = np.arange(len(plating_list))
+
+        stiffener_utilisation = np.maximum(buckling['column']['utilisation'], buckling['torsional']['utilisation'])
+        stiffener_case = np.argmax(stiffener_utilisation, axis=0)[stiffened]
+        column_max_utilisation = np.max(buckling['column']['utilisation'], axis=0)[stiffened]
+        torsional_max_utilisation = np.max(buckling['torsional']['utilisation'], axis=0)[stiffened]
+
+        buckling_plating_info_dict = dict({'Load case': load_cases[plate_case],
+                                           'Compressive stress [MPa]': buckling['compressive_stress'][plate_case, elements],
+                                           'Critical stress [MPa]': buckling['plate']['critical_stress'],
+                                           'Utilisation': plate_max_utilisation})
+
+        criteria_plating_info_dict = dict({'Buckling criteria': [self._assess_criteria(eta) for eta in plate_max_utilisation]})
+
+        buckling_stiffener_info_dict = dict({'Load case': load_cases[stiffener_case],
+                                             'Column critical stress [MPa]': buckling['column']['critical_stress'][stiffened],
+                                             'Column utilisation': column_max_utilisation,
+                                             'Torsional critical stress [MPa]': buckling['torsional']['critical_stress'][stiffened],
+                                             'Torsional utilisation': torsional_max_utilisation})
+
+        criteria_stiffener_info_dict = dict({'Column criteria': [self._assess_criteria(eta) for eta in column_max_utilisation],
+                                             'Torsional criteria': [self._assess_criteria(eta) for eta in torsional_max_utilisation]})
+
+        self._buckling_plating_info_pd = pd.DataFrame(data=buckling_plating_info_dict, index=plating_list)
+        self._buckling_stiffener_info_pd = pd.DataFrame(data=buckling_stiffener_info_dict, index=stiffened_plating_list)
+
+        self._criteria_plating_info_pd = pd.DataFrame(data=criteria_plating_info_dict, index=plating_list)
+        self._criteria_stiffener_info_pd = pd.DataFrame(data=criteria_stiffener_info_dict, index=stiffened_plating_list)
+
+    def print_buckling_info(self) -> None:
+        print(self._buckling_plating_info_pd)
+        print(self._buckling_stiffener_info_pd)
+
+    def print_criteria_info(self) -> None:
+        print(self._criteria_plating_info_pd)
+        print(self._criteria_stiffener_info_pd)
+
+    def _assess_criteria(self, utilisation: float) -> str:
+        if utilisation < 1.0:
+            return "Complied"
+        else:
+            return "Failed"
+
+
+def calculate_plate_elastic_buckling_stress(E_young, thickness, spacing):
+    """
+        Elastic buckling stress, in N/mm2, of plating between longitudinal stiffeners
+        under longitudinal compression. Thickness and spacing are in mm
+    """
+    return 3.6*E_young*(thickness/spacing)**2
+
+
+def calculate_stiffener_column_buckling_stress(E_young, second_moment, area, span):
+    """
+        Elastic column buckling stress, in N/mm2, of a stiffener with its effective plating.
+        second_moment is in cm4, area in cm2 and span in m
+    """
+    return 0.001*E_young*second_moment/(area*span**2)
+
+
+def calculate_flat_bar_torsional_buckling_stress(E_young, web_thickness, height):
+    """
+        Elastic torsional buckling stress, in N/mm2, of a flat bar,
+        0.385*E*It/Ip with the warping contribution neglected
+    """
+    return 0.385*E_young*(web_thickness/height)**2
+
+
+def apply_johnson_ostenfeld_correction(sigma_E, sigma_F):
+    """
+        Critical buckling stress, in N/mm2, from the elastic buckling stress sigma_E
+        and the yield stress sigma_F. The arguments may be numpy arrays
+    """
+    sigma_E = np.asarray(sigma_E, dtype=float)
+    with np.errstate(divide='ignore'):
+        sigma_c = np.where(sigma_E <= 0.5*sigma_F, sigma_E, sigma_F*(1.0 - sigma_F/(4.0*sigma_E)))
+    return sigma_c
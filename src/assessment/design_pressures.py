@@ -4,63 +4,85 @@ sys.path.append(os.path.dirname(os.path.dirname(__file__)))
 
 import math
 import numpy as np
+from collections import OrderedDict
 
+from hull_form import HullFormTable
 from material import export_a131_material
 from structural_element import StructuralElement
 from ship import create_vessel
 from ship import Ship
+from ship import ShipContext
+from ship import as_ship_context
+from ship import calculate_design_wave_height
+from ship import calculate_wave_height_factor
 
 
 class DesignPressures:
-    def __init__(self) -> None:
-        pass
-
-    def _calculate_design_wave_height(self, service_area: str) -> float:
-        Hs = 0.0
-        if service_area == "SA1":
-            Hs = 5.5
-        elif service_area == "SA2":
-            Hs = 4.0
-        elif service_area == "SA3":
-            Hs = 3.6
-        elif service_area == "SA4":
-            Hs = 2.5
+    def __init__(self, cache_size: int = 4096, hull_form: HullFormTable = None) -> None:
+        """
+        hull_form: angles used by the impact loads. Defaults to constant angles.
+            The cache belongs to this instance, so pressures computed with
+            different hull forms are never mixed.
+        cache_size: maximum number of design pressures kept in memory.
+            Pressures are keyed on (ship context, longitudinal position,
+            element mid height, struct type, inner space), so thickness changes
+            do not invalidate them. When the cache is full, the least recently
+            used pressure is dropped. A size of 0 disables the cache.
+        """
+        if hull_form is None:
+            hull_form = HullFormTable.constant()
+        self._hull_form = hull_form
+        self._cache_size = cache_size
+        self._pressure_cache = OrderedDict()
+        self._cache_hits = 0
+        self._cache_misses = 0
+
+    def _get_cached_pressure(self, key: tuple) -> float:
+        design_pressure = self._pressure_cache.get(key)
+        if design_pressure is None:
+            self._cache_misses += 1
         else:
-            Hs = 0.0
+            self._cache_hits += 1
+            self._pressure_cache.move_to_end(key)
+        return design_pressure
 
-        H_dw = 1.67*Hs
-        return H_dw
+    def _store_cached_pressure(self, key: tuple, design_pressure: float) -> None:
+        if self._cache_size <= 0:
+            return
+        self._pressure_cache[key] = design_pressure
+        if len(self._pressure_cache) > self._cache_size:
+            self._pressure_cache.popitem(last=False)
 
-    def _calculate_wave_height_factor(self, service_area: str) -> float:
-        if service_area == 'SA1':
-            fHs = 1.0
-        else:
-            fHs = self._calculate_design_wave_height(service_area)/self._calculate_design_wave_height("SA1")
+    @property
+    def hull_form(self) -> HullFormTable:
+        return self._hull_form
 
-        return fHs
+    def clear_cache(self) -> None:
+        self._pressure_cache.clear()
+        self._cache_hits = 0
+        self._cache_misses = 0
+
+    def cache_info(self) -> dict:
+        return dict(hits=self._cache_hits, misses=self._cache_misses,
+                    size=len(self._pressure_cache), max_size=self._cache_size)
+
+    def _calculate_design_wave_height(self, service_area: str) -> float:
+        return calculate_design_wave_height(service_area)
+
+    def _calculate_wave_height_factor(self, service_area: str) -> float:
+        return calculate_wave_height_factor(service_area)
 
     def _calculate_nominal_wave_height(self, x: float, pressure_type: str,
-                                       vessel: Ship) -> float:
+                                       vessel: Ship | ShipContext) -> float:
         """
         TODO: Fix x_wl
         """
         x_wl = x
         # vessel = create_vessel()
-        Cb = vessel.block_coefficient
-        g = 9.81
-        fHs = self._calculate_wave_height_factor(vessel.service_area)
-        C_w = fHs*0.0771*vessel.L*(Cb + 0.2)**0.3*math.exp(-0.0044*vessel.L)
-        Fn = 0.515*vessel.V/math.sqrt(g*vessel.L)
-        xm = max((0.2, 0.45 - 0.6*Fn))
-
-        if pressure_type == "shell":
-            kr = 2.25
-        else:
-            kr = 4.5
-
-        km = 1 + ((kr*(0.5 - xm)**2)/(Cb + 0.2))
-        C_w_min = (C_w/km)*math.sqrt(2.25/kr)
-        Hrm = C_w_min*(1 + (kr/(Cb + 0.2))*(x_wl/vessel.L - xm)**2)
+        context = as_ship_context(vessel)
+        Cb = context.block_coefficient
+        C_w_min, kr, xm = context.wave_parameters(pressure_type)
+        Hrm = C_w_min*(1 + (kr/(Cb + 0.2))*(x_wl/context.L - xm)**2)
         return Hrm
 
     def _calculate_hydrostatic_pressure(self, z: float, Tx: float, zk: float) -> float:
@@ -92,7 +114,7 @@ class DesignPressures:
         return Pw
 
     def _calculate_loads_shell_envelope(self, x_wl: float, struct_i: StructuralElement,
-                                        vessel: Ship) -> float:
+                                        vessel: Ship | ShipContext) -> float:
         """
         Hw: Nominal wave height
         Ps: Shell envelope pressure
@@ -101,14 +123,15 @@ class DesignPressures:
         Pwd: Pressure on weather deck
         """
         # vessel = create_vessel()
-        fHs = self._calculate_wave_height_factor(vessel.service_area)
+        context = as_ship_context(vessel)
+        fHs = context.wave_height_factor
 
-        Tx = vessel.T
-        Lwl = vessel.L
+        Tx = context.T
+        Lwl = context.L
         zk = 0.0
         z = (0.5*(struct_i.start_point[1] + struct_i.end_point[1]))/1000.
 
-        Hrm = self._calculate_nominal_wave_height(x_wl, "shell", vessel)
+        Hrm = self._calculate_nominal_wave_height(x_wl, "shell", context)
         Hw = 2.0*Hrm
 
         z_lim_1 = Tx + zk
@@ -154,120 +177,135 @@ class DesignPressures:
 
         return Ps
     
-    def _calculate_impact_loads_external_plating(self, x: float,
-                                                 struct_i: StructuralElement,
-                                                 vessel: Ship) -> float:
+    def _calculate_impact_loads_array(self, x: np.ndarray, z: np.ndarray, struct_type: np.ndarray,
+                                      context: ShipContext) -> np.ndarray:
         """
         IPbi: Bottom impact pressure
         IPbf: Bow flare impact pressure
 
-        Deadrise, buttock, effective deadrise, and waterline angles set randomly
+        x, z and struct_type are broadcast against each other, so a column of
+        longitudinal positions and a row of elements give a (stations x elements) map.
+        Deadrise, buttock, waterline and flare angles are interpolated from the hull-form table
         """
-        impact_load = 0.0
-        # vessel = create_vessel()
+        x = np.asarray(x, dtype=float)
+        z = np.asarray(z, dtype=float)
+        struct_type = np.asarray(struct_type)
 
-        Tx = vessel.T
+        Tx = context.T
         zk = 0.0
-        z = (0.5*(struct_i.start_point[1] + struct_i.end_point[1]))/1000.
-        Cb = vessel.block_coefficient
-
-        g = 9.81
+        Cb = context.block_coefficient
 
-        deadrise_angle = 50
-        buttock_angle = 13.0
-        effective_deadrise_angle = 13.0
-        waterline_angle = 0.0
-        
-        Vsp = (2.0/3.0)*vessel.V
+        angles = self._hull_form.interpolate(x)
+        deadrise_angle = angles['deadrise']
+        buttock_angle = angles['buttock']
+        waterline_angle = angles['waterline']
+        flare_angle = angles['flare']
 
-        # psi = effective_deadrise_angle
+        Vsp = (2.0/3.0)*context.V
 
         if Cb > 0.6:
-            psi_deg = max((buttock_angle, deadrise_angle))
+            psi_deg = np.maximum(buttock_angle, flare_angle)
         else:
-            psi_deg = max((buttock_angle, deadrise_angle - 10))
+            psi_deg = np.maximum(buttock_angle, flare_angle - 10)
 
         psi = np.deg2rad(psi_deg)
 
         beta_p = np.deg2rad(deadrise_angle)
+        beta_p_bf = np.deg2rad(flare_angle)
         gamma_p = np.deg2rad(waterline_angle)
-        alpha_p = math.atan(math.tan(beta_p)*math.tan(gamma_p))
-        
+        alpha_p = np.arctan(np.tan(beta_p_bf)*np.tan(gamma_p))
+
         alpha_p_deg = np.rad2deg(alpha_p)
         beta_p_deg = deadrise_angle
         gamma_p_deg = waterline_angle
 
-        omega = math.sqrt((2.0*math.pi*g)/(0.8*vessel.L))
-        omega_e = omega*(1.0 + (0.2*omega*Vsp)/g)
-        Hrm = self._calculate_nominal_wave_height(x, "impact", vessel)
+        omega_e = context.encounter_frequency
+        Hrm = self._calculate_nominal_wave_height(x, "impact", context)
         Zwl = z - (Tx + zk)
 
-        if struct_i.struct_type == "Bottom":
-            if beta_p_deg >= 10.0:
-                ksl = math.pi/math.tan(beta_p)
-            else:
-                ksl = 28.0*(1.0 - math.tan(2.0*beta_p))
-
-            fsl = 1.0
-            m1 = 0.25*(omega_e*fsl*Hrm)**2.0
-            m0 = 0.25*(fsl*Hrm)**2.0
-            Vth = math.sqrt(10.0)
-            u = ((Zwl**2)/(2*m0)) + ((Vth**2)/(2*m1))
-            PRsl = math.exp(-u)
-            Nsl = 1720.0*PRsl*math.sqrt(m1/m0)
-
-            if Nsl >= 1:
-                Vbs = math.sqrt(Vth**2 + 2*m1*math.log(Nsl))
-            else:
-                Vbs = 0.0
+        # Bottom slamming
+        ksl = np.where(beta_p_deg >= 10.0,
+                       math.pi/np.tan(beta_p),
+                       28.0*(1.0 - np.tan(2.0*beta_p)))
 
-            IPbi = 0.5*ksl*Vbs**2
-            impact_load = IPbi
-        elif struct_i.struct_type == "Side":
+        fsl = 1.0
+        m1 = 0.25*(omega_e*fsl*Hrm)**2.0
+        m0 = 0.25*(fsl*Hrm)**2.0
+        Vth = math.sqrt(10.0)
+        u = ((Zwl**2)/(2*m0)) + ((Vth**2)/(2*m1))
+        PRsl = np.exp(-u)
+        Nsl = 1720.0*PRsl*np.sqrt(m1/m0)
 
-            if psi_deg >= 10.0:
-                kbf = math.pi/math.tan(psi)
-            else:
-                kbf = 28.0*(1.0 - math.tan(psi))
+        Vbs = np.where(Nsl >= 1,
+                       np.sqrt(Vth**2 + 2*m1*np.log(np.maximum(Nsl, 1.0))),
+                       0.0)
 
-            if vessel.block_coefficient <= 0.6:
-                fsl_bf = 1.0
-            else:
-                fsl_bf = 1.2
+        IPbi = 0.5*ksl*Vbs**2
 
-            m1_bf = 0.25*(omega_e*fsl_bf*Hrm)**2.0
-            m0_bf = 0.25*(fsl_bf*Hrm)**2.0
+        # Bow flare slamming
+        kbf = np.where(psi_deg >= 10.0,
+                       math.pi/np.tan(psi),
+                       28.0*(1.0 - np.tan(psi)))
 
-            Vthbf = math.sqrt(10.0)/math.cos(alpha_p)
-            u_bf = ((Zwl**2)/(2*m0_bf)) + ((Vthbf**2)/(2*m1_bf))
-            PRbf = math.exp(-u_bf)
-            Nbf = 1720.0*PRbf*math.sqrt(m1_bf/m0_bf)
+        if Cb <= 0.6:
+            fsl_bf = 1.0
+        else:
+            fsl_bf = 1.2
 
-            if Nbf >= 1:
-                Vbf = math.sqrt(Vthbf**2 + 2*m1_bf*math.log(Nbf))
-            else:
-                Vbf = 0.0
+        m1_bf = 0.25*(omega_e*fsl_bf*Hrm)**2.0
+        m0_bf = 0.25*(fsl_bf*Hrm)**2.0
 
-            # Second term
-            if alpha_p_deg <= 80.0:
-                krv = math.pi/math.tan(np.deg2rad(90 - alpha_p_deg))
-            else:
-                krv = 28.0*(1.0 - math.tan(2.0*np.deg2rad(90 - alpha_p_deg)))
+        Vthbf = math.sqrt(10.0)/np.cos(alpha_p)
+        u_bf = ((Zwl**2)/(2*m0_bf)) + ((Vthbf**2)/(2*m1_bf))
+        PRbf = np.exp(-u_bf)
+        Nbf = 1720.0*PRbf*np.sqrt(m1_bf/m0_bf)
 
-            if gamma_p_deg >= 45.0:
-                Hrv = 1.0
-            elif gamma_p_deg < 0.0:
-                Hrv = 0.0
-            else:
-                Hrv = math.cos(np.deg2rad(45 - gamma_p_deg))
+        Vbf = np.where(Nbf >= 1,
+                       np.sqrt(Vthbf**2 + 2*m1_bf*np.log(np.maximum(Nbf, 1.0))),
+                       0.0)
 
-            Vrv = 0.515*Vsp*math.sin(gamma_p)
+        # Second term
+        krv = np.where(alpha_p_deg <= 80.0,
+                       math.pi/np.tan(np.deg2rad(90 - alpha_p_deg)),
+                       28.0*(1.0 - np.tan(2.0*np.deg2rad(90 - alpha_p_deg))))
 
-            IPbf = 0.5*(kbf*Vbf**2.0 + krv*Hrv*Vrv**2)
-            impact_load = IPbf
-        else:
-            impact_load = 0.0
+        Hrv = np.where(gamma_p_deg >= 45.0, 1.0,
+                       np.where(gamma_p_deg < 0.0, 0.0, np.cos(np.deg2rad(45 - gamma_p_deg))))
+
+        Vrv = 0.515*Vsp*np.sin(gamma_p)
 
+        IPbf = 0.5*(kbf*Vbf**2.0 + krv*Hrv*Vrv**2)
+
+        impact_load = np.where(struct_type == "Bottom", IPbi,
+                               np.where(struct_type == "Side", IPbf, 0.0))
+        return impact_load
+
+    def _calculate_impact_loads_external_plating(self, x: float,
+                                                 struct_i: StructuralElement,
+                                                 vessel: Ship | ShipContext) -> float:
+        """
+        IPbi: Bottom impact pressure
+        IPbf: Bow flare impact pressure
+        """
+        context = as_ship_context(vessel)
+        z = (0.5*(struct_i.start_point[1] + struct_i.end_point[1]))/1000.
+        with np.errstate(divide='ignore', invalid='ignore', over='ignore'):
+            impact_load = self._calculate_impact_loads_array(x, z, struct_i.struct_type, context)
+        return float(impact_load)
+
+    def calculate_impact_load_map(self, structure_list: list, stations: np.ndarray,
+                                  vessel: Ship | ShipContext) -> np.ndarray:
+        """
+            Impact pressures of all the elements at all the longitudinal positions,
+            as a (stations x elements) array. Elements other than bottom and side
+            shell plating get 0.0
+        """
+        context = as_ship_context(vessel)
+        x = np.asarray(stations, dtype=float)[:, np.newaxis]
+        z = np.array([0.5*(struct_i.start_point[1] + struct_i.end_point[1]) for struct_i in structure_list])/1000.
+        struct_type = np.array([struct_i.struct_type for struct_i in structure_list], dtype=object)
+        with np.errstate(divide='ignore', invalid='ignore', over='ignore'):
+            impact_load = self._calculate_impact_loads_array(x, z[np.newaxis, :], struct_type[np.newaxis, :], context)
         return impact_load
 
     def _compute_deck_pressures(self, struct_i: StructuralElement, inner_space='Accomodation'):
@@ -285,21 +323,34 @@ class DesignPressures:
         return P_in
     
     def calculate_design_pressure(self, struct_i: StructuralElement, x_wl: float,
-                                  vessel: Ship, inner_space: str) -> float:
+                                  vessel: Ship | ShipContext, inner_space: str = 'Accomodation') -> float:
         """
+        vessel may be a Ship or its ShipContext
         TODO: Correct the inner_space variables
         """
         # print(struct_i.struct_type)
         design_pressure = 0.0
+        context = as_ship_context(vessel)
+
+        if struct_i.struct_type == "Deck":
+            key = (context, None, None, struct_i.struct_type, inner_space)
+        else:
+            z = (0.5*(struct_i.start_point[1] + struct_i.end_point[1]))/1000.
+            key = (context, x_wl, round(z, 6), struct_i.struct_type, None)
+
+        cached_pressure = self._get_cached_pressure(key)
+        if cached_pressure is not None:
+            return cached_pressure
 
         if struct_i.struct_type == "Deck":
             #inner_space = "Accomodation"
             design_pressure = self._compute_deck_pressures(struct_i, inner_space)
         else:
-            design_pressure_1 = self._calculate_loads_shell_envelope(x_wl, struct_i, vessel)
-            design_pressure_2 = self._calculate_impact_loads_external_plating(x_wl, struct_i, vessel)
+            design_pressure_1 = self._calculate_loads_shell_envelope(x_wl, struct_i, context)
+            design_pressure_2 = self._calculate_impact_loads_external_plating(x_wl, struct_i, context)
             design_pressure = max((design_pressure_1, design_pressure_2))
 
+        self._store_cached_pressure(key, design_pressure)
         return design_pressure
     
 
@@ -376,6 +427,16 @@ def test():
     print(struct_2.design_pressure)
     print(struct_3.design_pressure)
     print(struct_4.design_pressure)
+
+    x = np.array([0.0, 30.0, 60.0, 100.0, 120.0, 142.0])
+    hull_form = HullFormTable(x,
+                              deadrise_angle=np.array([20.0, 12.0, 10.0, 14.0, 25.0, 40.0]),
+                              buttock_angle=np.array([10.0, 5.0, 2.0, 5.0, 13.0, 20.0]),
+                              waterline_angle=np.array([10.0, 0.0, 0.0, 10.0, 20.0, 30.0]),
+                              flare_angle=np.array([10.0, 5.0, 5.0, 20.0, 35.0, 50.0]))
+    loads = DesignPressures(hull_form=hull_form)
+    stations = np.linspace(0.0, 142.0, 8)
+    print(loads.calculate_impact_load_map([struct_0, struct_1, struct_2, struct_3], stations, vessel))
     
 
 if __name__ == '__main__':
@@ -1,33 +1,118 @@
 import math
 import numpy as np
+import pandas as pd
 import matplotlib.pyplot as plt
 
+from buckling import BucklingAssessment
 from design_pressures import DesignPressures
 from hull_girder_loads import HullGirderLoads
 from material import Material
 from ship import Ship
+from ship import as_ship_context
+from still_water_loads import StillWaterLoads
+from shear_flow import ShearFlowSolver
+from spatial_index import IntervalIndex
+from stiffeners import calculate_shear_lag_factor
+from stiffeners import compute_flat_bar_effective_section_properties
 from structural_design import StructuralDesign
+from structural_element import compile_element_arrays
+from structural_element import compile_stiffener_arrays
+
+SHARED_DESIGN_PRESSURES = DesignPressures()
+
 
 class HullCrossSection:
     def __init__(self, structure_list: list, x: float, mat: Material,
-                 vessel: Ship) -> None:
+                 vessel: Ship, loads: DesignPressures = None,
+                 still_water: StillWaterLoads = None) -> None:
+        """
+            loads: design pressure calculator. Sections built with the same
+                   calculator share its pressure cache, so rebuilding a section
+                   after thickness changes reuses the pressures
+            still_water: loading conditions giving the still water bending moments
+                         and shear forces of the hull girder checks (see HullGirderLoads)
+        """
         self._longitudinal_position = x
         self._structure_list = structure_list
         self._num_structures = len(structure_list)
         self._vessel = vessel
+        self._still_water = still_water
 
-        loads = DesignPressures()
+        if loads is None:
+            loads = SHARED_DESIGN_PRESSURES
+        context = as_ship_context(vessel)
 
         for struct_i in self._structure_list:
-            struct_i.design_pressure = loads.calculate_design_pressure(struct_i, x, vessel)
+            struct_i.design_pressure = loads.calculate_design_pressure(struct_i, x, context)
             struct_i.compute_struct_section_properties()
         
         self._material = mat
+        self._loads = loads
+
+        start_z = np.array([struct_i.start_point[1] for struct_i in self._structure_list])/1000.
+        end_z = np.array([struct_i.end_point[1] for struct_i in self._structure_list])/1000.
+        self._z_index = IntervalIndex(np.minimum(start_z, end_z), np.maximum(start_z, end_z))
     
     @property
     def vessel(self) -> Ship:
         return self._vessel
 
+    @property
+    def material(self) -> Material:
+        return self._material
+
+    @property
+    def longitudinal_position(self) -> float:
+        return self._longitudinal_position
+
+    @property
+    def structure_list(self) -> list:
+        return self._structure_list
+
+    @property
+    def z_index(self) -> IntervalIndex:
+        """
+            Index over the vertical extent of each element, in m
+        """
+        return self._z_index
+
+    def find_structures_below(self, z: float) -> list:
+        """
+            Elements lying entirely at or below the height z, in m
+        """
+        return [self._structure_list[i] for i in self._z_index.below(z)]
+
+    def find_structures_above(self, z: float) -> list:
+        """
+            Elements lying entirely at or above the height z, in m
+        """
+        return [self._structure_list[i] for i in self._z_index.above(z)]
+
+    def find_structures_crossing(self, z: float) -> list:
+        """
+            Elements cut by the horizontal line at the height z, in m
+        """
+        return [self._structure_list[i] for i in self._z_index.crossing(z)]
+
+    def find_structures_in_zone(self, z_min: float, z_max: float) -> list:
+        """
+            Elements with at least one point between z_min and z_max, in m
+        """
+        return [self._structure_list[i] for i in self._z_index.overlapping(z_min, z_max)]
+
+    def classify_pressure_tiers(self) -> np.ndarray:
+        """
+            Shell envelope pressure tier (1 to 4) of each element, from its mid height:
+            1: up to the draught, 2: up to one wave height above it,
+            3: up to 1.5 wave heights above it, 4: higher
+        """
+        context = as_ship_context(self._vessel)
+        Hw = 2.0*self._loads._calculate_nominal_wave_height(self._longitudinal_position, "shell", context)
+        Tx = context.T
+        z_limits = np.array([Tx, Tx + Hw, Tx + 1.5*Hw])
+        z_mid = 0.5*(self._z_index.lower + self._z_index.upper)
+        return np.searchsorted(z_limits, z_mid, side='left') + 1
+
     def _draw_secondary_stiffeners(self, start_pt: np.ndarray, end_pt: np.ndarray,
                                    num_spacings: int, offset: float,
                                    length: float, spacing: float):
@@ -87,7 +172,7 @@ class HullCrossSection:
             z_max = max(zi, zk)
             if z_max > max_height:
                 max_height = z_max
-            t_net = struct_i.current_thickness
+            t_net = struct_i.current_thickness*struct_i.material.young_modulus/self._material.young_modulus
             a_net = length_m*t_net*1e-3
             
             sy_net = 0.5*a_net*(zk + zi)
@@ -96,6 +181,13 @@ class HullCrossSection:
             A_net += (2*a_net)
             Sy_net += (2*sy_net)
             Iyo_net += (2*iyo_net)
+
+        # Longitudinal stiffeners
+        stiffeners = transform_stiffener_arrays(compile_stiffener_arrays(self._structure_list),
+                                                self.compute_modular_ratios())
+        A_net += 2*np.sum(stiffeners['area'])
+        Sy_net += 2*np.sum(stiffeners['area']*stiffeners['z'])
+        Iyo_net += 2*np.sum(stiffeners['second_moment'] + stiffeners['area']*stiffeners['z']**2)
         
         zn = Sy_net/A_net
 
@@ -153,6 +245,217 @@ class HullCrossSection:
         self._deck_section_modulus = Z_deck
         self._keel_section_modulus = Z_keel
     
+    def compute_cross_section_properties_array(self, thickness: np.ndarray,
+                                               effective_span: float = None) -> dict:
+        """
+            Same section properties as compute_cross_section_properties_1,
+            evaluated for many thickness sets at once.
+
+            thickness is an array of shape (..., num_structures), in mm.
+            Every returned value is an array of shape (...):
+            area in m2, neutral axis in m, inertia moments in m4, section moduli in m3.
+            The horizontal inertia moment Iz and product moment Iyz are included,
+            as are the longitudinal stiffeners, with their gross scantlings.
+            Elements of other materials are transformed by their modular ratio
+            (see compute_modular_ratios), so the properties are those of the
+            equivalent section in the reference material
+
+            effective_span: distance between zero bending moment points, in m.
+            When given, the vertical bending properties (area, neutral axis, Iy and
+            the deck and keel section moduli) use the shear-lag effective breadth of
+            the flanges (see compute_shear_lag_factors). The horizontal properties
+            (Iz, Iyz and the side section modulus) remain those of the gross section,
+            the factors being for vertical bending only
+        """
+        length_m = np.array([struct_i.length for struct_i in self._structure_list])/1000.
+        zi = np.array([struct_i.start_point[1] for struct_i in self._structure_list])/1000.
+        zk = np.array([struct_i.end_point[1] for struct_i in self._structure_list])/1000.
+        yi = np.array([struct_i.start_point[0] for struct_i in self._structure_list])/1000.
+        yk = np.array([struct_i.end_point[0] for struct_i in self._structure_list])/1000.
+        modular_ratio = self.compute_modular_ratios()
+        stiffeners = transform_stiffener_arrays(compile_stiffener_arrays(self._structure_list), modular_ratio)
+        thickness = np.asarray(thickness, dtype=float)*modular_ratio
+        section_properties = calculate_cross_section_properties(length_m, zi, zk, thickness, yi, yk, stiffeners)
+        if effective_span is not None:
+            effective_thickness = thickness*self.compute_shear_lag_factors(effective_span)
+            section_properties.update(calculate_cross_section_properties(length_m, zi, zk, effective_thickness,
+                                                                         stiffeners=stiffeners))
+        return section_properties
+
+    def compute_shear_lag_factors(self, effective_span: float) -> np.ndarray:
+        """
+            Ratio of effective to actual breadth of every element in vertical bending.
+            Flanges (elements closer to horizontal than to vertical) get
+            min(1, 0.3*(l/b)**(2/3)), with b the breadth of the flange bay between the
+            webs or corners supporting it (see calculate_flange_bays). A flange spanning several bays
+            gets the length weighted mean of their factors; webs keep their full breadth.
+            effective_span is in m
+        """
+        element_arrays = compile_element_arrays(self._structure_list)
+        direction_vector = element_arrays['end_point'] - element_arrays['start_point']
+        is_flange = np.abs(direction_vector[:, 0]) > np.abs(direction_vector[:, 1])
+        piece_element, piece_length, piece_breadth = calculate_flange_bays(element_arrays['start_point'],
+                                                                           element_arrays['end_point'], is_flange)
+        effective_length = np.bincount(piece_element,
+                                       weights=piece_length*calculate_shear_lag_factor(1000*effective_span, piece_breadth),
+                                       minlength=self._num_structures)
+        return np.where(is_flange, effective_length/element_arrays['length'], 1.0)
+
+    def compute_modular_ratios(self) -> np.ndarray:
+        """
+            Young's modulus of each element material over that of the section
+            reference material (the mat given to the section)
+        """
+        element_arrays = compile_element_arrays(self._structure_list)
+        return element_arrays['young_modulus']/(self._material.young_modulus/1e6)
+
+    def compute_permissible_stresses(self) -> np.ndarray:
+        """
+            Maximum permissible hull vertical bending stress of each element,
+            f_hg*f_hts*sigma_o with the global f_hts of the element material, in N/mm2
+        """
+        element_arrays = compile_element_arrays(self._structure_list)
+        f_hg = self._calculate_hull_girder_stress_factor(self._longitudinal_position)
+        return f_hg*element_arrays['hts_factor_global']*element_arrays['yield_stress']
+
+    def _find_deck_and_keel_elements(self) -> tuple[int, int]:
+        """
+            Positions of the elements where the deck and keel stresses are evaluated.
+            Among the elements reaching the highest (lowest) point, the one with the
+            largest modular ratio to permissible stress ratio governs
+        """
+        utilisation_per_stress = self.compute_modular_ratios()/self.compute_permissible_stresses()
+        at_deck = np.flatnonzero(self._z_index.upper == self._z_index.upper.max())
+        at_keel = np.flatnonzero(self._z_index.lower == self._z_index.lower.min())
+        deck_element = at_deck[np.argmax(utilisation_per_stress[at_deck])]
+        keel_element = at_keel[np.argmax(utilisation_per_stress[at_keel])]
+        return int(deck_element), int(keel_element)
+
+    def compute_stiffener_section_properties_array(self, span: float = None) -> np.ndarray:
+        """
+            Effective section properties of the secondary stiffeners of every
+            stiffened element, computed at once. Returns an array of shape
+            (4, num_stiffened): neutral axis in cm, area in cm2, section modulus in cm3
+            and inertia moment in cm4.
+
+            span: stiffener span in mm for the shear-lag effective breadth.
+            Defaults to the span given to each element when its stiffeners were inserted
+        """
+        element_arrays = compile_element_arrays(self._structure_list)
+        stiffened = element_arrays['num_stiffeners'] != 0
+        if span is None:
+            span = element_arrays['stiffener_span'][stiffened]
+        return compute_flat_bar_effective_section_properties(element_arrays['stiffener_height'][stiffened],
+                                                             element_arrays['stiffener_web_thickness'][stiffened],
+                                                             element_arrays['thickness'][stiffened],
+                                                             element_arrays['stiffener_spacing'][stiffened],
+                                                             span)
+
+    def compute_stress_recovery_points(self) -> dict:
+        """
+            Points where the hull girder stress is recovered: both edges of every
+            plate and the flange tip of every secondary stiffener.
+            Returns y and z in m, the index of the element the point belongs to,
+            and its location ('start', 'end' or 'stiffener tip')
+        """
+        y, z, element, location = [], [], [], []
+        for k, struct_i in enumerate(self._structure_list):
+            y.extend([struct_i.start_point[0], struct_i.end_point[0]])
+            z.extend([struct_i.start_point[1], struct_i.end_point[1]])
+            element.extend([k, k])
+            location.extend(['start', 'end'])
+
+            if struct_i._num_secondary_stiffeners != 0:
+                direction_vector = struct_i.end_point - struct_i.start_point
+                normal_vector = np.array([-direction_vector[1], direction_vector[0]])/struct_i.length
+                distance = struct_i._offset + struct_i.stiffener_spacing*np.arange(struct_i._num_spacings + 1)
+                stiffener_height = struct_i.current_thickness + struct_i._secondary_stiffener._height
+                tip_points = (struct_i.start_point + np.outer(distance/struct_i.length, direction_vector)
+                              + stiffener_height*normal_vector)
+                y.extend(tip_points[:, 0])
+                z.extend(tip_points[:, 1])
+                element.extend([k]*tip_points.shape[0])
+                location.extend(['stiffener tip']*tip_points.shape[0])
+
+        recovery_points = dict(y=np.array(y)/1000., z=np.array(z)/1000.,
+                               element=np.array(element), location=np.array(location, dtype=object))
+        return recovery_points
+
+    def iterate_stress_recovery(self, stations: np.ndarray, bending_moments: np.ndarray = None,
+                                chunk_size: int = 256, dtype=np.float32,
+                                horizontal_bending_moments: np.ndarray = None):
+        """
+            Hull girder bending stress sigma = n*M*(z - zn)/I, in N/mm2, at every
+            recovery point, for every station and load case, n being the modular
+            ratio of the element the point belongs to.
+
+            stations: longitudinal positions, in m. The section is assumed prismatic
+            bending_moments: array of shape (num_stations, num_load_cases), in kN.m.
+                Defaults to the hogging and sagging cases of HullGirderLoads
+            horizontal_bending_moments: optional array of the same shape as
+                bending_moments, in kN.m, positive when the side at y > 0 is in tension.
+                When given, the stress is the biaxial one, sigma(y, z)
+
+            Yields (first_station, stress) with stress of shape
+            (chunk, num_load_cases, num_points) and type dtype, so the whole
+            result never has to be held in memory
+        """
+        stations = np.atleast_1d(np.asarray(stations, dtype=float))
+        if bending_moments is None:
+            global_loads = HullGirderLoads(self._vessel, self._still_water)
+            bending_moments = global_loads.calculate_hull_girder_load_cases(stations)
+        bending_moments = np.asarray(bending_moments, dtype=float).reshape(stations.shape[0], -1)
+        if horizontal_bending_moments is not None:
+            horizontal_bending_moments = np.asarray(horizontal_bending_moments,
+                                                    dtype=float).reshape(bending_moments.shape)
+
+        thickness = np.array([struct_i.current_thickness for struct_i in self._structure_list])
+        section_properties = self.compute_cross_section_properties_array(thickness)
+        zn = section_properties['neutral_axis']
+        Iy = section_properties['second_moment']
+
+        points = self.compute_stress_recovery_points()
+        y = points['y']
+        z = points['z']
+        modular_ratio = self.compute_modular_ratios()[points['element']]
+        if horizontal_bending_moments is None:
+            stress_per_moment = modular_ratio*(z - zn)/(1000*Iy)
+        else:
+            Iz = section_properties['horizontal_second_moment']
+            Iyz = section_properties['product_moment']
+            determinant = Iy*Iz - Iyz**2
+            stress_per_moment = modular_ratio*(Iz*(z - zn) - Iyz*y)/(1000*determinant)
+            stress_per_horizontal_moment = modular_ratio*(Iy*y - Iyz*(z - zn))/(1000*determinant)
+
+        for first_station in range(0, stations.shape[0], chunk_size):
+            moments_k = bending_moments[first_station:first_station + chunk_size]
+            stress = moments_k[:, :, np.newaxis]*stress_per_moment
+            if horizontal_bending_moments is not None:
+                horizontal_moments_k = horizontal_bending_moments[first_station:first_station + chunk_size]
+                stress += horizontal_moments_k[:, :, np.newaxis]*stress_per_horizontal_moment
+            yield first_station, stress.astype(dtype)
+
+    def compute_stress_recovery(self, stations: np.ndarray, bending_moments: np.ndarray = None,
+                                dtype=np.float32, horizontal_bending_moments: np.ndarray = None) -> np.ndarray:
+        """
+            Full stress array of iterate_stress_recovery, of shape
+            (num_stations, num_load_cases, num_points)
+        """
+        stress_chunks = [stress for _, stress in self.iterate_stress_recovery(stations, bending_moments, dtype=dtype,
+                                                                               horizontal_bending_moments=horizontal_bending_moments)]
+        return np.concatenate(stress_chunks, axis=0)
+
+    def compute_biaxial_stress_recovery(self, stations: np.ndarray, dtype=np.float32) -> np.ndarray:
+        """
+            Combined vertical and horizontal bending stress, in N/mm2, of shape
+            (num_stations, num_load_cases, num_points), for the load cases of
+            HullGirderLoads.calculate_biaxial_load_cases (BIAXIAL_LOAD_CASES)
+        """
+        global_loads = HullGirderLoads(self._vessel, self._still_water)
+        M_vertical, M_horizontal = global_loads.calculate_biaxial_load_cases(stations)
+        return self.compute_stress_recovery(stations, M_vertical, dtype=dtype,
+                                            horizontal_bending_moments=M_horizontal)
+
     def print_cross_section_properties(self):
         print("=================================")
         print('Neutral axis: {:.3f} m'.format(self._cross_section_neutral_axis))
@@ -164,15 +467,29 @@ class HullCrossSection:
     def compute_longitudinal_strength(self):
         x = self._longitudinal_position
 
-        global_loads = HullGirderLoads(self._vessel)
+        global_loads = HullGirderLoads(self._vessel, self._still_water)
         hull_girder_bending_moment = global_loads.calculate_hull_girder_loads(x)
 
-        deck_bending_stress = hull_girder_bending_moment/(1000*self._deck_section_modulus)
-        keel_bending_stress = hull_girder_bending_moment/(1000*self._keel_section_modulus)
+        deck_element, keel_element = self._find_deck_and_keel_elements()
+        modular_ratio = self.compute_modular_ratios()
+        deck_bending_stress = modular_ratio[deck_element]*hull_girder_bending_moment/(1000*self._deck_section_modulus)
+        keel_bending_stress = modular_ratio[keel_element]*hull_girder_bending_moment/(1000*self._keel_section_modulus)
+
+        permissible_stresses = self.compute_permissible_stresses()
+        deck_permissible_stress = permissible_stresses[deck_element]
+        keel_permissible_stress = permissible_stresses[keel_element]
 
-        sigma_o = self._material.minimum_yield_stress
-        f_hts = self._material._hts_correction_factor("Global")
+        self._assess_strength_criteria(deck_bending_stress, keel_bending_stress,
+                                       deck_permissible_stress, keel_permissible_stress)
         
+        self._print_longitudinal_strength_information(deck_bending_stress,
+                                                      keel_bending_stress,
+                                                      deck_permissible_stress, keel_permissible_stress)
+    
+    def _calculate_hull_girder_stress_factor(self, x: float) -> float:
+        """
+            f_hg: hull girder stress factor along the length
+        """
         LR = self._vessel.L
 
         if x > 0.3*LR and x < 0.7*LR:
@@ -180,47 +497,393 @@ class HullCrossSection:
         else:
             f_hg = 0.319 + 2.311*(x/LR) - 2.974*(x/LR)**2
 
-        hull_girder_permisible_stress = f_hg*f_hts*sigma_o
+        return f_hg
 
-        self._assess_strength_criteria(deck_bending_stress, keel_bending_stress,
-                                       hull_girder_permisible_stress)
-        
-        self._print_longitudinal_strength_information(deck_bending_stress,
-                                                      keel_bending_stress,
-                                                      hull_girder_permisible_stress)
-    
-    def _assess_strength_criteria(self, sigma_D: float, sigma_B: float, sigma_P: float) -> None:
+    def _assess_strength_criteria(self, sigma_D: float, sigma_B: float, sigma_P: float,
+                                  sigma_P_keel: float = None) -> None:
         """
             sigma_D: hull girder bending stress at strength deck, in N/mm2
             sigma_B: hull girder bending stress at keel, in N/mm2
             sigma_P: maximum permissible hull vertical bending stress, in N/mm2
+            sigma_P_keel: permissible stress at keel, when its material differs. Defaults to sigma_P
         """
+        if sigma_P_keel is None:
+            sigma_P_keel = sigma_P
         print("=================================")
         if sigma_D < sigma_P:
             print("Deck bending stress criteria complied")
         else:
             print("Deck bending stress criteria failed")
         
-        if sigma_B < sigma_P:
+        if sigma_B < sigma_P_keel:
             print("Keel bending stress criteria complied")
         else:
             print("Keel bending stress criteria failed")
         print("=================================")
     
-    def _print_longitudinal_strength_information(self, sigma_D: float, sigma_B: float, sigma_P: float) -> None:
+    def _print_longitudinal_strength_information(self, sigma_D: float, sigma_B: float, sigma_P: float,
+                                                 sigma_P_keel: float = None) -> None:
         """
             sigma_D: hull girder bending stress at strength deck, in N/mm2
             sigma_B: hull girder bending stress at keel, in N/mm2
             sigma_P: maximum permissible hull vertical bending stress, in N/mm2
+            sigma_P_keel: permissible stress at keel, when its material differs. Defaults to sigma_P
         """
         print("=================================")
         print('Hull girder bending stress at strength deck: {:.3f} MPa'.format(sigma_D))
         print('Hull girder bending stress at keel: {:.3f} MPa'.format(sigma_B))
-        print('Maximum permissible hull vertical bending stress: {:.3f} MPa'.format(sigma_P))
+        if sigma_P_keel is None or sigma_P_keel == sigma_P:
+            print('Maximum permissible hull vertical bending stress: {:.3f} MPa'.format(sigma_P))
+        else:
+            print('Maximum permissible hull vertical bending stress at strength deck: {:.3f} MPa'.format(sigma_P))
+            print('Maximum permissible hull vertical bending stress at keel: {:.3f} MPa'.format(sigma_P_keel))
         print("=================================")
     
+    def compute_through_life_assessment(self, corrosion_rates: dict, ages: list) -> dict:
+        """
+            Net scantling assessment at every age, in one pass over an
+            (ages x elements) thickness matrix
+
+            corrosion_rates: thickness diminution per year, in mm/year, by struct type.
+                             Struct types not listed do not corrode
+            ages: ship ages, in years
+
+            Net thicknesses are applied to the plating and to the stiffener webs.
+            Required scantlings do not depend on the thickness, so they are computed once.
+            The stiffeners are checked for Z, I and Aw at their net scantlings, against the
+            same section properties as the gross check (Aw being the total stiffener area);
+            a stiffener fails when any of the three criteria does.
+        """
+        x = self._longitudinal_position
+        ages = np.asarray(ages, dtype=float)
+
+        struct_types = [struct_i.struct_type for struct_i in self._structure_list]
+        gross_thickness = np.array([struct_i.current_thickness for struct_i in self._structure_list])
+        rates = np.array([corrosion_rates.get(struct_type, 0.0) for struct_type in struct_types])
+        diminution = np.outer(ages, rates)
+        net_thickness = np.maximum(gross_thickness - diminution, 0.0)
+
+        # Hull girder strength
+        section_properties = self.compute_cross_section_properties_array(net_thickness)
+
+        global_loads = HullGirderLoads(self._vessel, self._still_water)
+        hull_girder_bending_moment = global_loads.calculate_hull_girder_loads(x)
+        deck_element, keel_element = self._find_deck_and_keel_elements()
+        modular_ratio = self.compute_modular_ratios()
+        deck_bending_stress = modular_ratio[deck_element]*hull_girder_bending_moment/(1000*section_properties['deck_section_modulus'])
+        keel_bending_stress = modular_ratio[keel_element]*hull_girder_bending_moment/(1000*section_properties['keel_section_modulus'])
+
+        permissible_stresses = self.compute_permissible_stresses()
+        hull_girder_permisible_stress = min(permissible_stresses[deck_element], permissible_stresses[keel_element])
+        hull_girder_criteria = ((deck_bending_stress < permissible_stresses[deck_element])
+                                & (keel_bending_stress < permissible_stresses[keel_element]))
+
+        # Local scantlings
+        local_scantling = StructuralDesign(self.vessel, self._material)
+        required_scantlings = local_scantling.calculate_scantling_sensitivities(self._structure_list)
+        thickness_criteria = required_scantlings['t']['value'] < net_thickness
+
+        stiffened = required_scantlings['stiffened']
+        stiffened_list = [struct_i for struct_i in self._structure_list if struct_i._num_secondary_stiffeners != 0]
+        stiffener_height = np.array([struct_i._secondary_stiffener._height for struct_i in stiffened_list])
+        stiffener_web_thickness = np.array([struct_i._secondary_stiffener._web_thickness for struct_i in stiffened_list])
+        stiffener_spacing = np.array([struct_i.stiffener_spacing for struct_i in stiffened_list])
+        stiffener_span = np.array([struct_i.stiffener_span for struct_i in stiffened_list])
+        net_web_thickness = np.maximum(stiffener_web_thickness - diminution[:, stiffened], 0.0)
+        stiffener_section_properties = compute_flat_bar_effective_section_properties(stiffener_height, net_web_thickness,
+                                                                                     net_thickness[:, stiffened],
+                                                                                     stiffener_spacing, stiffener_span)
+        stiffener_section_modulus = stiffener_section_properties[2]
+        stiffener_second_moment = stiffener_section_properties[3]
+        stiffener_area = stiffener_section_properties[1]
+        section_modulus_criteria = required_scantlings['Z']['value'][stiffened] < stiffener_section_modulus
+        second_moment_criteria = required_scantlings['I']['value'][stiffened] < stiffener_second_moment
+        area_criteria = required_scantlings['Aw']['value'][stiffened] < stiffener_area
+        stiffener_criteria = section_modulus_criteria & second_moment_criteria & area_criteria
+
+        through_life = dict(ages=ages,
+                            net_thickness=net_thickness,
+                            section_modulus=section_properties['section_modulus'],
+                            deck_section_modulus=section_properties['deck_section_modulus'],
+                            keel_section_modulus=section_properties['keel_section_modulus'],
+                            deck_bending_stress=deck_bending_stress,
+                            keel_bending_stress=keel_bending_stress,
+                            permissible_stress=hull_girder_permisible_stress,
+                            hull_girder_criteria=hull_girder_criteria,
+                            thickness_criteria=thickness_criteria,
+                            stiffener_section_modulus=stiffener_section_modulus,
+                            section_modulus_criteria=section_modulus_criteria,
+                            stiffener_second_moment=stiffener_second_moment,
+                            second_moment_criteria=second_moment_criteria,
+                            stiffener_area=stiffener_area,
+                            area_criteria=area_criteria,
+                            stiffener_criteria=stiffener_criteria)
+
+        through_life_info_dict = dict({'Section modulus [m3]': through_life['section_modulus'],
+                                       'Deck stress [MPa]': deck_bending_stress,
+                                       'Keel stress [MPa]': keel_bending_stress,
+                                       'Hull girder criteria': np.where(through_life['hull_girder_criteria'], 'Complied', 'Failed'),
+                                       'Failed platings': np.sum(~thickness_criteria, axis=1),
+                                       'Failed stiffeners': np.sum(~stiffener_criteria, axis=1)})
+        self._through_life_info_pd = pd.DataFrame(data=through_life_info_dict, index=pd.Index(ages, name='Age [years]'))
+
+        return through_life
+
+    def print_through_life_info(self) -> None:
+        print(self._through_life_info_pd)
+
+    def compute_shear_strength(self, stations: np.ndarray = None) -> dict:
+        """
+            Hull girder shear stress of every element at every station, assuming
+            a prismatic section, from the positive and negative shear force envelopes.
+            stations: longitudinal positions, in m. Defaults to 21 stations over the length
+
+            The topology of the shear flow solver is built on the first call and reused,
+            so later calls after thickness changes only solve the cell equations.
+            Elements with a shear stress factor (tau_xy) are checked against f_tau*tau_o
+        """
+        if stations is None:
+            stations = np.linspace(0.0, self._vessel.L, 21)
+        stations = np.atleast_1d(np.asarray(stations, dtype=float))
+
+        if not hasattr(self, '_shear_flow_solver'):
+            self._shear_flow_solver = ShearFlowSolver(self._structure_list)
+        thickness = np.array([struct_i.current_thickness for struct_i in self._structure_list])
+        shear_flow = self._shear_flow_solver.solve(thickness)
+
+        global_loads = HullGirderLoads(self._vessel, self._still_water)
+        shear_forces = global_loads.calculate_hull_girder_shear_force_cases(stations)
+        max_shear_force = np.max(np.abs(shear_forces), axis=1)
+        shear_stress = max_shear_force[:, np.newaxis]*shear_flow['shear_stress']
+
+        struct_types = np.array([struct_i.struct_type for struct_i in self._structure_list], dtype=object)
+        f_tau = StructuralDesign._gather_allowable_stress_factors(struct_types)[:, 1]
+        tau_o = np.array([struct_i.material.shear_strength for struct_i in self._structure_list])
+        permissible_shear_stress = f_tau*tau_o
+
+        governing_station = np.argmax(shear_stress, axis=0)
+        max_shear_stress = np.max(shear_stress, axis=0)
+        checked = f_tau > 1e-5
+        criteria = [self._assess_shear_criteria(tau, tau_p) if checked_i else "N/A"
+                    for tau, tau_p, checked_i in zip(max_shear_stress, permissible_shear_stress, checked)]
+
+        shear_strength_info_dict = dict({'Station [m]': stations[governing_station],
+                                         'Shear force [kN]': max_shear_force[governing_station],
+                                         'Shear stress [MPa]': max_shear_stress,
+                                         'Permissible stress [MPa]': permissible_shear_stress,
+                                         'Criteria': criteria})
+        names = [struct_i.name for struct_i in self._structure_list]
+        self._shear_strength_info_pd = pd.DataFrame(data=shear_strength_info_dict, index=names)
+
+        shear_strength = dict(stations=stations, shear_force=shear_forces,
+                              shear_stress=shear_stress,
+                              permissible_shear_stress=permissible_shear_stress)
+        return shear_strength
+
+    def _assess_shear_criteria(self, tau: float, tau_p: float) -> str:
+        if tau < tau_p:
+            return "Complied"
+        else:
+            return "Failed"
+
+    def print_shear_strength_info(self) -> None:
+        print(self._shear_strength_info_pd)
+
+    def compute_buckling_assessment(self) -> None:
+        """
+            Buckling of the platings and stiffeners under the hogging and sagging
+            hull girder loads at the section position. Each plating takes the
+            largest compressive stress at its edges, and its stiffeners the largest
+            one over all its recovery points, stiffener tips included
+        """
+        x = self._longitudinal_position
+        recovery_points = self.compute_stress_recovery_points()
+        stress = self.compute_stress_recovery([x], dtype=float)[0]
+        plate_points = recovery_points['location'] != 'stiffener tip'
+
+        num_load_cases = stress.shape[0]
+        plate_stress = np.zeros((num_load_cases, self._num_structures))
+        stiffener_stress = np.zeros((num_load_cases, self._num_structures))
+        for k in range(num_load_cases):
+            np.minimum.at(plate_stress[k], recovery_points['element'][plate_points], stress[k][plate_points])
+            np.minimum.at(stiffener_stress[k], recovery_points['element'], stress[k])
+
+        self._buckling = BucklingAssessment(self._vessel, self._material)
+        self._buckling.calculate_structural_buckling(self._structure_list, -plate_stress,
+                                                     load_cases=['Hogging', 'Sagging'],
+                                                     stiffener_stress=-stiffener_stress)
+        self._buckling.print_buckling_info()
+
+        if hasattr(self, '_local_scantling'):
+            self._local_scantling.add_buckling_criteria(self._buckling)
+            self._local_scantling.print_criteria_info()
+        else:
+            self._buckling.print_criteria_info()
+
     def calculate_local_scantlings(self):
         local_scantling = StructuralDesign(self.vessel, self._material)
         local_scantling.calculate_structural_scantling(self._structure_list)
         local_scantling.print_scantling_info()
         local_scantling.print_criteria_info()
+        if any(struct_i._num_primary_members != 0 for struct_i in self._structure_list):
+            local_scantling.calculate_primary_member_scantling(self._structure_list)
+            local_scantling.print_primary_member_info()
+        self._local_scantling = local_scantling
+
+
+def transform_stiffener_arrays(stiffeners: dict, modular_ratio: np.ndarray) -> dict:
+    """
+        Stiffener arrays of compile_stiffener_arrays with the areas and inertia
+        moments scaled by the modular ratio of the element each stiffener belongs to
+    """
+    stiffener_ratio = modular_ratio[stiffeners['element']]
+    transformed = dict(stiffeners)
+    for key in ['area', 'second_moment', 'horizontal_second_moment']:
+        transformed[key] = stiffeners[key]*stiffener_ratio
+    return transformed
+
+
+def calculate_cross_section_properties(length_m: np.ndarray, zi: np.ndarray,
+                                       zk: np.ndarray, thickness: np.ndarray,
+                                       yi: np.ndarray = None, yk: np.ndarray = None,
+                                       stiffeners: dict = None) -> dict:
+    """
+        Section properties of the first method for arrays of half sections.
+        The last axis of every argument runs over the structural elements,
+        the leading axes (if any) over the sections
+
+        length_m, zi, zk, yi and yk are in m
+        thickness is in mm
+
+        When the horizontal coordinates yi and yk are given, the horizontal
+        inertia moment Iz about the centreline and the product moment Iyz of the
+        mirrored section are returned too. Iyz vanishes by symmetry
+
+        stiffeners: arrays of the longitudinal stiffeners of the half section, as
+        returned by compile_stiffener_arrays (y and z in m, area in m2, local
+        inertia moments in m4). Their contributions are added to the plating
+    """
+    thickness = np.asarray(thickness, dtype=float)
+    max_height = np.max(np.maximum(zi, zk), axis=-1)
+
+    # The section properties are linear in the plate thicknesses
+    area_per_thickness = 2*length_m*1e-3
+    first_moment_per_thickness = 0.5*area_per_thickness*(zk + zi)
+    second_moment_per_thickness = (area_per_thickness/3.)*(zk**2 + zk*zi + zi**2)
+
+    A_net = np.sum(thickness*area_per_thickness, axis=-1)
+    Sy_net = np.sum(thickness*first_moment_per_thickness, axis=-1)
+    Iyo_net = np.sum(thickness*second_moment_per_thickness, axis=-1)
+
+    if stiffeners is not None:
+        stiffener_area = 2*stiffeners['area']
+        A_net = A_net + np.sum(stiffener_area, axis=-1)
+        Sy_net = Sy_net + np.sum(stiffener_area*stiffeners['z'], axis=-1)
+        Iyo_net = Iyo_net + np.sum(2*stiffeners['second_moment'] + stiffener_area*stiffeners['z']**2, axis=-1)
+
+    zn = Sy_net/A_net
+    Iy_net = Iyo_net - A_net*zn**2
+
+    Z_keel = Iy_net/zn
+    Z_deck = Iy_net/(max_height - zn)
+
+    section_properties = dict(area=A_net, neutral_axis=zn, second_moment=Iy_net,
+                              section_modulus=np.minimum(Z_deck, Z_keel),
+                              deck_section_modulus=Z_deck, keel_section_modulus=Z_keel)
+
+    if yi is not None and yk is not None:
+        horizontal_moment_per_thickness = (area_per_thickness/3.)*(yk**2 + yk*yi + yi**2)
+        Iz_net = np.sum(thickness*horizontal_moment_per_thickness, axis=-1)
+        if stiffeners is not None:
+            Iz_net = Iz_net + np.sum(2*stiffeners['horizontal_second_moment'] + stiffener_area*stiffeners['y']**2, axis=-1)
+        Z_side = Iz_net/np.max(np.maximum(np.abs(yi), np.abs(yk)), axis=-1)
+        section_properties.update(horizontal_second_moment=Iz_net, product_moment=np.zeros_like(Iz_net),
+                                  side_section_modulus=Z_side)
+    return section_properties
+
+
+def calculate_point_to_segment_distances(points: np.ndarray, segment_start: np.ndarray,
+                                         segment_end: np.ndarray) -> np.ndarray:
+    """
+        Distances from every point to every segment, of shape (num_points, num_segments).
+        points, segment_start and segment_end are arrays of shape (n, 2)
+    """
+    direction = segment_end - segment_start
+    relative = points[:, np.newaxis, :] - segment_start
+    along = np.clip(np.sum(relative*direction, axis=-1)/np.sum(direction**2, axis=-1), 0.0, 1.0)
+    return np.hypot(*np.moveaxis(relative - along[..., np.newaxis]*direction, -1, 0))
+
+
+def calculate_flange_bays(start_point: np.ndarray, end_point: np.ndarray,
+                          is_flange: np.ndarray, tolerance: float = 1.0) -> tuple:
+    """
+        Bays of the flange plating between its supports, for the shear-lag
+        effective breadth. start_point and end_point are arrays of shape
+        (num_structures, 2), in mm, and is_flange selects the elements split into
+        bays; every element, selected or not, can support them.
+
+        A flange is supported wherever other plating meets it at an angle: a web
+        or another flange ending on it, or the element it ends on (a corner or a
+        T-junction). Flange pieces in line, joined end to end, form a single bay.
+        A bay supported at both ends has its length along the plating as breadth.
+        A bay with an unsupported end (the centreline or a free edge) is taken as
+        symmetric about that end, and its breadth is twice its length.
+
+        tolerance: distance, in mm, below which two points are the same, as in ShearFlowSolver
+
+        Returns the element, length and bay breadth of every piece, in mm
+    """
+    start_point = np.asarray(start_point, dtype=float).reshape(-1, 2)
+    end_point = np.asarray(end_point, dtype=float).reshape(-1, 2)
+    direction = end_point - start_point
+    length = np.hypot(direction[:, 0], direction[:, 1])
+
+    # Elements in line with each other do not support each other
+    def distance_to_lines(points: np.ndarray) -> np.ndarray:
+        relative = points[:, np.newaxis, :] - start_point
+        return np.abs(relative[..., 0]*direction[:, 1] - relative[..., 1]*direction[:, 0])/length
+    supporting = ~((distance_to_lines(start_point) < tolerance) & (distance_to_lines(end_point) < tolerance))
+    # start_on[i, k]: start point of i lying on element k
+    start_on = calculate_point_to_segment_distances(start_point, start_point, end_point) < tolerance
+    end_on = calculate_point_to_segment_distances(end_point, start_point, end_point) < tolerance
+
+    piece_element, piece_length, piece_supports, free_ends = [], [], [], []
+    for k in np.flatnonzero(is_flange):
+        p0, p1 = start_point[k], end_point[k]
+        ends_on_k = np.vstack([start_point[start_on[:, k] & supporting[:, k]],
+                               end_point[end_on[:, k] & supporting[:, k]]])
+        along = (ends_on_k - p0) @ direction[k]/length[k]
+        inside = along[(along > tolerance) & (along < length[k] - tolerance)]
+        cuts = np.unique(np.concatenate([[0.0], inside, [length[k]]]))
+        num_pieces = cuts.shape[0] - 1
+        supported = np.ones(num_pieces + 1, dtype=bool)
+        supported[0] = np.any(start_on[k] & supporting[k])
+        supported[-1] = np.any(end_on[k] & supporting[k])
+        for j in range(num_pieces):
+            # The unsupported ends of a piece are ends of its element
+            for end_j, point_j in [(j, p0), (j + 1, p1)]:
+                if not supported[end_j]:
+                    free_ends.append((len(piece_element), point_j))
+            piece_element.append(k)
+            piece_length.append(cuts[j + 1] - cuts[j])
+            piece_supports.append(int(supported[j]) + int(supported[j + 1]))
+
+    piece_element = np.array(piece_element, dtype=int)
+    piece_length = np.array(piece_length, dtype=float)
+    piece_supports = np.array(piece_supports, dtype=float)
+
+    # Pieces meeting two by two at an unsupported point belong to the same bay
+    bay = np.arange(piece_element.shape[0])
+    if free_ends:
+        free_pieces = np.array([piece_j for piece_j, _ in free_ends])
+        keys = np.round(np.array([point_j for _, point_j in free_ends])/tolerance).astype(np.int64)
+        _, joint, joint_count = np.unique(keys, axis=0, return_inverse=True, return_counts=True)
+        joint = joint.ravel()
+        for joint_j in np.flatnonzero(joint_count == 2):
+            piece_a, piece_b = free_pieces[joint == joint_j]
+            bay[bay == bay[piece_a]] = bay[piece_b]
+
+    bay_length = np.bincount(bay, weights=piece_length, minlength=bay.shape[0])
+    bay_supports = np.bincount(bay, weights=piece_supports, minlength=bay.shape[0])
+    bay_breadth = np.where(bay_supports >= 2, bay_length, 2.0*bay_length)
+    return piece_element, piece_length, bay_breadth[bay]
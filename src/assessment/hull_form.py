@@ -0,0 +1,73 @@
+import numpy as np
+
+
+class HullFormTable:
+    def __init__(self, x: np.ndarray, deadrise_angle: np.ndarray,
+                 buttock_angle: np.ndarray, waterline_angle: np.ndarray,
+                 flare_angle: np.ndarray) -> None:
+        """
+        Hull-form angles tabulated along the length, used by the impact loads
+
+        Variables
+        ----------
+
+        * x: longitudinal positions, in m, in increasing order
+        * deadrise_angle: bottom deadrise angle, in degrees
+        * buttock_angle: buttock angle, in degrees
+        * waterline_angle: waterline angle, in degrees
+        * flare_angle: bow flare angle, in degrees
+
+        Angles between stations are linearly interpolated.
+        Outside the table, the angles of the end stations are used
+        """
+        self._x = np.asarray(x, dtype=float)
+        self._angles = dict(deadrise=np.asarray(deadrise_angle, dtype=float),
+                            buttock=np.asarray(buttock_angle, dtype=float),
+                            waterline=np.asarray(waterline_angle, dtype=float),
+                            flare=np.asarray(flare_angle, dtype=float))
+
+        if np.any(np.diff(self._x) <= 0.0):
+            error_msg = "Hull-form stations must be in increasing order"
+            raise Exception(error_msg)
+        for angle_name, angle_values in self._angles.items():
+            if angle_values.shape != self._x.shape:
+                error_msg = "The {} angles do not match the number of stations".format(angle_name)
+                raise Exception(error_msg)
+
+    @classmethod
+    def constant(cls, deadrise_angle: float = 50.0, buttock_angle: float = 13.0,
+                 waterline_angle: float = 0.0, flare_angle: float = 50.0) -> 'HullFormTable':
+        """
+            Same angles everywhere along the length.
+            The defaults are the angles previously hard-coded in the impact loads
+        """
+        x = np.array([0.0, 1.0])
+        return cls(x, np.full(2, deadrise_angle), np.full(2, buttock_angle),
+                   np.full(2, waterline_angle), np.full(2, flare_angle))
+
+    @property
+    def x(self) -> np.ndarray:
+        return self._x
+
+    def interpolate(self, x: np.ndarray) -> dict:
+        """
+            Angles, in degrees, at the positions x (scalar or array of any shape)
+        """
+        angles = dict()
+        for angle_name, angle_values in self._angles.items():
+            angles[angle_name] = np.interp(x, self._x, angle_values)
+        return angles
+
+
+def test():
+    x = np.array([0.0, 30.0, 60.0, 100.0, 120.0, 142.0])
+    deadrise_angle = np.array([20.0, 12.0, 10.0, 14.0, 25.0, 40.0])
+    buttock_angle = np.array([10.0, 5.0, 2.0, 5.0, 13.0, 20.0])
+    waterline_angle = np.array([10.0, 0.0, 0.0, 10.0, 20.0, 30.0])
+    flare_angle = np.array([10.0, 5.0, 5.0, 20.0, 35.0, 50.0])
+    hull_form = HullFormTable(x, deadrise_angle, buttock_angle, waterline_angle, flare_angle)
+    print(hull_form.interpolate(np.linspace(0.0, 142.0, 8)))
+
+
+if __name__ == '__main__':
+    test()
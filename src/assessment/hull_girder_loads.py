@@ -2,22 +2,35 @@ import numpy as np
 
 from ship import create_vessel
 from ship import Ship
+from ship import ShipContext
+from ship import as_ship_context
+from ship import calculate_rule_coefficients
+from still_water_loads import StillWaterLoads
+
+# Signed still water bending moments, in kN.m: hogging positive, sagging negative
+STILL_WATER_BENDING_MOMENT_HOGGING = 25000.
+STILL_WATER_BENDING_MOMENT_SAGGING = -10000.
+SWBM_DISTRIBUTION_X = np.array([0.0, 0.1, 0.3, 0.7, 0.9, 1.0])
+SWBM_DISTRIBUTION_F = np.array([0.0, 0.15, 1.0, 1.0, 0.15, 0.0])
+BIAXIAL_LOAD_CASES = ['Hogging, +Mwh', 'Hogging, -Mwh', 'Sagging, +Mwh', 'Sagging, -Mwh']
+
 
 class HullGirderLoads:
-    def __init__(self, vessel: Ship) -> None:
+    def __init__(self, vessel: Ship | ShipContext, still_water: StillWaterLoads = None) -> None:
+        """
+            still_water: loading conditions giving the still water bending moments and
+                         shear forces. Without them, the STILL_WATER_BENDING_MOMENT
+                         values distributed by f_sw are used
+        """
         self._ship = vessel
+        self._context = as_ship_context(vessel)
+        self._still_water = still_water
 
     def _calculate_distribution_factor(self, x: float, Ls: float) -> float:
-        x_vector = np.array([0.0, 0.1*Ls, 0.3*Ls, 0.7*Ls, 0.9*Ls, Ls])
-        f_sw_vector = np.array([0.0, 0.15, 1.0, 1.0, 0.15, 0.0])
-        f_sw = np.interp(x, x_vector, f_sw_vector)
-        return f_sw
+        return calculate_distribution_factor_SWBM(x, Ls)
     
     def _calculate_distribution_factor_VWBM(self, x: float, Ls: float) -> float:
-        x_vector = np.array([0.0, 0.4*Ls, 0.65*Ls, Ls])
-        f_m_vector = np.array([0.0, 1.0, 1.0, 0.0])
-        f_m = np.interp(x, x_vector, f_m_vector)
-        return f_m
+        return calculate_distribution_factor_VWBM(x, Ls)
     
     def _calculate_vertical_wave_bending_moment(self, x: float, Cw: float,
                                                 Ls: float, B: float,
@@ -28,25 +41,7 @@ class HullGirderLoads:
             MWH: Vertical wave bending moment in sagging condition
         """
 
-        if Ls <= 90:
-            Lf = 0.0412*Ls + 4.0
-        elif Ls > 90 and Ls <= 300:
-            Lf = 10.75 - ((300-Ls)/100)**1.5
-        elif Ls > 300 and Ls <= 350:
-            Lf = 10.75
-        elif Ls > 350 and Ls < 500:
-            Lf = 10.75 - ((Ls - 350)/150)**1.5
-
-        Cb1 = max(Cb, 0.6)
-        fs = 1.0
-        Mo = 0.1*Lf*fs*(Ls**2)*B*(Cb1 + 0.7)
-
-        FfH = (1.9*Cb1)/(Cb1+0.7)
-        FfS = -1.1
-        Df = self._calculate_distribution_factor_VWBM(x, Ls)
-
-        MwH = FfH*Df*Mo
-        MwS = FfS*Df*Mo
+        MwH, MwS = calculate_vertical_wave_bending_moments(x, Ls, B, Cb)
 
         print('Hogging vertical wave bending moment: {:.3f} kN.m'.format(MwH))
         print('Sagging vertical wave bending moment: {:.3f} kN.m'.format(MwS))
@@ -74,6 +69,20 @@ class HullGirderLoads:
         # M_sw_s_min = -0.85*f_sw*(171*Cw*Ls**2*B*(Cb+0.7)*1e-3 + M_wv_s)
 
         return M_sw_h_min, M_sw_s_min
+
+    def _calculate_still_water_bending_moments(self, x) -> tuple:
+        """
+            Hogging and sagging still water bending moments, in kN.m, at the positions x,
+            None when no loading conditions are given
+        """
+        if self._still_water is None:
+            return None
+        return self._still_water.calculate_bending_moment_envelope(x)
+
+    def _calculate_still_water_shear_forces(self, x) -> tuple:
+        if self._still_water is None:
+            return None
+        return self._still_water.calculate_shear_force_envelope(x)
     
     def calculate_hull_girder_loads(self, x: float) -> float:
         """
@@ -83,24 +92,16 @@ class HullGirderLoads:
         M_wv_h: Vertical wave bending moment in hogging condition
         M_wv_s: Vertical wave bending moment in sagging condition
         """
-        L = self._ship.L
-        Ls = 0.96*L
-        B = self._ship.B
-        T = self._ship.T
-        delta = self._ship.disp
-
-        Cb = delta/(1.025*L*B*T)
-
-        if Ls >= 90 and Ls < 300:
-            Cw = 10.75 - ((300-Ls)/100)**1.5
-        elif Ls >= 300 and Ls < 350:
-            Cw = 10.75
-        elif Ls >= 350 and Ls < 500:
-            Cw = 10.75 - ((Ls - 350)/150)**1.5
+        B = self._context.B
+        Ls = self._context.rule_length
+        Cb = self._context.block_coefficient
+        Cw = self._context.rule_wave_coefficient
         
         # M_sw_h, M_sw_s = self._calculate_minimum_still_water_bending_moment(x, Cw, Ls, B, Cb)
-        M_sw_h = 25000.
-        M_sw_s = 10000.
+        M_sw_h = STILL_WATER_BENDING_MOMENT_HOGGING
+        M_sw_s = STILL_WATER_BENDING_MOMENT_SAGGING
+        if self._still_water is not None:
+            M_sw_h, M_sw_s = [float(M_sw[0]) for M_sw in self._calculate_still_water_bending_moments(x)]
         M_wv_h, M_wv_s = self._calculate_vertical_wave_bending_moment(x, Cw, Ls, B, Cb)
 
         M_hogging = M_sw_h + M_wv_h
@@ -111,7 +112,188 @@ class HullGirderLoads:
         print('Sagging bending moment: {:.3f} kN.m'.format(M_sagging))
         print("=================================")
 
-        hull_girder_bending_moment = max(M_hogging, M_sagging)
+        # Sagging moments are negative, the governing case is the largest in magnitude
+        hull_girder_bending_moment = max(abs(M_hogging), abs(M_sagging))
 
         return hull_girder_bending_moment
-    
\ No newline at end of file
+
+    def calculate_hull_girder_load_cases(self, x: np.ndarray) -> np.ndarray:
+        """
+            Hull girder bending moments, in kN.m, at the longitudinal positions x,
+            without printing. Returns an array of shape (num_positions, 2):
+            column 0 is the hogging load case and column 1 the sagging load case
+        """
+        x = np.atleast_1d(np.asarray(x, dtype=float))
+        context = self._context
+        M_hogging, M_sagging = calculate_hull_girder_bending_moments(x, context.L, context.B,
+                                                                     context.T, context.disp,
+                                                                     self._calculate_still_water_bending_moments(x))
+        return np.stack([M_hogging, M_sagging], axis=-1)
+
+    def calculate_hull_girder_shear_force_cases(self, x: np.ndarray) -> np.ndarray:
+        """
+            Vertical shear forces, in kN, at the longitudinal positions x.
+            Returns an array of shape (num_positions, 2): column 0 is the
+            positive envelope and column 1 the negative envelope
+        """
+        x = np.atleast_1d(np.asarray(x, dtype=float))
+        context = self._context
+        Q_positive, Q_negative = calculate_hull_girder_shear_forces(x, context.L, context.B,
+                                                                    context.T, context.disp,
+                                                                    self._calculate_still_water_shear_forces(x))
+        return np.stack([Q_positive, Q_negative], axis=-1)
+
+    def calculate_biaxial_load_cases(self, x: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+        """
+            Vertical and horizontal bending moments, in kN.m, at the longitudinal
+            positions x, for the load cases of BIAXIAL_LOAD_CASES: the hogging and
+            sagging vertical moments, each with the horizontal wave bending moment
+            of both signs. Returns two arrays of shape (num_positions, 4)
+        """
+        x = np.atleast_1d(np.asarray(x, dtype=float))
+        context = self._context
+        M_hogging, M_sagging = calculate_hull_girder_bending_moments(x, context.L, context.B,
+                                                                     context.T, context.disp,
+                                                                     self._calculate_still_water_bending_moments(x))
+        Ls, Cb, _ = calculate_rule_coefficients(context.L, context.B, context.T, context.disp)
+        M_wh = calculate_horizontal_wave_bending_moments(x, Ls, context.B, context.T, Cb)
+
+        M_vertical = np.stack([M_hogging, M_hogging, M_sagging, M_sagging], axis=-1)
+        M_horizontal = np.stack([M_wh, -M_wh, M_wh, -M_wh], axis=-1)
+        return M_vertical, M_horizontal
+
+
+def calculate_distribution_factor_SWBM(x, Ls):
+    """
+        Distribution factor of the still water bending moment.
+        x and Ls may be numpy arrays
+    """
+    x_ratio = np.asarray(x, dtype=float)/Ls
+    return np.interp(x_ratio, SWBM_DISTRIBUTION_X, SWBM_DISTRIBUTION_F)
+
+
+def calculate_still_water_shear_forces(x, Ls) -> tuple:
+    """
+        Still water shear forces, in kN, as the slope of the hogging and sagging
+        still water bending moment distributions f_sw*M_sw.
+        At a kink of f_sw the slope of the segment aft of x is used.
+        x and Ls may be numpy arrays
+    """
+    x_ratio = np.asarray(x, dtype=float)/Ls
+    slopes = np.diff(SWBM_DISTRIBUTION_F)/np.diff(SWBM_DISTRIBUTION_X)
+    segment = np.clip(np.searchsorted(SWBM_DISTRIBUTION_X, x_ratio, side='right') - 1, 0, slopes.shape[0] - 1)
+    df_sw_dx = slopes[segment]/Ls
+
+    Q_sw_h = df_sw_dx*STILL_WATER_BENDING_MOMENT_HOGGING
+    Q_sw_s = df_sw_dx*STILL_WATER_BENDING_MOMENT_SAGGING
+    return Q_sw_h, Q_sw_s
+
+
+def calculate_vertical_wave_shear_forces(x, Ls, B, Cb, Cw) -> tuple:
+    """
+        IACS UR S11 vertical wave shear forces, in kN.
+        FwP: positive wave shear force
+        FwN: negative wave shear force
+
+        The arguments may be numpy arrays
+    """
+    x_ratio = np.asarray(x, dtype=float)/Ls
+    Cb1 = np.maximum(Cb, 0.6)
+    F_peak = 190*Cb1/(110*(Cb1 + 0.7))
+
+    x_vector = np.array([0.0, 0.2, 0.3, 0.4, 0.6, 0.7, 0.85, 1.0])
+    F1 = np.interp(x_ratio, x_vector, np.array([0.0, 0.92*F_peak, 0.92*F_peak, 0.7, 0.7, 1.0, 1.0, 0.0]))
+    F2 = np.interp(x_ratio, x_vector, np.array([0.0, 0.92, 0.92, 0.7, 0.7, F_peak, F_peak, 0.0]))
+
+    FwP = 0.3*F1*Cw*Ls*B*(Cb1 + 0.7)
+    FwN = -0.3*F2*Cw*Ls*B*(Cb1 + 0.7)
+    return FwP, FwN
+
+
+def calculate_hull_girder_shear_forces(x, L, B, T, disp, Q_sw=None) -> tuple:
+    """
+        Positive and negative vertical shear force envelopes, in kN:
+        the still water shear force of either condition plus the wave shear force.
+        Q_sw: optional pair of still water shear forces at x, in kN, for instance
+              StillWaterLoads.calculate_shear_force_envelope. Defaults to
+              calculate_still_water_shear_forces
+        The arguments may be numpy arrays
+    """
+    Ls, Cb, Cw = calculate_rule_coefficients(L, B, T, disp)
+    if Q_sw is None:
+        Q_sw = calculate_still_water_shear_forces(x, Ls)
+    Q_sw_h, Q_sw_s = Q_sw
+    FwP, FwN = calculate_vertical_wave_shear_forces(x, Ls, B, Cb, Cw)
+
+    Q_positive = np.maximum(Q_sw_h, Q_sw_s) + FwP
+    Q_negative = np.minimum(Q_sw_h, Q_sw_s) + FwN
+    return Q_positive, Q_negative
+
+
+def calculate_distribution_factor_VWBM(x, Ls):
+    """
+        Distribution factor of the vertical wave bending moment.
+        x and Ls may be numpy arrays
+    """
+    x_ratio = np.asarray(x, dtype=float)/Ls
+    return np.interp(x_ratio, np.array([0.0, 0.4, 0.65, 1.0]), np.array([0.0, 1.0, 1.0, 0.0]))
+
+
+def calculate_vertical_wave_bending_moments(x, Ls, B, Cb) -> tuple:
+    """
+        Assuming a RA value of 1.0, the sagging correction factor is -1.10
+        MwH: Vertical wave bending moment in hogging condition, in kN.m
+        MwS: Vertical wave bending moment in sagging condition, in kN.m
+
+        The arguments may be numpy arrays
+    """
+    Lf = np.select([Ls <= 90, Ls <= 300, Ls <= 350, Ls < 500],
+                   [0.0412*Ls + 4.0,
+                    10.75 - (np.abs(300 - Ls)/100)**1.5,
+                    10.75,
+                    10.75 - (np.abs(Ls - 350)/150)**1.5],
+                   default=np.nan)
+
+    Cb1 = np.maximum(Cb, 0.6)
+    fs = 1.0
+    Mo = 0.1*Lf*fs*(Ls**2)*B*(Cb1 + 0.7)
+
+    FfH = (1.9*Cb1)/(Cb1+0.7)
+    FfS = -1.1
+    Df = calculate_distribution_factor_VWBM(x, Ls)
+
+    MwH = FfH*Df*Mo
+    MwS = FfS*Df*Mo
+
+    return MwH, MwS
+
+
+def calculate_horizontal_wave_bending_moments(x, Ls, B, T, Cb):
+    """
+        Horizontal wave bending moment, in kN.m,
+        Mwh = 0.22*Ls**(9/4)*(T + 0.3*B)*Cb*(1 - cos(2*pi*x/Ls)),
+        null at the ends and largest amidships. It acts with both signs.
+        The arguments may be numpy arrays
+    """
+    x = np.asarray(x, dtype=float)
+    return 0.22*Ls**2.25*(T + 0.3*B)*Cb*(1.0 - np.cos(2.0*np.pi*np.clip(x/Ls, 0.0, 1.0)))
+
+
+def calculate_hull_girder_bending_moments(x, L, B, T, disp, M_sw=None) -> tuple:
+    """
+        Hogging and sagging hull girder bending moments, in kN.m,
+        as in HullGirderLoads.calculate_hull_girder_loads.
+        M_sw: optional pair of hogging and sagging still water bending moments at x,
+              in kN.m, for instance StillWaterLoads.calculate_bending_moment_envelope.
+              Defaults to STILL_WATER_BENDING_MOMENT_HOGGING and _SAGGING
+        The arguments may be numpy arrays
+    """
+    Ls, Cb, Cw = calculate_rule_coefficients(L, B, T, disp)
+    M_wv_h, M_wv_s = calculate_vertical_wave_bending_moments(x, Ls, B, Cb)
+
+    if M_sw is None:
+        M_sw = (STILL_WATER_BENDING_MOMENT_HOGGING, STILL_WATER_BENDING_MOMENT_SAGGING)
+    M_hogging = M_sw[0] + M_wv_h
+    M_sagging = M_sw[1] + M_wv_s
+
+    return M_hogging, M_sagging
@@ -0,0 +1,227 @@
+import functools
+import numpy as np
+import pandas as pd
+
+from design_pressures import DesignPressures
+from hull_cross_section import HullCrossSection
+from hull_girder_loads import HullGirderLoads
+from material import Material
+from material import export_a131_material
+from ship import Ship
+from ship import create_vessel
+from still_water_loads import StillWaterLoads
+from still_water_loads import create_loading_conditions
+from structural_element import StructuralElement
+
+# Longitudinal positions, in m, are compared rounded to this number of decimals
+POSITION_DECIMALS = 6
+
+
+class LongitudinalHullModel:
+    def __init__(self, defining_sections: dict, mat: Material, vessel: Ship,
+                 thickness_schedule: dict = None, stiffener_schedule: dict = None,
+                 cache_size: int = 16, loads: DesignPressures = None,
+                 still_water: StillWaterLoads = None) -> None:
+        """
+            Hull girder described along the length by a few defining sections,
+            from which the section at any longitudinal position is generated on demand.
+
+            defining_sections: {x: structure_list}, x in m. Between two consecutive
+                sections made of the same elements (same names, same order), the end
+                points and thicknesses are interpolated linearly. Otherwise the section
+                applies from its position up to the next one. Beyond the first and last
+                positions, the end sections apply
+            thickness_schedule: {element name: (x, thickness)}, arrays in m and mm,
+                interpolated linearly. Overrides the thickness of the defining sections
+            stiffener_schedule: {element name: [(x_start, x_end, stiffener_type,
+                stiffener_name, spacing, offset), ...]}, x in m and the rest as in
+                StructuralElement.insert_stiffeners. Overrides the stiffening of the
+                element between x_start and x_end
+            cache_size: number of generated sections kept, the least recently used
+                ones being discarded first
+            still_water: loading conditions giving the still water bending moments,
+                passed to HullGirderLoads and to the generated sections
+        """
+        # Rounded as the requested positions, so that a station on a defining position matches it
+        self._defining_positions = np.round(np.array(sorted(defining_sections), dtype=float), POSITION_DECIMALS)
+        self._defining_sections = [defining_sections[x] for x in sorted(defining_sections)]
+        self._material = mat
+        self._vessel = vessel
+        self._thickness_schedule = thickness_schedule or dict()
+        self._stiffener_schedule = stiffener_schedule or dict()
+        self._loads = loads
+        self._still_water = still_water
+        self._cached_section = functools.lru_cache(maxsize=cache_size)(self._generate_section)
+
+    @property
+    def vessel(self) -> Ship:
+        return self._vessel
+
+    @property
+    def defining_positions(self) -> np.ndarray:
+        return self._defining_positions
+
+    def cache_info(self):
+        return self._cached_section.cache_info()
+
+    def section_at(self, x: float) -> HullCrossSection:
+        """
+            Section at the longitudinal position x, in m, generated on first request.
+            x is rounded to POSITION_DECIMALS, as the defining positions and the schedule bounds
+        """
+        return self._cached_section(round(float(x), POSITION_DECIMALS))
+
+    def iterate_sections(self, stations: np.ndarray):
+        """
+            Yields (x, section) for every station, generating the sections one by one
+        """
+        for x in np.atleast_1d(np.asarray(stations, dtype=float)):
+            yield x, self.section_at(x)
+
+    def _generate_section(self, x: float) -> HullCrossSection:
+        k = int(np.clip(np.searchsorted(self._defining_positions, x, side='right') - 1,
+                        0, len(self._defining_sections) - 1))
+        section_k = self._defining_sections[k]
+        next_section = self._defining_sections[k + 1] if k + 1 < len(self._defining_sections) else None
+        interpolate = (next_section is not None and x > self._defining_positions[k]
+                       and [struct_i.name for struct_i in section_k] == [struct_i.name for struct_i in next_section])
+        if interpolate:
+            weight = (x - self._defining_positions[k])/(self._defining_positions[k + 1] - self._defining_positions[k])
+        else:
+            weight, next_section = 0.0, section_k
+
+        structure_list = []
+        for struct_i, next_struct_i in zip(section_k, next_section):
+            thickness = None
+            if struct_i.name in self._thickness_schedule:
+                x_schedule, thickness_schedule = self._thickness_schedule[struct_i.name]
+                thickness = float(np.interp(x, x_schedule, thickness_schedule))
+            element = struct_i.interpolated(next_struct_i, weight, thickness)
+            stiffening = self._find_scheduled_stiffening(struct_i.name, x)
+            if stiffening is not None:
+                element.insert_stiffeners(*stiffening)
+            structure_list.append(element)
+        return HullCrossSection(structure_list, x, self._material, self._vessel, self._loads,
+                                self._still_water)
+
+    def _find_scheduled_stiffening(self, name: str, x: float):
+        for x_start, x_end, *stiffening in self._stiffener_schedule.get(name, []):
+            if round(x_start, POSITION_DECIMALS) <= x <= round(x_end, POSITION_DECIMALS):
+                return stiffening
+        return None
+
+    def iterate_stress_recovery(self, stations: np.ndarray, bending_moments: np.ndarray = None,
+                                dtype=np.float32):
+        """
+            Hull girder bending stress at the recovery points of the section of every
+            station (see HullCrossSection.iterate_stress_recovery), in N/mm2.
+            bending_moments: array of shape (num_stations, num_load_cases), in kN.m.
+                Defaults to the hogging and sagging cases of HullGirderLoads,
+                with the still water bending moments of the loading conditions when given
+
+            Yields (x, stress) with stress of shape (num_load_cases, num_points),
+            num_points depending on the section
+        """
+        stations = np.atleast_1d(np.asarray(stations, dtype=float))
+        if bending_moments is None:
+            global_loads = HullGirderLoads(self._vessel, self._still_water)
+            bending_moments = global_loads.calculate_hull_girder_load_cases(stations)
+        bending_moments = np.asarray(bending_moments, dtype=float).reshape(stations.shape[0], -1)
+        for k, (x, section) in enumerate(self.iterate_sections(stations)):
+            yield x, section.compute_stress_recovery([x], bending_moments[k:k + 1], dtype=dtype)[0]
+
+    def compute_longitudinal_strength_envelope(self, stations: np.ndarray,
+                                               bending_moments: np.ndarray = None) -> dict:
+        """
+            Deck and keel hull girder bending stresses along the length, each
+            station with its own section.
+            bending_moments: array of shape (num_stations, num_load_cases), in kN.m.
+                Defaults to the hogging and sagging cases of HullGirderLoads
+            Stresses are in N/mm2, arrays of shape (num_stations, num_load_cases);
+            section moduli in m3 and permissible stresses in N/mm2, of shape (num_stations,)
+        """
+        stations = np.atleast_1d(np.asarray(stations, dtype=float))
+        if bending_moments is None:
+            global_loads = HullGirderLoads(self._vessel, self._still_water)
+            bending_moments = global_loads.calculate_hull_girder_load_cases(stations)
+        bending_moments = np.asarray(bending_moments, dtype=float).reshape(stations.shape[0], -1)
+
+        num_stations = stations.shape[0]
+        deck_section_modulus, keel_section_modulus = np.zeros(num_stations), np.zeros(num_stations)
+        deck_modular_ratio, keel_modular_ratio = np.zeros(num_stations), np.zeros(num_stations)
+        deck_permissible_stress, keel_permissible_stress = np.zeros(num_stations), np.zeros(num_stations)
+        for k, (_, section) in enumerate(self.iterate_sections(stations)):
+            thickness = np.array([struct_i.current_thickness for struct_i in section.structure_list])
+            section_properties = section.compute_cross_section_properties_array(thickness)
+            deck_element, keel_element = section._find_deck_and_keel_elements()
+            modular_ratio = section.compute_modular_ratios()
+            permissible_stresses = section.compute_permissible_stresses()
+            deck_section_modulus[k] = section_properties['deck_section_modulus']
+            keel_section_modulus[k] = section_properties['keel_section_modulus']
+            deck_modular_ratio[k], keel_modular_ratio[k] = modular_ratio[deck_element], modular_ratio[keel_element]
+            deck_permissible_stress[k] = permissible_stresses[deck_element]
+            keel_permissible_stress[k] = permissible_stresses[keel_element]
+
+        deck_stress = deck_modular_ratio[:, np.newaxis]*bending_moments/(1000*deck_section_modulus[:, np.newaxis])
+        keel_stress = keel_modular_ratio[:, np.newaxis]*bending_moments/(1000*keel_section_modulus[:, np.newaxis])
+        utilisation = np.maximum(np.max(np.abs(deck_stress), axis=1)/deck_permissible_stress,
+                                 np.max(np.abs(keel_stress), axis=1)/keel_permissible_stress)
+
+        envelope_info_dict = dict({'Deck section modulus [m3]': deck_section_modulus,
+                                   'Keel section modulus [m3]': keel_section_modulus,
+                                   'Deck stress [MPa]': np.max(np.abs(deck_stress), axis=1),
+                                   'Keel stress [MPa]': np.max(np.abs(keel_stress), axis=1),
+                                   'Deck permissible stress [MPa]': deck_permissible_stress,
+                                   'Keel permissible stress [MPa]': keel_permissible_stress,
+                                   'Criteria': np.where(utilisation <= 1.0, 'Complied', 'Failed')})
+        self._envelope_info_pd = pd.DataFrame(data=envelope_info_dict, index=pd.Index(stations, name='x [m]'))
+
+        envelope = dict(stations=stations, deck_section_modulus=deck_section_modulus,
+                        keel_section_modulus=keel_section_modulus,
+                        deck_stress=deck_stress, keel_stress=keel_stress,
+                        deck_permissible_stress=deck_permissible_stress,
+                        keel_permissible_stress=keel_permissible_stress,
+                        utilisation=utilisation)
+        return envelope
+
+    def print_envelope_info(self) -> None:
+        print(self._envelope_info_pd)
+
+
+def test():
+    mat_a131 = export_a131_material()
+    vessel = create_vessel()
+
+    struct_0 = StructuralElement('Keel plating', 'Keel', mat_a131, [0.0, 0.0], [500.0, 0.0], 13.)
+    struct_1 = StructuralElement('Bottom shell plating', 'Bottom', mat_a131, [500.0, 0.0], [3000.0, 1500.0], 8.)
+    struct_1.insert_stiffeners('FlatBar', '160x7', 500, offset=400.)
+    struct_2 = StructuralElement('Side shell plating', 'Side', mat_a131, [3000.0, 1500.0], [9000.0, 8000.0], 6.)
+    struct_2.insert_stiffeners('FlatBar', '140x6', 500, offset=400.)
+    struct_3 = StructuralElement('Upper deck', 'Strength deck', mat_a131, [0.0, 8000.0], [9000.0, 8000.0], 7.)
+    struct_3.insert_stiffeners('FlatBar', '120x5', 500)
+    midship_section = [struct_0, struct_1, struct_2, struct_3]
+    end_section = [struct_i.scaled(0.6, 1.0) for struct_i in midship_section]
+
+    defining_sections = {0.0: end_section, 0.4*vessel.L: midship_section,
+                         0.65*vessel.L: midship_section, vessel.L: end_section}
+    thickness_schedule = {'Upper deck': ([0.0, 0.3*vessel.L, 0.7*vessel.L, vessel.L], [6.0, 8.0, 8.0, 6.0])}
+    stiffener_schedule = {'Side shell plating': [(0.4*vessel.L, 0.65*vessel.L, 'FlatBar', '160x7', 500., 400.)]}
+    hull_model = LongitudinalHullModel(defining_sections, mat_a131, vessel, thickness_schedule,
+                                       stiffener_schedule, cache_size=8)
+
+    stations = np.linspace(0.1*vessel.L, 0.9*vessel.L, 9)
+    hull_model.compute_longitudinal_strength_envelope(stations)
+    hull_model.print_envelope_info()
+    for x, stress in hull_model.iterate_stress_recovery(stations[::4]):
+        print('x = {:.1f} m: max {:.1f} MPa, min {:.1f} MPa'.format(x, stress.max(), stress.min()))
+    print(hull_model.cache_info())
+
+    still_water_model = LongitudinalHullModel(defining_sections, mat_a131, vessel, thickness_schedule,
+                                              stiffener_schedule, cache_size=8,
+                                              still_water=create_loading_conditions(vessel))
+    still_water_model.compute_longitudinal_strength_envelope(stations)
+    still_water_model.print_envelope_info()
+
+
+if __name__ == '__main__':
+    test()
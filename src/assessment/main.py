@@ -1,8 +1,12 @@
 import numpy as np
 
 from hull_cross_section import HullCrossSection
+from hull_girder_loads import BIAXIAL_LOAD_CASES
+from hull_model import LongitudinalHullModel
 from material import export_a131_material
+from ultimate_strength import UltimateStrength
 from ship import create_vessel
+from still_water_loads import create_loading_conditions
 from structural_element import StructuralElement
 
 def test() -> None:
@@ -97,6 +101,14 @@ def test() -> None:
 
     do_visualize = 0
     do_scantling = 1
+    do_through_life = 0
+    do_stress_recovery = 0
+    do_biaxial_stress = 0
+    do_buckling = 0
+    do_ultimate_strength = 0
+    do_shear_strength = 0
+    do_hull_model = 0
+    do_still_water = 0
 
     if do_visualize:
         hull_cs.visualize_cross_section()
@@ -108,6 +120,53 @@ def test() -> None:
         # hull_cs.compute_cross_section_properties_2()
         hull_cs.print_cross_section_properties()
         hull_cs.compute_longitudinal_strength()
+
+    if do_through_life:
+        corrosion_rates = {'Keel': 0.1, 'Bottom': 0.1, 'Side': 0.08,
+                           'Strength deck': 0.05, 'Inner bottom': 0.1}
+        ages = [0, 5, 10, 15, 20, 25]
+        hull_cs.compute_through_life_assessment(corrosion_rates, ages)
+        hull_cs.print_through_life_info()
+
+    if do_stress_recovery:
+        stations = np.linspace(0.0, vessel.L, 101)
+        for first_station, stress in hull_cs.iterate_stress_recovery(stations, chunk_size=50):
+            print('Stations {:d}-{:d}: max {:.1f} MPa, min {:.1f} MPa'.format(first_station,
+                                                                        first_station + stress.shape[0] - 1,
+                                                                        stress.max(), stress.min()))
+
+    if do_biaxial_stress:
+        stations = np.linspace(0.0, vessel.L, 101)
+        stress = hull_cs.compute_biaxial_stress_recovery(stations)
+        for k, load_case in enumerate(BIAXIAL_LOAD_CASES):
+            print('{:s}: max {:.1f} MPa, min {:.1f} MPa'.format(load_case, stress[:, k].max(), stress[:, k].min()))
+
+    if do_buckling:
+        hull_cs.compute_buckling_assessment()
+
+    if do_ultimate_strength:
+        ultimate_strength = UltimateStrength(hull_cs)
+        ultimate_strength.run()
+        ultimate_strength.print_ultimate_strength_info()
+
+    if do_shear_strength:
+        hull_cs.compute_shear_strength()
+        hull_cs.print_shear_strength_info()
+
+    if do_hull_model:
+        end_section = [struct_i.scaled(0.7, 1.0) for struct_i in structure_list]
+        defining_sections = {0.2*vessel.L: end_section, long_pos: structure_list, 0.8*vessel.L: end_section}
+        hull_model = LongitudinalHullModel(defining_sections, mat_a131, vessel)
+        hull_model.compute_longitudinal_strength_envelope(np.linspace(0.1*vessel.L, 0.9*vessel.L, 17))
+        hull_model.print_envelope_info()
+
+    if do_still_water:
+        still_water = create_loading_conditions(vessel)
+        still_water.compute_still_water_loads()
+        still_water.print_conditions_info()
+        still_water_cs = HullCrossSection(structure_list, long_pos, mat_a131, vessel, still_water=still_water)
+        still_water_cs.compute_cross_section_properties_1()
+        still_water_cs.compute_longitudinal_strength()
         
 
 if __name__ == '__main__':
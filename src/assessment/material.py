@@ -3,15 +3,66 @@ import os
 sys.path.append(os.path.dirname(os.path.dirname(__file__)))
 
 import math
+import types
+from copy import deepcopy
 import numpy as np
 
+HTS_YIELD_STRESSES = np.array([235., 265., 315., 355., 390.])
+HTS_FACTORS_GLOBAL = np.array([1.0, 0.964, 0.956, 0.919, 0.886])
+HTS_FACTORS_LOCAL = np.array([1.0, 1.0, 1.0, 1.0, 0.91])
+
+
 class Material:
+    def __new__(cls, name: str, young: float, yield_stress: float, ultimate_stress: float) -> 'Material':
+        """
+            Materials are interned: the record of equal properties is returned
+            when it is already registered
+        """
+        registered = MATERIAL_REGISTRY._find(name, young, yield_stress, ultimate_stress)
+        if registered is not None:
+            return registered
+        return super().__new__(cls)
+
     def __init__(self, name: str, young: float, yield_stress: float, ultimate_stress: float) -> None:
+        """
+            Immutable material record. Every material is registered once in
+            MATERIAL_REGISTRY, which gives it an integer id; constructing a
+            material of equal properties returns the registered record.
+            Derived constants (shear strength, f_hts, kms) are computed once here
+        """
+        if getattr(self, '_frozen', False):
+            return
         self._name = name
         self._young_modulus = young
         self._minimum_yield_stress = yield_stress
         self._ultimate_tensile_stress = ultimate_stress
         self._shear_strength = yield_stress/math.sqrt(3.0)
+        self._hts_factors = types.MappingProxyType(
+            dict(Global=float(calculate_hts_correction_factors(yield_stress, "Global")),
+                 Local=float(calculate_hts_correction_factors(yield_stress, "Local"))))
+        self._kms = float(calculate_kms(yield_stress, ultimate_stress))
+        self._material_id = MATERIAL_REGISTRY._add(self)
+        self._frozen = True
+
+    def __setattr__(self, attribute: str, value) -> None:
+        if getattr(self, '_frozen', False):
+            error_msg = "Material {} is immutable".format(self._name)
+            raise Exception(error_msg)
+        super().__setattr__(attribute, value)
+
+    def __reduce__(self) -> tuple:
+        # copies and unpickled materials are the registered record
+        return (Material, (self._name, self._young_modulus,
+                           self._minimum_yield_stress, self._ultimate_tensile_stress))
+
+    def __repr__(self) -> str:
+        return "Material(id={}, name={}, young={}, yield_stress={}, ultimate_stress={})".format(
+            self._material_id, self._name, self._young_modulus,
+            self._minimum_yield_stress, self._ultimate_tensile_stress)
+
+    @property
+    def material_id(self) -> int:
+        return self._material_id
     
     @property
     def name(self) -> str:
@@ -32,18 +83,116 @@ class Material:
     @property
     def shear_strength(self) -> float:
         return self._shear_strength
+
+    @property
+    def kms(self) -> float:
+        return self._kms
     
     def _hts_correction_factor(self, load_type: str) -> float:
-        so_vector = np.array([235., 265., 315., 355., 390])
-        f_hts_vector_global = np.array([1.0, 0.964, 0.956, 0.919, 0.886*(390/self.minimum_yield_stress)])
-        f_hts_vector_local = np.array([1.0, 1.0, 1.0, 1.0, 0.91*(390/self.minimum_yield_stress)])
-
+        """
+            Precomputed at construction, see calculate_hts_correction_factors
+        """
         if load_type == "Global":
-            f_hts = np.interp(self.minimum_yield_stress, so_vector, f_hts_vector_global)
+            return self._hts_factors["Global"]
         else:
-            f_hts = np.interp(self.minimum_yield_stress, so_vector, f_hts_vector_local)
-        
-        return f_hts
+            return self._hts_factors["Local"]
+
+
+class MaterialRegistry:
+    """
+        Materials by integer id, with their constants gathered in numpy arrays
+        indexed by id, so element arrays can store a material id and gather
+        any property by fancy indexing
+    """
+    def __init__(self) -> None:
+        self._materials = []
+        self._interned = dict()
+        self._constants = None
+
+    @staticmethod
+    def _key(name: str, young: float, yield_stress: float, ultimate_stress: float) -> tuple:
+        return (name, float(young), float(yield_stress), float(ultimate_stress))
+
+    def _find(self, name: str, young: float, yield_stress: float, ultimate_stress: float) -> Material:
+        return self._interned.get(self._key(name, young, yield_stress, ultimate_stress))
+
+    def _add(self, mat: Material) -> int:
+        self._interned[self._key(mat.name, mat.young_modulus, mat.minimum_yield_stress,
+                                 mat.ultimate_tensile_stress)] = mat
+        self._materials.append(mat)
+        self._constants = None
+        return len(self._materials) - 1
+
+    def intern(self, name: str, young: float, yield_stress: float, ultimate_stress: float) -> Material:
+        """
+            The registered material with these properties, created on the first request
+        """
+        return Material(name, young, yield_stress, ultimate_stress)
+
+    def intern_definition_material(self, material, ultimate_stress: float) -> Material:
+        """
+            Registered record of a definition.materials.Material, whose properties
+            dict holds yield_strength and young_modulus in Pa.
+            ultimate_stress is in N/mm2
+        """
+        properties = material.properties
+        return self.intern(material.name, properties['young_modulus'],
+                           properties['yield_strength']/1e6, ultimate_stress)
+
+    def __getitem__(self, material_id: int) -> Material:
+        return self._materials[material_id]
+
+    def __len__(self) -> int:
+        return len(self._materials)
+
+    @property
+    def constants(self) -> dict:
+        """
+            Arrays indexed by material id: young_modulus and stresses in N/mm2,
+            hts_factor_global, hts_factor_local and kms
+        """
+        if self._constants is None:
+            materials = self._materials
+            self._constants = dict(young_modulus=np.array([mat.young_modulus/1e6 for mat in materials]),
+                                   yield_stress=np.array([mat.minimum_yield_stress for mat in materials]),
+                                   ultimate_stress=np.array([mat.ultimate_tensile_stress for mat in materials]),
+                                   shear_strength=np.array([mat.shear_strength for mat in materials]),
+                                   hts_factor_global=np.array([mat._hts_correction_factor("Global") for mat in materials]),
+                                   hts_factor_local=np.array([mat._hts_correction_factor("Local") for mat in materials]),
+                                   kms=np.array([mat.kms for mat in materials]))
+        return self._constants
+
+
+MATERIAL_REGISTRY = MaterialRegistry()
+
+
+def calculate_kms(yield_stress, ultimate_stress):
+    """
+        NSR material factor kms = 635/(sigma_o + sigma_u), stresses in N/mm2.
+        The arguments may be numpy arrays
+    """
+    return 635/(np.asarray(yield_stress, dtype=float) + ultimate_stress)
+
+
+def calculate_hts_correction_factors(yield_stress, load_type: str):
+    """
+        Higher tensile steel correction factor f_hts for global ("Global") or
+        local loads, interpolated in the yield stress (N/mm2).
+        The tabulated value at 390 N/mm2 is scaled by 390/yield_stress, as the
+        upper point of the interpolation. yield_stress may be a numpy array
+    """
+    yield_stress = np.asarray(yield_stress, dtype=float)
+    if load_type == "Global":
+        f_hts_vector = HTS_FACTORS_GLOBAL
+    else:
+        f_hts_vector = HTS_FACTORS_LOCAL
+
+    f_hts_lower = np.interp(yield_stress, HTS_YIELD_STRESSES[:-1], f_hts_vector[:-1])
+    f_hts_upper_point = f_hts_vector[-1]*(HTS_YIELD_STRESSES[-1]/yield_stress)
+    weight = np.clip((yield_stress - HTS_YIELD_STRESSES[-2])/(HTS_YIELD_STRESSES[-1] - HTS_YIELD_STRESSES[-2]), 0.0, 1.0)
+    f_hts_upper = (1.0 - weight)*f_hts_vector[-2] + weight*f_hts_upper_point
+    return np.where(yield_stress > HTS_YIELD_STRESSES[-2], f_hts_upper, f_hts_lower)
+
 
 def export_a131_material() -> Material:
     mat_name = 'a131'
@@ -51,10 +200,23 @@ def export_a131_material() -> Material:
     mat_ultimate = 400.
     young = 201e9
 
-    mat_a131 = Material(mat_name, young, mat_yield, mat_ultimate)
+    mat_a131 = MATERIAL_REGISTRY.intern(mat_name, young, mat_yield, mat_ultimate)
 
     return mat_a131
 
+def export_al5083_material() -> Material:
+    """
+        Aluminium alloy 5083-H116, for superstructures and mixed sections
+    """
+    mat_name = 'al5083'
+    mat_yield = 215.
+    mat_ultimate = 305.
+    young = 70e9
+
+    mat_al5083 = MATERIAL_REGISTRY.intern(mat_name, young, mat_yield, mat_ultimate)
+
+    return mat_al5083
+
 def test():
     mat_name = 'a131'
     mat_yield = 235.
@@ -62,3 +224,18 @@ def test():
     young = 210e9
 
     mat_a131 = Material(mat_name, young, mat_yield, mat_ultimate)
+    print('Global f_hts: {:.3f}'.format(mat_a131._hts_correction_factor("Global")))
+
+    yield_stresses = np.array([235., 315., 355., 370., 390., 460.])
+    print(calculate_hts_correction_factors(yield_stresses, "Global"))
+    print(calculate_hts_correction_factors(yield_stresses, "Local"))
+
+    assert export_a131_material() is export_a131_material()
+    assert Material('a131', 201e9, 235, 400) is export_a131_material()
+    assert deepcopy(mat_a131) is mat_a131
+    mat_al5083 = export_al5083_material()
+    print(repr(mat_al5083))
+    print(MATERIAL_REGISTRY.constants['kms'][[export_a131_material().material_id, mat_al5083.material_id]])
+
+if __name__ == '__main__':
+    test()
@@ -0,0 +1,233 @@
+import itertools
+import numpy as np
+import pandas as pd
+
+from design_pressures import DesignPressures
+from hull_cross_section import HullCrossSection
+from hull_cross_section import calculate_cross_section_properties
+from hull_girder_loads import calculate_hull_girder_bending_moments
+from material import export_a131_material
+from ship import ShipContext
+from ship import create_vessel
+from ship import calculate_froude_number
+from ship import calculate_rule_coefficients
+from ship import calculate_wave_height_factor
+from ship import calculate_wave_parameters
+from structural_design import StructuralDesign
+from structural_design import calculate_NSR_omega
+from structural_design import compute_NSR_minimal_scantlings
+from structural_element import StructuralElement
+from structural_element import compile_stiffener_arrays
+
+
+class ParametricSweep:
+    def __init__(self, reference_cs: HullCrossSection) -> None:
+        """
+        Early stage design sweep over the ship principal dimensions
+
+        The reference cross section topology is scaled to each combination:
+        transverse coordinates with B, vertical coordinates with T, and the
+        longitudinal position with L. Thicknesses and stiffening are kept.
+        Vessel type, frame length and transverse span are taken from the reference vessel.
+        """
+        self._reference_cs = reference_cs
+        self._reference_vessel = reference_cs.vessel
+        self._material = reference_cs.material
+        self._x_ratio = reference_cs.longitudinal_position/self._reference_vessel.L
+
+    @staticmethod
+    def create_grid(L: list, B: list, T: list, disp: list, V: list, service_area: list) -> pd.DataFrame:
+        """
+            Full factorial grid of principal dimensions, one row per combination
+        """
+        combinations = list(itertools.product(L, B, T, disp, V, service_area))
+        grid = pd.DataFrame(data=combinations, columns=['L', 'B', 'T', 'disp', 'V', 'service_area'])
+        return grid
+
+    def _compute_ship_coefficients(self, grid: pd.DataFrame) -> dict:
+        """
+            Ship-only coefficients for all the combinations at once
+        """
+        L = grid['L'].to_numpy(dtype=float)
+        B = grid['B'].to_numpy(dtype=float)
+        T = grid['T'].to_numpy(dtype=float)
+        disp = grid['disp'].to_numpy(dtype=float)
+        V = grid['V'].to_numpy(dtype=float)
+        service_area = grid['service_area'].to_numpy()
+
+        fHs = np.zeros_like(L)
+        for service_area_i in np.unique(service_area):
+            fHs[service_area == service_area_i] = calculate_wave_height_factor(service_area_i)
+
+        Ls, Cb, Cw = calculate_rule_coefficients(L, B, T, disp)
+        C_w_min, _, xm = calculate_wave_parameters(L, Cb, V, fHs, "shell")
+
+        omega = calculate_NSR_omega(self._reference_vessel.vessel_type)
+        minimum_scantling = compute_NSR_minimal_scantlings(L, B, T, omega,
+                                                           self._material.minimum_yield_stress,
+                                                           self._material.ultimate_tensile_stress)
+
+        ship_coefficients = dict(Cb=Cb, Fn=calculate_froude_number(L, V), fHs=fHs,
+                                 Ls=Ls, Cw=Cw, C_w_min=C_w_min, xm=xm,
+                                 minimum_scantling=minimum_scantling)
+        return ship_coefficients
+
+    def _compute_hull_girder_strength(self, grid: pd.DataFrame) -> dict:
+        """
+            Hull girder bending stresses of the scaled sections for all the combinations at once
+        """
+        structure_list = self._reference_cs.structure_list
+        y_factor = (grid['B'].to_numpy(dtype=float)/self._reference_vessel.B)[:, np.newaxis]
+        z_factor = (grid['T'].to_numpy(dtype=float)/self._reference_vessel.T)[:, np.newaxis]
+
+        start_points = np.array([struct_i.start_point for struct_i in structure_list])/1000.
+        end_points = np.array([struct_i.end_point for struct_i in structure_list])/1000.
+        thickness = np.array([struct_i.current_thickness for struct_i in structure_list])
+
+        dy = (end_points[:, 0] - start_points[:, 0])*y_factor
+        dz = (end_points[:, 1] - start_points[:, 1])*z_factor
+        length_m = np.sqrt(dy**2 + dz**2)
+        zi = start_points[:, 1]*z_factor
+        zk = end_points[:, 1]*z_factor
+
+        # Stiffeners keep their profile and number, and follow the scaling of the section
+        stiffeners = compile_stiffener_arrays(structure_list)
+        stiffeners['y'] = stiffeners['y']*y_factor
+        stiffeners['z'] = stiffeners['z']*z_factor
+
+        section_properties = calculate_cross_section_properties(length_m, zi, zk, thickness, stiffeners=stiffeners)
+
+        L = grid['L'].to_numpy(dtype=float)
+        x = self._x_ratio*L
+        M_hogging, M_sagging = calculate_hull_girder_bending_moments(x, L,
+                                                                     grid['B'].to_numpy(dtype=float),
+                                                                     grid['T'].to_numpy(dtype=float),
+                                                                     grid['disp'].to_numpy(dtype=float))
+        hull_girder_bending_moment = np.maximum(np.abs(M_hogging), np.abs(M_sagging))
+
+        deck_bending_stress = hull_girder_bending_moment/(1000*section_properties['deck_section_modulus'])
+        keel_bending_stress = hull_girder_bending_moment/(1000*section_properties['keel_section_modulus'])
+
+        sigma_o = self._material.minimum_yield_stress
+        f_hts = self._material._hts_correction_factor("Global")
+        f_hg = self._reference_cs._calculate_hull_girder_stress_factor(self._reference_cs.longitudinal_position)
+        hull_girder_permisible_stress = f_hg*f_hts*sigma_o
+
+        hull_girder_strength = dict(section_modulus=section_properties['section_modulus'],
+                                    neutral_axis=section_properties['neutral_axis'],
+                                    bending_moment=hull_girder_bending_moment,
+                                    deck_bending_stress=deck_bending_stress,
+                                    keel_bending_stress=keel_bending_stress,
+                                    permissible_stress=np.full_like(L, hull_girder_permisible_stress))
+        return hull_girder_strength
+
+    def _compute_local_scantlings(self, grid: pd.DataFrame, minimum_scantling: dict) -> dict:
+        """
+            Design pressures and local scantlings of each scaled section
+        """
+        num_combinations = len(grid)
+        max_thickness_ratio = np.zeros(num_combinations)
+        max_section_modulus_ratio = np.zeros(num_combinations)
+        failed_platings = np.zeros(num_combinations, dtype=int)
+        failed_stiffeners = np.zeros(num_combinations, dtype=int)
+
+        reference_vessel = self._reference_vessel
+        loads = DesignPressures()
+        for k, combination in enumerate(grid.itertuples(index=False)):
+            context_k = ShipContext(combination.L, combination.B, combination.T, combination.disp,
+                                    combination.V, combination.service_area, reference_vessel.vessel_type,
+                                    reference_vessel.frame_length, reference_vessel.transverse_span)
+            y_factor = combination.B/reference_vessel.B
+            z_factor = combination.T/reference_vessel.T
+            x = self._x_ratio*combination.L
+
+            structure_list = [struct_i.scaled(y_factor, z_factor) for struct_i in self._reference_cs.structure_list]
+            for struct_i in structure_list:
+                struct_i.design_pressure = loads.calculate_design_pressure(struct_i, x, context_k)
+
+            minimum_scantling_k = {struct_type: value[k] for struct_type, value in minimum_scantling.items()}
+            local_scantling = StructuralDesign(context_k, self._material, minimum_scantling_k)
+            required_scantlings = local_scantling.calculate_scantling_sensitivities(structure_list)
+
+            current_thickness = np.array([struct_i.current_thickness for struct_i in structure_list])
+            thickness_ratio = required_scantlings['t']['value']/current_thickness
+            max_thickness_ratio[k] = np.max(thickness_ratio)
+            failed_platings[k] = np.count_nonzero(thickness_ratio >= 1.0)
+
+            stiffened = required_scantlings['stiffened']
+            if np.any(stiffened):
+                stiffener_section_modulus = np.array([struct_i.stiffener_section_modulus
+                                                      for struct_i, stiffened_i in zip(structure_list, stiffened)
+                                                      if stiffened_i])
+                section_modulus_ratio = required_scantlings['Z']['value'][stiffened]/stiffener_section_modulus
+                max_section_modulus_ratio[k] = np.max(section_modulus_ratio)
+                failed_stiffeners[k] = np.count_nonzero(section_modulus_ratio >= 1.0)
+
+        local_scantlings = dict(max_thickness_ratio=max_thickness_ratio,
+                                max_section_modulus_ratio=max_section_modulus_ratio,
+                                failed_platings=failed_platings,
+                                failed_stiffeners=failed_stiffeners)
+        return local_scantlings
+
+    def run(self, grid: pd.DataFrame) -> pd.DataFrame:
+        """
+            Returns a columnar table with one row per combination of the grid
+        """
+        ship_coefficients = self._compute_ship_coefficients(grid)
+        hull_girder_strength = self._compute_hull_girder_strength(grid)
+        local_scantlings = self._compute_local_scantlings(grid, ship_coefficients['minimum_scantling'])
+
+        results = dict()
+        for column in grid.columns:
+            results[column] = grid[column].to_numpy()
+        for name in ['Cb', 'Fn', 'Ls', 'Cw', 'C_w_min']:
+            results[name] = ship_coefficients[name]
+        for struct_type, value in ship_coefficients['minimum_scantling'].items():
+            results['Minimum t {} [mm]'.format(struct_type)] = value
+        results['Section modulus [m3]'] = hull_girder_strength['section_modulus']
+        results['Neutral axis [m]'] = hull_girder_strength['neutral_axis']
+        results['Bending moment [kN.m]'] = hull_girder_strength['bending_moment']
+        results['Deck stress [MPa]'] = hull_girder_strength['deck_bending_stress']
+        results['Keel stress [MPa]'] = hull_girder_strength['keel_bending_stress']
+        results['Permissible stress [MPa]'] = hull_girder_strength['permissible_stress']
+        results['Max required/current t'] = local_scantlings['max_thickness_ratio']
+        results['Max required/current Z'] = local_scantlings['max_section_modulus_ratio']
+        results['Failed platings'] = local_scantlings['failed_platings']
+        results['Failed stiffeners'] = local_scantlings['failed_stiffeners']
+
+        self._results_pd = pd.DataFrame(data=results)
+        return self._results_pd
+
+    def print_sweep_info(self) -> None:
+        print(self._results_pd)
+
+
+def test():
+    mat_a131 = export_a131_material()
+    vessel = create_vessel()
+
+    struct_0 = StructuralElement('Keel plating', 'Keel', mat_a131, [0.0, 0.0], [500.0, 0.0], 13.)
+    struct_1 = StructuralElement('Bottom shell plating', 'Bottom', mat_a131, [500.0, 0.0], [3000.0, 1500.0], 8.)
+    struct_1.insert_stiffeners('FlatBar', '160x7', 500, offset=400.)
+    struct_2 = StructuralElement('Side shell plating', 'Side', mat_a131, [3000.0, 1500.0], [10000.0, 8000.0], 6.)
+    struct_2.insert_stiffeners('FlatBar', '140x6', 500, offset=400.)
+    struct_3 = StructuralElement('Upper deck', 'Strength deck', mat_a131, [0.0, 8000.0], [10000.0, 8000.0], 7.)
+    struct_3.insert_stiffeners('FlatBar', '120x5', 500)
+    structure_list = [struct_0, struct_1, struct_2, struct_3]
+
+    long_pos = 60.
+    hull_cs = HullCrossSection(structure_list, long_pos, mat_a131, vessel)
+
+    grid = ParametricSweep.create_grid(L=np.linspace(110., 150., 5),
+                                       B=np.linspace(14., 20., 4),
+                                       T=np.linspace(5., 7., 3),
+                                       disp=[6000., 8000., 10000.],
+                                       V=[24., 30.],
+                                       service_area=['SA1', 'SA2'])
+    sweep = ParametricSweep(hull_cs)
+    sweep.run(grid)
+    sweep.print_sweep_info()
+
+
+if __name__ == '__main__':
+    test()
@@ -0,0 +1,193 @@
+import math
+import numpy as np
+from statistics import NormalDist
+
+from hull_cross_section import HullCrossSection
+from material import export_a131_material
+from ship import create_vessel
+from structural_element import StructuralElement
+
+
+class Distribution:
+    def __init__(self, name: str, **parameters) -> None:
+        """
+        Random variable sampled with a numpy Generator
+
+        Variables
+        ----------
+
+        * name: name of a numpy Generator method ('normal', 'lognormal', 'gumbel',
+            'uniform', 'weibull', ...), or 'constant'
+        * parameters: keyword arguments of that method (loc, scale, mean, sigma, ...).
+            A constant takes a single 'value'
+        """
+        if name != 'constant' and not hasattr(np.random.Generator, name):
+            error_msg = "Unknown distribution: {}".format(name)
+            raise Exception(error_msg)
+        self._name = name
+        self._parameters = parameters
+
+    @property
+    def name(self) -> str:
+        return self._name
+
+    @property
+    def parameters(self) -> dict:
+        return self._parameters
+
+    def sample(self, rng: np.random.Generator, size) -> np.ndarray:
+        if self._name == 'constant':
+            return np.full(size, self._parameters['value'], dtype=float)
+        return getattr(rng, self._name)(size=size, **self._parameters)
+
+
+class HullGirderReliability:
+    def __init__(self, hull_cs: HullCrossSection,
+                 yield_stress: Distribution,
+                 corrosion: Distribution,
+                 still_water_moment: Distribution,
+                 wave_moment: Distribution) -> None:
+        """
+        Monte Carlo estimate of the probability of exceeding the permissible
+        hull girder bending stress at the strength deck and at the keel
+
+        Variables
+        ----------
+
+        * hull_cs: hull cross section to be assessed
+        * yield_stress: yield stress of the section reference material, in N/mm2.
+            The deck and keel yield stresses are their element minimum yield stresses
+            scaled by the same sampled ratio, so mixed grades vary together
+        * corrosion: thickness diminution of each structural element, in mm
+        * still_water_moment: still water bending moment, in kN.m
+        * wave_moment: vertical wave bending moment, in kN.m
+        """
+        self._hull_cs = hull_cs
+        self._yield_stress = yield_stress
+        self._corrosion = corrosion
+        self._still_water_moment = still_water_moment
+        self._wave_moment = wave_moment
+
+        self._gross_thickness = np.array([struct_i.current_thickness for struct_i in hull_cs.structure_list])
+        self._reference_yield_stress = hull_cs.material.minimum_yield_stress
+        deck_element, keel_element = hull_cs._find_deck_and_keel_elements()
+        modular_ratio = hull_cs.compute_modular_ratios()
+        permissible_stresses = hull_cs.compute_permissible_stresses()
+        self._deck_modular_ratio = modular_ratio[deck_element]
+        self._keel_modular_ratio = modular_ratio[keel_element]
+        self._deck_permissible_stress = permissible_stresses[deck_element]
+        self._keel_permissible_stress = permissible_stresses[keel_element]
+
+    def _evaluate_margins(self, rng: np.random.Generator, num_samples: int) -> tuple[np.ndarray, np.ndarray]:
+        """
+            Deck and keel stress margins, in N/mm2, of num_samples realisations.
+            A negative margin means the permissible stress is exceeded
+        """
+        num_structures = self._gross_thickness.shape[0]
+
+        sigma_o = self._yield_stress.sample(rng, num_samples)
+        corrosion = self._corrosion.sample(rng, (num_samples, num_structures))
+        M_sw = self._still_water_moment.sample(rng, num_samples)
+        M_wv = self._wave_moment.sample(rng, num_samples)
+
+        thickness = np.maximum(self._gross_thickness - corrosion, 0.0)
+        section_properties = self._hull_cs.compute_cross_section_properties_array(thickness)
+
+        hull_girder_bending_moment = np.abs(M_sw + M_wv)
+        deck_bending_stress = self._deck_modular_ratio*hull_girder_bending_moment/(1000*section_properties['deck_section_modulus'])
+        keel_bending_stress = self._keel_modular_ratio*hull_girder_bending_moment/(1000*section_properties['keel_section_modulus'])
+
+        # f_hg*f_hts*sigma_o of the deck and keel elements, with the sampled yield stresses
+        yield_ratio = sigma_o/self._reference_yield_stress
+        deck_margin = self._deck_permissible_stress*yield_ratio - deck_bending_stress
+        keel_margin = self._keel_permissible_stress*yield_ratio - keel_bending_stress
+
+        return deck_margin, keel_margin
+
+    def run(self, num_samples: int = 1000000, chunk_size: int = 100000, seed: int = None) -> dict:
+        """
+            Samples are evaluated in chunks of chunk_size, so memory use is
+            proportional to chunk_size*num_structures and not to num_samples.
+            Each chunk draws from its own stream spawned from seed, so the
+            results are reproducible for a given (seed, chunk_size) pair.
+        """
+        num_chunks = math.ceil(num_samples/chunk_size)
+        chunk_seeds = np.random.SeedSequence(seed).spawn(num_chunks)
+
+        deck_failures = 0
+        keel_failures = 0
+        section_failures = 0
+        deck_margin_sum = 0.0
+        keel_margin_sum = 0.0
+
+        for k, chunk_seed in enumerate(chunk_seeds):
+            num_samples_k = min(chunk_size, num_samples - k*chunk_size)
+            rng = np.random.default_rng(chunk_seed)
+
+            deck_margin, keel_margin = self._evaluate_margins(rng, num_samples_k)
+
+            deck_failed = deck_margin < 0.0
+            keel_failed = keel_margin < 0.0
+            deck_failures += np.count_nonzero(deck_failed)
+            keel_failures += np.count_nonzero(keel_failed)
+            section_failures += np.count_nonzero(deck_failed | keel_failed)
+            deck_margin_sum += np.sum(deck_margin)
+            keel_margin_sum += np.sum(keel_margin)
+
+        failure_probability = section_failures/num_samples
+
+        self._results = dict(num_samples=num_samples,
+                             failure_probability=failure_probability,
+                             reliability_index=self._calculate_reliability_index(failure_probability),
+                             deck_failure_probability=deck_failures/num_samples,
+                             keel_failure_probability=keel_failures/num_samples,
+                             mean_deck_margin=deck_margin_sum/num_samples,
+                             mean_keel_margin=keel_margin_sum/num_samples)
+        return self._results
+
+    @staticmethod
+    def _calculate_reliability_index(failure_probability: float) -> float:
+        if failure_probability <= 0.0:
+            return math.inf
+        elif failure_probability >= 1.0:
+            return -math.inf
+        return -NormalDist().inv_cdf(failure_probability)
+
+    def print_reliability_info(self) -> None:
+        print("=================================")
+        print('Number of samples: {:d}'.format(self._results['num_samples']))
+        print('Probability of failure: {:.3e}'.format(self._results['failure_probability']))
+        print('Reliability index: {:.3f}'.format(self._results['reliability_index']))
+        print('Deck probability of failure: {:.3e}'.format(self._results['deck_failure_probability']))
+        print('Keel probability of failure: {:.3e}'.format(self._results['keel_failure_probability']))
+        print('Mean deck stress margin: {:.3f} MPa'.format(self._results['mean_deck_margin']))
+        print('Mean keel stress margin: {:.3f} MPa'.format(self._results['mean_keel_margin']))
+        print("=================================")
+
+
+def test():
+    mat_a131 = export_a131_material()
+    vessel = create_vessel()
+
+    struct_0 = StructuralElement('Keel plating', 'Keel', mat_a131, [0.0, 0.0], [500.0, 0.0], 13.)
+    struct_1 = StructuralElement('Bottom shell plating', 'Bottom', mat_a131, [500.0, 0.0], [3000.0, 1500.0], 8.)
+    struct_2 = StructuralElement('Side shell plating', 'Side', mat_a131, [3000.0, 1500.0], [10000.0, 8000.0], 6.)
+    struct_3 = StructuralElement('Upper deck', 'Strength deck', mat_a131, [0.0, 8000.0], [10000.0, 8000.0], 7.)
+    structure_list = [struct_0, struct_1, struct_2, struct_3]
+
+    long_pos = 60.
+    hull_cs = HullCrossSection(structure_list, long_pos, mat_a131, vessel)
+
+    yield_stress = Distribution('lognormal', mean=math.log(260.), sigma=0.07)
+    corrosion = Distribution('uniform', low=0.0, high=1.5)
+    still_water_moment = Distribution('normal', loc=25000., scale=5000.)
+    wave_moment = Distribution('gumbel', loc=40000., scale=8000.)
+
+    reliability = HullGirderReliability(hull_cs, yield_stress, corrosion,
+                                        still_water_moment, wave_moment)
+    reliability.run(num_samples=1000000, chunk_size=100000, seed=2024)
+    reliability.print_reliability_info()
+
+
+if __name__ == '__main__':
+    test()
@@ -0,0 +1,271 @@
+import numpy as np
+from collections import deque
+
+from material import export_a131_material
+from structural_element import StructuralElement
+
+
+class ShearFlowSolver:
+    def __init__(self, structure_list: list, tolerance: float = 1.0) -> None:
+        """
+        Thin-walled shear flow of a hull cross section under vertical shear
+
+        Variables
+        ----------
+
+        * structure_list: elements of the half section (y >= 0), in mm.
+            The section is mirrored about the centreline; elements lying on it
+            are kept once with twice their thickness, as in the section properties
+        * tolerance: distance, in mm, below which two points are the same node
+
+        Elements are split where another element ends on them (T-junctions).
+        The unknowns are the shear flows at the start of each edge. Node equilibrium
+        is solved along a spanning tree, and each independent closed cell (one per
+        edge outside the tree) adds a circulating flow fixed by the no-twist condition.
+        The topology is built once; a new set of thicknesses only rebuilds the cell matrix
+        """
+        self._structure_list = structure_list
+        self._tolerance = tolerance
+        self._build_edges()
+        self._build_spanning_tree()
+        self._build_cycle_basis()
+
+    @property
+    def num_nodes(self) -> int:
+        return self._nodes.shape[0]
+
+    @property
+    def num_edges(self) -> int:
+        return self._edge_start.shape[0]
+
+    @property
+    def num_cells(self) -> int:
+        return self._cycle_basis.shape[1]
+
+    def _build_edges(self) -> None:
+        tolerance = self._tolerance
+        start_points, end_points, element, thickness_factor = [], [], [], []
+        for k, struct_i in enumerate(self._structure_list):
+            start_pt = np.array(struct_i.start_point, dtype=float)
+            end_pt = np.array(struct_i.end_point, dtype=float)
+            on_centreline = abs(start_pt[0]) < tolerance and abs(end_pt[0]) < tolerance
+            start_points.append(start_pt)
+            end_points.append(end_pt)
+            element.append(k)
+            thickness_factor.append(2.0 if on_centreline else 1.0)
+            if not on_centreline:
+                mirror = np.array([-1.0, 1.0])
+                start_points.append(start_pt*mirror)
+                end_points.append(end_pt*mirror)
+                element.append(k)
+                thickness_factor.append(1.0)
+
+        start_points = np.array(start_points)
+        end_points = np.array(end_points)
+        all_points = np.vstack([start_points, end_points])
+
+        # Split the segments at the end points lying inside them
+        edge_start, edge_end, edge_element, edge_factor = [], [], [], []
+        for p0, p1, element_k, factor_k in zip(start_points, end_points, element, thickness_factor):
+            direction = p1 - p0
+            length = np.hypot(direction[0], direction[1])
+            relative = all_points - p0
+            along = (relative @ direction)/length
+            across = np.abs(relative[:, 0]*direction[1] - relative[:, 1]*direction[0])/length
+            inside = (across < tolerance) & (along > tolerance) & (along < length - tolerance)
+            cuts = np.unique(np.concatenate([[0.0], along[inside], [length]]))
+            cut_points = p0 + np.outer(cuts/length, direction)
+            edge_start.extend(cut_points[:-1])
+            edge_end.extend(cut_points[1:])
+            edge_element.extend([element_k]*(cuts.shape[0] - 1))
+            edge_factor.extend([factor_k]*(cuts.shape[0] - 1))
+
+        edge_start = np.array(edge_start)
+        edge_end = np.array(edge_end)
+        keys = np.round(np.vstack([edge_start, edge_end])/tolerance).astype(np.int64)
+        node_keys, node_index = np.unique(keys, axis=0, return_inverse=True)
+        node_index = node_index.ravel()
+        num_edges = edge_start.shape[0]
+
+        self._nodes = node_keys*tolerance
+        self._edge_start = node_index[:num_edges]
+        self._edge_end = node_index[num_edges:]
+        self._edge_start_point = edge_start/1000.
+        self._edge_end_point = edge_end/1000.
+        self._edge_length = np.hypot(*(edge_end - edge_start).T)/1000.
+        self._edge_element = np.array(edge_element)
+        self._edge_thickness_factor = np.array(edge_factor)
+
+    def _build_spanning_tree(self) -> None:
+        """
+            Breadth first spanning forest. Nodes are stored in visiting order with
+            the tree edge joining them to their parent (-1 for the roots)
+        """
+        num_nodes = self.num_nodes
+        incident_edges = [[] for _ in range(num_nodes)]
+        for e, (n0, n1) in enumerate(zip(self._edge_start, self._edge_end)):
+            incident_edges[n0].append(e)
+            incident_edges[n1].append(e)
+
+        parent_edge = np.full(num_nodes, -1)
+        parent_node = np.full(num_nodes, -1)
+        depth = np.zeros(num_nodes, dtype=int)
+        visited = np.zeros(num_nodes, dtype=bool)
+        in_tree = np.zeros(self.num_edges, dtype=bool)
+        order = []
+        for root in range(num_nodes):
+            if visited[root]:
+                continue
+            visited[root] = True
+            queue = deque([root])
+            while queue:
+                node = queue.popleft()
+                order.append(node)
+                for e in incident_edges[node]:
+                    other = self._edge_end[e] if self._edge_start[e] == node else self._edge_start[e]
+                    if not visited[other]:
+                        visited[other] = True
+                        parent_edge[other] = e
+                        parent_node[other] = node
+                        depth[other] = depth[node] + 1
+                        in_tree[e] = True
+                        queue.append(other)
+
+        self._tree_order = np.array(order)
+        self._parent_edge = parent_edge
+        self._parent_node = parent_node
+        self._depth = depth
+        self._in_tree = in_tree
+
+    def _build_cycle_basis(self) -> None:
+        """
+            One closed cell per edge outside the spanning tree. Column l of the
+            cycle basis holds +1/-1 for the edges of cell l run along/against their direction
+        """
+        closing_edges = np.flatnonzero(~self._in_tree)
+        cycle_basis = np.zeros((self.num_edges, closing_edges.shape[0]))
+        for l, e in enumerate(closing_edges):
+            # The cell runs along e from its start u to its end v, then back to u through the tree
+            cycle_basis[e, l] = 1.0
+            u, v = self._edge_start[e], self._edge_end[e]
+            while u != v:
+                if self._depth[v] >= self._depth[u]:
+                    tree_edge = self._parent_edge[v]
+                    cycle_basis[tree_edge, l] += 1.0 if self._edge_start[tree_edge] == v else -1.0
+                    v = self._parent_node[v]
+                else:
+                    tree_edge = self._parent_edge[u]
+                    cycle_basis[tree_edge, l] += 1.0 if self._edge_end[tree_edge] == u else -1.0
+                    u = self._parent_node[u]
+        self._cycle_basis = cycle_basis
+
+    def _solve_tree_flows(self, node_injection: np.ndarray) -> np.ndarray:
+        """
+            Start flows satisfying node equilibrium with zero flow on the closing edges.
+            node_injection is the flow accumulated along the edges ending at each node
+        """
+        q0 = np.zeros(self.num_edges)
+        net_flow = -node_injection.copy()
+        for node in self._tree_order[::-1]:
+            e = self._parent_edge[node]
+            if e < 0:
+                continue
+            sign = 1.0 if self._edge_end[e] == node else -1.0
+            q0[e] = sign*net_flow[node]
+            parent = self._parent_node[node]
+            net_flow[parent] -= (1.0 if self._edge_end[e] == parent else -1.0)*q0[e]
+        return q0
+
+    def solve(self, thickness: np.ndarray) -> dict:
+        """
+            Shear flow for a unit vertical shear force of 1 kN.
+
+            thickness: thickness of each element of structure_list, in mm
+
+            Returns the neutral axis (m), the inertia moment (m4), the start flow and
+            the maximum absolute flow of each edge (kN/m, i.e. N/mm), and the maximum
+            shear stress of each element of structure_list (N/mm2 per kN)
+        """
+        thickness = np.asarray(thickness, dtype=float)
+        t_mm = thickness[self._edge_element]*self._edge_thickness_factor
+        t = t_mm/1000.
+        L = self._edge_length
+        zi = self._edge_start_point[:, 1]
+        zk = self._edge_end_point[:, 1]
+
+        # Section properties of the whole (mirrored) section
+        a = t*L
+        A = np.sum(a)
+        zn = np.sum(0.5*a*(zi + zk))/A
+        Iy = np.sum((a/3.)*(zk**2 + zk*zi + zi**2)) - A*zn**2
+
+        z0 = zi - zn
+        z1 = zk - zn
+
+        # Open section flow accumulated along each edge, dq/ds = -t*(z - zn)/I
+        delta_q = -t*L*0.5*(z0 + z1)/Iy
+        node_injection = np.bincount(self._edge_end, weights=delta_q, minlength=self.num_nodes)
+        q0 = self._solve_tree_flows(node_injection)
+
+        # No twist around each closed cell
+        if self.num_cells > 0:
+            flexibility = L/t
+            open_rotation = -(z0*L**2/2 + (z1 - z0)*L**2/6)/Iy
+            cell_matrix = self._cycle_basis.T @ (flexibility[:, np.newaxis]*self._cycle_basis)
+            cell_flows = np.linalg.solve(cell_matrix, -self._cycle_basis.T @ (flexibility*q0 + open_rotation))
+            q0 = q0 + self._cycle_basis @ cell_flows
+
+        # Largest flow along each edge: ends, and where the edge crosses the neutral axis
+        q1 = q0 + delta_q
+        dz = z1 - z0
+        with np.errstate(divide='ignore', invalid='ignore'):
+            s_star = np.where(np.abs(dz) > 1e-12, -z0/dz, -1.0)
+        crosses_axis = (s_star > 0.0) & (s_star < 1.0)
+        s_star = np.where(crosses_axis, s_star, 0.0)*L
+        q_star = q0 - t*(z0*s_star + dz*s_star**2/(2*L))/Iy
+        max_flow = np.maximum(np.maximum(np.abs(q0), np.abs(q1)), np.where(crosses_axis, np.abs(q_star), 0.0))
+
+        edge_shear_stress = max_flow/t_mm
+        shear_stress = np.zeros(len(self._structure_list))
+        np.maximum.at(shear_stress, self._edge_element, edge_shear_stress)
+
+        shear_flow = dict(neutral_axis=zn, second_moment=Iy,
+                          start_flow=q0, max_flow=max_flow,
+                          shear_stress=shear_stress)
+        return shear_flow
+
+
+def test():
+    mat_a131 = export_a131_material()
+
+    # Closed box 2 m x 2 m, 10 mm thick: maximum flow 0.28125 kN/m per kN at the neutral axis
+    struct_0 = StructuralElement('Bottom', 'Bottom', mat_a131, [0.0, 0.0], [1000.0, 0.0], 10.)
+    struct_1 = StructuralElement('Side', 'Side', mat_a131, [1000.0, 0.0], [1000.0, 2000.0], 10.)
+    struct_2 = StructuralElement('Deck', 'Strength deck', mat_a131, [0.0, 2000.0], [1000.0, 2000.0], 10.)
+    box = ShearFlowSolver([struct_0, struct_1, struct_2])
+    shear_flow = box.solve(np.array([10., 10., 10.]))
+    print('Box: {:d} cells, side shear stress {:.6f} MPa per kN'.format(box.num_cells, shear_flow['shear_stress'][1]))
+
+    # Double bottom section with a centre girder and an internal deck
+    struct_0 = StructuralElement('Keel plating', 'Keel', mat_a131, [0.0, 0.0], [500.0, 0.0], 13.)
+    struct_1 = StructuralElement('Bottom shell plating', 'Bottom', mat_a131, [500.0, 0.0], [3000.0, 1500.0], 8.)
+    struct_2 = StructuralElement('Side shell plating', 'Side', mat_a131, [3000.0, 1500.0], [10000.0, 8000.0], 6.)
+    struct_3 = StructuralElement('Upper deck', 'Strength deck', mat_a131, [0.0, 8000.0], [10000.0, 8000.0], 7.)
+    struct_4 = StructuralElement('Inner bottom plating', 'Inner bottom', mat_a131, [0.0, 1000.0], [1000.0, 1000.0], 10.)
+    struct_5 = StructuralElement('Centre girder', 'Inner bottom', mat_a131, [0.0, 0.0], [0.0, 1000.0], 5.)
+    struct_6 = StructuralElement('Internal deck', 'Internal deck', mat_a131, [0.0, 5400.0], [7200.0, 5400.0], 7.)
+    structure_list = [struct_0, struct_1, struct_2, struct_3, struct_4, struct_5, struct_6]
+    thickness = np.array([struct_i.current_thickness for struct_i in structure_list])
+
+    section = ShearFlowSolver(structure_list)
+    shear_flow = section.solve(thickness)
+    print('Section: {:d} nodes, {:d} edges, {:d} cells'.format(section.num_nodes, section.num_edges, section.num_cells))
+    print(shear_flow['shear_stress'])
+
+    # Same topology, new thicknesses
+    shear_flow = section.solve(thickness + 2.0)
+    print(shear_flow['shear_stress'])
+
+
+if __name__ == '__main__':
+    test()
@@ -1,3 +1,7 @@
+import math
+import numpy as np
+
+
 class Ship:
     def __init__(self, L: float, B: float, T: float, disp: float,
                  speed: float, service_area: str, vessel_type: str,
@@ -26,6 +30,7 @@ class Ship:
         self._vessel_type = vessel_type
         self._frame_length = frame_length
         self._transverse_span = transverse_span
+        self._context = None
 
     @property
     def L(self):
@@ -77,9 +82,7 @@ class Ship:
 
     @property
     def block_coefficient(self):
-        disp_m3 = self.disp/1.025
-        self._block_coefficient = disp_m3/(self.L*self.B*self.T)
-        return self._block_coefficient
+        return self.context.block_coefficient
 
     @property
     def vessel_type(self) -> str:
@@ -93,6 +96,18 @@ class Ship:
     def transverse_span(self) -> float:
         return self._transverse_span
 
+    @property
+    def context(self) -> 'ShipContext':
+        """
+            Derived quantities of the ship in its current state.
+            Rebuilt only when a principal dimension has changed
+        """
+        key = (self._L, self._B, self._T, self._disp, self._V, self._service_area,
+               self._vessel_type, self._frame_length, self._transverse_span)
+        if self._context is None or self._context.key != key:
+            self._context = ShipContext(*key)
+        return self._context
+
     def print_ship_info(self):
         print("=================================")
         print('Length: {:.1f} m'.format(self._L))
@@ -106,6 +121,224 @@ class Ship:
         print("=================================")
 
 
+def calculate_block_coefficient(L, B, T, disp):
+    """
+        Block coefficient from the moulded displacement, in tons.
+        The arguments may be numpy arrays
+    """
+    disp_m3 = disp/1.025
+    return disp_m3/(L*B*T)
+
+
+def calculate_froude_number(L, V):
+    """
+        Froude number, with V in kn and L in m.
+        The arguments may be numpy arrays
+    """
+    g = 9.81
+    return 0.515*V/np.sqrt(g*L)
+
+
+class ShipContext:
+    def __init__(self, L: float, B: float, T: float, disp: float,
+                 speed: float, service_area: str, vessel_type: str,
+                 frame_length: float, transverse_span: float) -> None:
+        """
+        Immutable and hashable set of the ship-level quantities used by
+        DesignPressures, HullGirderLoads and StructuralDesign, computed once.
+        Same variables as Ship. Two contexts with the same variables are equal.
+
+        Derived quantities
+        ----------
+
+        * block_coefficient: Cb
+        * froude_number: Fn
+        * wave_height_factor: fHs of the service area
+        * wave_parameters: C_w_min, kr and xm of the nominal wave height, by pressure type
+        * encounter_frequency: omega_e used by the impact loads, in rad/s
+        * rule_length: Ls, in m
+        * rule_wave_coefficient: Cw
+        """
+        self._key = (L, B, T, disp, speed, service_area, vessel_type, frame_length, transverse_span)
+        self._block_coefficient = float(calculate_block_coefficient(L, B, T, disp))
+        self._froude_number = float(calculate_froude_number(L, speed))
+        self._wave_height_factor = calculate_wave_height_factor(service_area)
+
+        self._wave_parameters = dict()
+        for pressure_type in ["shell", "impact"]:
+            C_w_min, kr, xm = calculate_wave_parameters(L, self._block_coefficient, speed,
+                                                        self._wave_height_factor, pressure_type)
+            self._wave_parameters[pressure_type] = (float(C_w_min), kr, float(xm))
+
+        g = 9.81
+        Vsp = (2.0/3.0)*speed
+        omega = math.sqrt((2.0*math.pi*g)/(0.8*L))
+        self._encounter_frequency = omega*(1.0 + (0.2*omega*Vsp)/g)
+
+        Ls, _, Cw = calculate_rule_coefficients(L, B, T, disp)
+        self._rule_length = float(Ls)
+        self._rule_wave_coefficient = float(Cw)
+
+    @property
+    def key(self) -> tuple:
+        return self._key
+
+    def __eq__(self, other) -> bool:
+        return isinstance(other, ShipContext) and self._key == other._key
+
+    def __hash__(self) -> int:
+        return hash(self._key)
+
+    def __repr__(self) -> str:
+        class_name = type(self).__name__
+        return f"{class_name}{self._key}"
+
+    @property
+    def L(self) -> float:
+        return self._key[0]
+
+    @property
+    def B(self) -> float:
+        return self._key[1]
+
+    @property
+    def T(self) -> float:
+        return self._key[2]
+
+    @property
+    def disp(self) -> float:
+        return self._key[3]
+
+    @property
+    def V(self) -> float:
+        return self._key[4]
+
+    @property
+    def service_area(self) -> str:
+        return self._key[5]
+
+    @property
+    def vessel_type(self) -> str:
+        return self._key[6]
+
+    @property
+    def frame_length(self) -> float:
+        return self._key[7]
+
+    @property
+    def transverse_span(self) -> float:
+        return self._key[8]
+
+    @property
+    def context(self) -> 'ShipContext':
+        return self
+
+    @property
+    def block_coefficient(self) -> float:
+        return self._block_coefficient
+
+    @property
+    def froude_number(self) -> float:
+        return self._froude_number
+
+    @property
+    def wave_height_factor(self) -> float:
+        return self._wave_height_factor
+
+    def wave_parameters(self, pressure_type: str) -> tuple:
+        if pressure_type == "shell":
+            return self._wave_parameters["shell"]
+        return self._wave_parameters["impact"]
+
+    @property
+    def encounter_frequency(self) -> float:
+        return self._encounter_frequency
+
+    @property
+    def rule_length(self) -> float:
+        return self._rule_length
+
+    @property
+    def rule_wave_coefficient(self) -> float:
+        return self._rule_wave_coefficient
+
+
+def calculate_design_wave_height(service_area: str) -> float:
+    Hs = 0.0
+    if service_area == "SA1":
+        Hs = 5.5
+    elif service_area == "SA2":
+        Hs = 4.0
+    elif service_area == "SA3":
+        Hs = 3.6
+    elif service_area == "SA4":
+        Hs = 2.5
+    else:
+        Hs = 0.0
+
+    H_dw = 1.67*Hs
+    return H_dw
+
+
+def calculate_wave_height_factor(service_area: str) -> float:
+    if service_area == 'SA1':
+        fHs = 1.0
+    else:
+        fHs = calculate_design_wave_height(service_area)/calculate_design_wave_height("SA1")
+
+    return fHs
+
+
+def calculate_wave_parameters(L, Cb, V, fHs, pressure_type: str) -> tuple:
+    """
+        Ship dependent part of the nominal wave height.
+        L, Cb, V and fHs may be numpy arrays
+
+        C_w_min: minimum wave coefficient, in m
+        kr: wave height distribution factor
+        xm: position of the minimum wave height, as a fraction of L
+    """
+    C_w = fHs*0.0771*L*(Cb + 0.2)**0.3*np.exp(-0.0044*L)
+    Fn = calculate_froude_number(L, V)
+    xm = np.maximum(0.2, 0.45 - 0.6*Fn)
+
+    if pressure_type == "shell":
+        kr = 2.25
+    else:
+        kr = 4.5
+
+    km = 1 + ((kr*(0.5 - xm)**2)/(Cb + 0.2))
+    C_w_min = (C_w/km)*math.sqrt(2.25/kr)
+    return C_w_min, kr, xm
+
+
+def calculate_rule_coefficients(L, B, T, disp) -> tuple:
+    """
+        Ls: Rule length
+        Cb: block coefficient
+        Cw: wave coefficient (0.0792*Ls below 90 m, not defined beyond 500 m)
+
+        The arguments may be numpy arrays
+    """
+    Ls = 0.96*np.asarray(L, dtype=float)
+    Cb = calculate_block_coefficient(L, B, T, disp)
+
+    Cw = np.select([Ls < 90, Ls < 300, Ls < 350, Ls < 500],
+                   [0.0792*Ls,
+                    10.75 - (np.abs(300 - Ls)/100)**1.5,
+                    10.75,
+                    10.75 - (np.abs(Ls - 350)/150)**1.5],
+                   default=np.nan)
+    return Ls, Cb, Cw
+
+
+def as_ship_context(vessel) -> ShipContext:
+    """
+        Accepts either a Ship or a ShipContext
+    """
+    return vessel.context
+
+
 def create_vessel() -> Ship:
     """
     FREMM frigate
@@ -0,0 +1,117 @@
+import numpy as np
+
+
+class IntervalIndex:
+    def __init__(self, lower: np.ndarray, upper: np.ndarray) -> None:
+        """
+            Static index over closed intervals [lower, upper], for instance the z-ranges
+            of the structural elements, built once and queried many times.
+
+            Queries return the positions of the matching intervals, in increasing order.
+            below/above are binary searches over the sorted bounds, and crossing/overlapping
+            use a centered interval tree, so every query costs O(log n + k) for k hits
+        """
+        self._lower = np.asarray(lower, dtype=float).ravel()
+        self._upper = np.asarray(upper, dtype=float).ravel()
+        if self._lower.shape != self._upper.shape:
+            error_msg = "Lower and upper bounds must have the same size"
+            raise Exception(error_msg)
+        if np.any(self._upper < self._lower):
+            error_msg = "Upper bounds must not be smaller than lower bounds"
+            raise Exception(error_msg)
+
+        self._order_by_lower = np.argsort(self._lower, kind='stable')
+        self._sorted_lower = self._lower[self._order_by_lower]
+        self._order_by_upper = np.argsort(self._upper, kind='stable')
+        self._sorted_upper = self._upper[self._order_by_upper]
+        self._root = self._build(np.arange(self._lower.size))
+
+    def _build(self, ids: np.ndarray) -> dict:
+        if ids.size == 0:
+            return None
+        center = np.median(0.5*(self._lower[ids] + self._upper[ids]))
+        left = ids[self._upper[ids] < center]
+        right = ids[self._lower[ids] > center]
+        here = ids[(self._lower[ids] <= center) & (self._upper[ids] >= center)]
+
+        by_lower = here[np.argsort(self._lower[here], kind='stable')]
+        by_upper = here[np.argsort(-self._upper[here], kind='stable')]
+        node = dict(center=center,
+                    by_lower=by_lower, lower=self._lower[by_lower],
+                    by_upper=by_upper, upper=-self._upper[by_upper],
+                    left=self._build(left), right=self._build(right))
+        return node
+
+    @property
+    def size(self) -> int:
+        return self._lower.size
+
+    @property
+    def lower(self) -> np.ndarray:
+        return self._lower
+
+    @property
+    def upper(self) -> np.ndarray:
+        return self._upper
+
+    def below(self, value: float) -> np.ndarray:
+        """
+            Intervals lying entirely at or below value (upper <= value)
+        """
+        count = np.searchsorted(self._sorted_upper, value, side='right')
+        return np.sort(self._order_by_upper[:count])
+
+    def above(self, value: float) -> np.ndarray:
+        """
+            Intervals lying entirely at or above value (lower >= value)
+        """
+        first = np.searchsorted(self._sorted_lower, value, side='left')
+        return np.sort(self._order_by_lower[first:])
+
+    def crossing(self, value: float) -> np.ndarray:
+        """
+            Intervals containing value (lower <= value <= upper)
+        """
+        hits = []
+        node = self._root
+        while node is not None:
+            if value < node['center']:
+                count = np.searchsorted(node['lower'], value, side='right')
+                hits.append(node['by_lower'][:count])
+                node = node['left']
+            elif value > node['center']:
+                count = np.searchsorted(node['upper'], -value, side='right')
+                hits.append(node['by_upper'][:count])
+                node = node['right']
+            else:
+                hits.append(node['by_lower'])
+                break
+        if not hits:
+            return np.zeros(0, dtype=int)
+        return np.sort(np.concatenate(hits))
+
+    def overlapping(self, lower: float, upper: float) -> np.ndarray:
+        """
+            Intervals sharing at least one point with [lower, upper]
+        """
+        first = np.searchsorted(self._sorted_lower, lower, side='right')
+        last = np.searchsorted(self._sorted_lower, upper, side='right')
+        starting_inside = self._order_by_lower[first:last]
+        return np.sort(np.concatenate([self.crossing(lower), starting_inside]))
+
+
+def test():
+    rng = np.random.default_rng(0)
+    lower = rng.uniform(0, 10000, 500)
+    upper = lower + rng.uniform(0, 2000, 500)
+    index = IntervalIndex(lower, upper)
+    for value in [0.0, 2500.0, 7000.0, 11000.0]:
+        assert np.array_equal(index.crossing(value), np.flatnonzero((lower <= value) & (upper >= value)))
+        assert np.array_equal(index.below(value), np.flatnonzero(upper <= value))
+        assert np.array_equal(index.above(value), np.flatnonzero(lower >= value))
+    assert np.array_equal(index.overlapping(3000.0, 4000.0), np.flatnonzero((lower <= 4000.0) & (upper >= 3000.0)))
+    print(index.crossing(2500.0))
+
+
+if __name__ == '__main__':
+    test()
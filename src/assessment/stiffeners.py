@@ -45,59 +45,23 @@ class FlatBar(Stiffener):
     
     def _compute_effective_section_properties(self,
                                               plate_thickness: float,
-                                              spacing: float) -> np.ndarray:
+                                              spacing: float,
+                                              span: float = None) -> np.ndarray:
         """
-            height is in mm
-            web_thickness is in mm
             plate_thickness is in mm
+            spacing is in mm
+            span is in mm
 
-            section_properties is a numpy array comprised by four values
-            First value is the total neutral axis
-            Second value is the total area
-            Third value is the total section modulus
-            Fourth value is the total second moment of area (inertia moment)
+            See compute_flat_bar_effective_section_properties
         """
-        height = self._height
-        web_thickness = self._web_thickness
-
-        effective_width = min([max([40.0*plate_thickness, 600.]), spacing])
-        effective_area = effective_width*plate_thickness
-
-        stiffener_area = height*web_thickness
-
-        total_area_mm2 = effective_area + stiffener_area
-        total_area_cm2 = total_area_mm2/100.
-
-        plate_first_moment = 0.5*plate_thickness*effective_area
-        stiffener_first_moment = (plate_thickness + (0.5*height))*stiffener_area
-        first_area_moment = plate_first_moment + stiffener_first_moment
-        neutral_axis_mm = first_area_moment/total_area_mm2
-        neutral_axis_cm = neutral_axis_mm/10.
-
-        # plate_second_moment = (1.0/12)*effective_width*effective_area**3 + effective_area*(neutral_axis_mm - (0.5*plate_thickness))**2
-        # stiffener_second_moment = (1.0/12)*web_thickness*height**3 + stiffener_area*(neutral_axis_mm - (plate_thickness + 0.5*height))**2
-        # second_area_moment_1 = plate_second_moment + stiffener_second_moment
-
-        plate_second_moment_2 = (1.0/12)*effective_width*plate_thickness**3 + effective_area*((0.5*plate_thickness))**2
-        stiffener_second_moment_2 = (1.0/12)*web_thickness*height**3 + stiffener_area*((plate_thickness + 0.5*height))**2
-        second_area_moment_baseline = plate_second_moment_2 + stiffener_second_moment_2
-        total_second_area_moment_mm4 = second_area_moment_baseline - total_area_mm2*neutral_axis_mm**2
-
-        total_second_area_moment_cm4 = total_second_area_moment_mm4/1e4
-
-        total_height_cm = (plate_thickness + height)/10.
-        total_section_modulus_cm3 = total_second_area_moment_cm4/max(neutral_axis_cm, total_height_cm - neutral_axis_cm)
-
-        section_properties = np.array([neutral_axis_cm, total_area_cm2,
-                                       total_section_modulus_cm3,
-                                       total_second_area_moment_cm4])
-        
-        return section_properties
+        return compute_flat_bar_effective_section_properties(self._height, self._web_thickness,
+                                                             plate_thickness, spacing, span)
     
     def calculate_stiffener_section_properties(self,
                                                plate_thickness: float,
-                                               spacing: float):
-        section_properties = self._compute_effective_section_properties(plate_thickness, spacing)
+                                               spacing: float,
+                                               span: float = None):
+        section_properties = self._compute_effective_section_properties(plate_thickness, spacing, span)
         
         self._total_neutral_axis = section_properties[0]
         self._total_area = section_properties[1]
@@ -111,6 +75,92 @@ class FlatBar(Stiffener):
         print('Section modulus: {:.3f} cm3'.format(self._total_section_modulus))
         print('Inertia moment: {:.3f} cm4'.format(self._total_second_area_moment))
 
+def calculate_shear_lag_factor(span, breadth):
+    """
+        Ratio of the effective to the actual breadth of a flange,
+        min(1, 0.3*(span/breadth)**(2/3)). span and breadth are in the same units
+        and may be numpy arrays
+    """
+    span = np.asarray(span, dtype=float)
+    breadth = np.asarray(breadth, dtype=float)
+    return np.minimum(1.0, 0.3*(span/breadth)**(2./3))
+
+
+def calculate_effective_breadth(plate_thickness, spacing, span=None):
+    """
+        Effective breadth, in mm, of the plating attached to a stiffener or girder.
+        plate_thickness, spacing and span are in mm
+
+        Where the span is given and positive, the shear-lag breadth
+        spacing*min(1, 0.3*(span/spacing)**(2/3)) is used;
+        elsewhere the fixed breadth min(max(40*t, 600), spacing).
+        The arguments may be numpy arrays
+    """
+    fixed_breadth = np.minimum(np.maximum(40.0*np.asarray(plate_thickness, dtype=float), 600.), spacing)
+    if span is None:
+        return fixed_breadth
+    span = np.asarray(span, dtype=float)
+    with np.errstate(divide='ignore'):
+        shear_lag_breadth = spacing*calculate_shear_lag_factor(span, spacing)
+    return np.where(span > 0.0, shear_lag_breadth, fixed_breadth)
+
+
+def compute_flat_bar_effective_section_properties(height: float, web_thickness: float,
+                                                  plate_thickness: float,
+                                                  spacing: float,
+                                                  span: float = None) -> np.ndarray:
+    """
+        height is in mm
+        web_thickness is in mm
+        plate_thickness is in mm
+        spacing is in mm
+        span is in mm. When given, the effective breadth accounts for shear lag
+        (see calculate_effective_breadth)
+
+        The arguments may be numpy arrays, in which case each value
+        of section_properties is an array of their broadcast shape
+
+        section_properties is a numpy array comprised by four values
+        First value is the total neutral axis
+        Second value is the total area
+        Third value is the total section modulus
+        Fourth value is the total second moment of area (inertia moment)
+    """
+    effective_width = calculate_effective_breadth(plate_thickness, spacing, span)
+    effective_area = effective_width*plate_thickness
+
+    stiffener_area = height*web_thickness
+
+    total_area_mm2 = effective_area + stiffener_area
+    total_area_cm2 = total_area_mm2/100.
+
+    plate_first_moment = 0.5*plate_thickness*effective_area
+    stiffener_first_moment = (plate_thickness + (0.5*height))*stiffener_area
+    first_area_moment = plate_first_moment + stiffener_first_moment
+    neutral_axis_mm = first_area_moment/total_area_mm2
+    neutral_axis_cm = neutral_axis_mm/10.
+
+    # plate_second_moment = (1.0/12)*effective_width*effective_area**3 + effective_area*(neutral_axis_mm - (0.5*plate_thickness))**2
+    # stiffener_second_moment = (1.0/12)*web_thickness*height**3 + stiffener_area*(neutral_axis_mm - (plate_thickness + 0.5*height))**2
+    # second_area_moment_1 = plate_second_moment + stiffener_second_moment
+
+    plate_second_moment_2 = (1.0/12)*effective_width*plate_thickness**3 + effective_area*((0.5*plate_thickness))**2
+    stiffener_second_moment_2 = (1.0/12)*web_thickness*height**3 + stiffener_area*((plate_thickness + 0.5*height))**2
+    second_area_moment_baseline = plate_second_moment_2 + stiffener_second_moment_2
+    total_second_area_moment_mm4 = second_area_moment_baseline - total_area_mm2*neutral_axis_mm**2
+
+    total_second_area_moment_cm4 = total_second_area_moment_mm4/1e4
+
+    total_height_cm = (plate_thickness + height)/10.
+    total_section_modulus_cm3 = total_second_area_moment_cm4/np.maximum(neutral_axis_cm, total_height_cm - neutral_axis_cm)
+
+    section_properties = np.array([neutral_axis_cm, total_area_cm2,
+                                   total_section_modulus_cm3,
+                                   total_second_area_moment_cm4])
+    
+    return section_properties
+
+
 def test():
     fb_1 = FlatBar('120x5')
     t_plate = 10.
@@ -118,5 +168,10 @@ def test():
     fb_1.calculate_stiffener_section_properties(t_plate, spacing)
     fb_1.print_stiffener_section_properties()
 
+    spans = np.array([0., 500., 1500., 3000.])
+    section_properties = compute_flat_bar_effective_section_properties(120., 5., t_plate, spacing, spans)
+    print('Effective breadth: {} mm'.format(calculate_effective_breadth(t_plate, spacing, spans)))
+    print('Inertia moment: {} cm4'.format(section_properties[3]))
+
 if __name__ == '__main__':
     test()
\ No newline at end of file
@@ -0,0 +1,237 @@
+import numpy as np
+import pandas as pd
+
+from ship import create_vessel
+
+GRAVITY = 9.81
+SEA_WATER_DENSITY = 1.025
+
+
+class StillWaterLoads:
+    def __init__(self, x: np.ndarray, lightship: np.ndarray, deadweight: np.ndarray,
+                 sectional_area: np.ndarray, condition_names: list = None,
+                 rho: float = SEA_WATER_DENSITY) -> None:
+        """
+        Still water shear forces and bending moments of a set of loading conditions,
+        from their weight and buoyancy distributions
+
+        Variables
+        ----------
+
+        * x: longitudinal stations, in m, in increasing order from the aft end
+        * lightship: lightship mass per unit length, in t/m, at the stations
+        * deadweight: deadweight mass per unit length, in t/m, array of shape
+            (num_conditions, num_stations), one row per loading condition
+        * sectional_area: immersed sectional area curve, in m2, at the stations.
+            Either one curve for all the conditions or one row per condition
+        * condition_names: names of the loading conditions
+        * rho: sea water density, in t/m3
+
+        All the conditions are computed at once as (num_conditions, num_stations) arrays
+        """
+        self._x = np.asarray(x, dtype=float)
+        self._lightship = np.asarray(lightship, dtype=float)
+        self._deadweight = np.atleast_2d(np.asarray(deadweight, dtype=float))
+        self._sectional_area = np.asarray(sectional_area, dtype=float)
+        self._rho = rho
+
+        num_conditions = self._deadweight.shape[0]
+        if condition_names is None:
+            condition_names = ['Condition {:d}'.format(k + 1) for k in range(num_conditions)]
+        self._condition_names = list(condition_names)
+
+        if np.any(np.diff(self._x) <= 0.0):
+            error_msg = "Still water stations must be in increasing order"
+            raise Exception(error_msg)
+        if self._lightship.shape != self._x.shape:
+            error_msg = "The lightship distribution does not match the number of stations"
+            raise Exception(error_msg)
+        if self._deadweight.shape[1] != self._x.shape[0]:
+            error_msg = "The deadweight distributions do not match the number of stations"
+            raise Exception(error_msg)
+        if self._sectional_area.shape[-1] != self._x.shape[0] or self._sectional_area.ndim > 2:
+            error_msg = "The sectional area curve does not match the number of stations"
+            raise Exception(error_msg)
+        if len(self._condition_names) != num_conditions:
+            error_msg = "The number of condition names does not match the deadweight distributions"
+            raise Exception(error_msg)
+
+        self._still_water_loads = None
+
+    @property
+    def x(self) -> np.ndarray:
+        return self._x
+
+    @property
+    def condition_names(self) -> list:
+        return self._condition_names
+
+    def compute_still_water_loads(self) -> dict:
+        """
+            Weight and buoyancy, in kN/m, shear forces, in kN, and bending moments,
+            in kN.m (hogging positive), of shape (num_conditions, num_stations).
+            See calculate_still_water_loads
+        """
+        weight = GRAVITY*(self._lightship + self._deadweight)
+        buoyancy = np.broadcast_to(self._rho*GRAVITY*self._sectional_area, weight.shape)
+        self._still_water_loads = calculate_still_water_loads(self._x, weight, buoyancy)
+
+        still_water_loads = self._still_water_loads
+        M_sw = still_water_loads['bending_moment']
+        M_sw_h = np.maximum(np.max(M_sw, axis=1), 0.0)
+        M_sw_s = np.minimum(np.min(M_sw, axis=1), 0.0)
+        conditions_info_dict = dict({'Displacement [t]': still_water_loads['displacement'],
+                                     'Max. hogging [kN.m]': M_sw_h,
+                                     'x hogging [m]': np.where(M_sw_h > 0.0, self._x[np.argmax(M_sw, axis=1)], np.nan),
+                                     'Max. sagging [kN.m]': M_sw_s,
+                                     'x sagging [m]': np.where(M_sw_s < 0.0, self._x[np.argmin(M_sw, axis=1)], np.nan),
+                                     'Max. shear [kN]': np.max(np.abs(still_water_loads['shear_force']), axis=1),
+                                     'LCG [m]': still_water_loads['lcg'],
+                                     'Trim factor': still_water_loads['trim_factor']})
+        self._conditions_info_pd = pd.DataFrame(data=conditions_info_dict,
+                                                index=pd.Index(self._condition_names, name='Condition'))
+        return still_water_loads
+
+    def _get_still_water_loads(self) -> dict:
+        if self._still_water_loads is None:
+            self.compute_still_water_loads()
+        return self._still_water_loads
+
+    def calculate_bending_moment_envelope(self, x: np.ndarray) -> tuple:
+        """
+            Hogging (positive) and sagging (negative) still water bending moments,
+            in kN.m, at the positions x: the extremes over all the loading conditions.
+            A set of conditions that never hogs (or sags) gives a null envelope
+        """
+        M_sw = interpolate_along_stations(x, self._x, self._get_still_water_loads()['bending_moment'])
+        return np.maximum(np.max(M_sw, axis=0), 0.0), np.minimum(np.min(M_sw, axis=0), 0.0)
+
+    def calculate_shear_force_envelope(self, x: np.ndarray) -> tuple:
+        """
+            Positive and negative still water shear forces, in kN, at the positions x:
+            the extremes over all the loading conditions
+        """
+        Q_sw = interpolate_along_stations(x, self._x, self._get_still_water_loads()['shear_force'])
+        return np.maximum(np.max(Q_sw, axis=0), 0.0), np.minimum(np.min(Q_sw, axis=0), 0.0)
+
+    def print_conditions_info(self) -> None:
+        print(self._conditions_info_pd)
+
+
+def cumulative_trapezoid(y: np.ndarray, x: np.ndarray) -> np.ndarray:
+    """
+        Cumulative trapezoidal integral of y along its last axis, starting from 0
+        at x[0]. Same shape as y
+    """
+    y = np.asarray(y, dtype=float)
+    increments = 0.5*(y[..., 1:] + y[..., :-1])*np.diff(x)
+    integral = np.zeros_like(y)
+    np.cumsum(increments, axis=-1, out=integral[..., 1:])
+    return integral
+
+
+def interpolate_along_stations(x, stations: np.ndarray, values: np.ndarray) -> np.ndarray:
+    """
+        Linear interpolation of every row of values, of shape (num_rows, num_stations),
+        at the positions x. Returns an array of shape (num_rows, num_positions).
+        Outside the stations, the end values are used
+    """
+    x = np.clip(np.atleast_1d(np.asarray(x, dtype=float)), stations[0], stations[-1])
+    k = np.clip(np.searchsorted(stations, x, side='right') - 1, 0, stations.shape[0] - 2)
+    weight = (x - stations[k])/(stations[k + 1] - stations[k])
+    return (1.0 - weight)*values[..., k] + weight*values[..., k + 1]
+
+
+def calculate_still_water_loads(x, weight, buoyancy) -> dict:
+    """
+        Still water shear force and bending moment of the loading conditions
+        given by the rows of weight and buoyancy, in kN/m, at the stations x, in m.
+
+        The vessel is brought to equilibrium by scaling the buoyancy with a factor
+        linear along the length, b*(alpha + beta*(x - x_mid)/L), as a change of
+        draught and trim would do. alpha and beta are solved for every condition
+        so that the shear force and the bending moment are null at both ends.
+        The net load q = w - b is then integrated twice with cumulative trapezoidal sums:
+            Q(x) = int(q), M(x) = int(Q), hogging positive
+
+        weight and buoyancy are arrays of shape (num_conditions, num_stations)
+    """
+    x = np.asarray(x, dtype=float)
+    weight = np.atleast_2d(np.asarray(weight, dtype=float))
+    buoyancy = np.atleast_2d(np.asarray(buoyancy, dtype=float))
+
+    length = x[-1] - x[0]
+    trim_shape = (x - 0.5*(x[0] + x[-1]))/length
+
+    # End shear force and end bending moment are linear in the load
+    def end_loads(load: np.ndarray) -> np.ndarray:
+        shear_force = cumulative_trapezoid(load, x)
+        return np.stack([shear_force[..., -1], cumulative_trapezoid(shear_force, x)[..., -1]], axis=-1)
+
+    if np.any(end_loads(buoyancy)[:, 0] <= 0.0):
+        error_msg = "The sectional area curve gives no buoyancy"
+        raise Exception(error_msg)
+    equilibrium_matrix = np.stack([end_loads(buoyancy), end_loads(buoyancy*trim_shape)], axis=-1)
+    alpha, beta = np.linalg.solve(equilibrium_matrix, end_loads(weight)[..., np.newaxis])[..., 0].T
+    buoyancy = buoyancy*(alpha[:, np.newaxis] + beta[:, np.newaxis]*trim_shape)
+
+    net_load = weight - buoyancy
+    shear_force = cumulative_trapezoid(net_load, x)
+    bending_moment = cumulative_trapezoid(shear_force, x)
+    # Null by construction, up to the round-off of the solution
+    shear_force[:, -1] = 0.0
+    bending_moment[:, -1] = 0.0
+
+    total_weight = cumulative_trapezoid(weight, x)[:, -1]
+    still_water_loads = dict(x=x, weight=weight, buoyancy=buoyancy,
+                             shear_force=shear_force, bending_moment=bending_moment,
+                             displacement=total_weight/GRAVITY,
+                             lcg=cumulative_trapezoid(weight*x, x)[:, -1]/total_weight,
+                             draught_factor=alpha, trim_factor=beta)
+    return still_water_loads
+
+
+def create_loading_conditions(vessel) -> StillWaterLoads:
+    """
+    Full load, arrival and ends-loaded conditions of the FREMM frigate.
+    Illustrative distributions, the lightship and deadweight add up to the design displacement
+    """
+    L = vessel.L
+    x = np.linspace(0.0, L, 71)
+    x_ratio = x/L
+
+    # Sectional area curve with a parallel middle body, at the design draught
+    sectional_area = np.interp(x_ratio, [0.0, 0.1, 0.35, 0.6, 0.85, 1.0], [0.0, 0.45, 1.0, 1.0, 0.55, 0.0])
+    sectional_area = sectional_area*vessel.disp/(SEA_WATER_DENSITY*cumulative_trapezoid(sectional_area, x)[-1])
+
+    lightship_shape = np.interp(x_ratio, [0.0, 0.05, 0.3, 0.7, 0.95, 1.0], [0.3, 0.7, 1.0, 1.0, 0.6, 0.2])
+    lightship = 6500.*lightship_shape/cumulative_trapezoid(lightship_shape, x)[-1]
+
+    def deadweight_block(x_start: float, x_end: float, mass: float) -> np.ndarray:
+        block = ((x_ratio >= x_start) & (x_ratio <= x_end)).astype(float)
+        return mass*block/cumulative_trapezoid(block, x)[-1]
+
+    full_load = deadweight_block(0.3, 0.7, 2500.)
+    arrival = deadweight_block(0.3, 0.7, 1000.) + deadweight_block(0.1, 0.2, 300.)
+    ends_loaded = (deadweight_block(0.05, 0.2, 500.) + deadweight_block(0.75, 0.9, 500.)
+                   + deadweight_block(0.3, 0.7, 1500.))
+
+    return StillWaterLoads(x, lightship, np.stack([full_load, arrival, ends_loaded]), sectional_area,
+                           condition_names=['Full load', 'Arrival', 'Ends loaded'])
+
+
+def test():
+    vessel = create_vessel()
+    still_water = create_loading_conditions(vessel)
+    still_water.compute_still_water_loads()
+    still_water.print_conditions_info()
+
+    stations = np.linspace(0.0, vessel.L, 9)
+    M_sw_h, M_sw_s = still_water.calculate_bending_moment_envelope(stations)
+    Q_sw_p, Q_sw_n = still_water.calculate_shear_force_envelope(stations)
+    for x_i, M_h, M_s, Q_p, Q_n in zip(stations, M_sw_h, M_sw_s, Q_sw_p, Q_sw_n):
+        print('x = {:5.1f} m: M_sw {:9.1f} / {:9.1f} kN.m, Q_sw {:8.1f} / {:8.1f} kN'.format(x_i, M_h, M_s, Q_p, Q_n))
+
+
+if __name__ == '__main__':
+    test()
@@ -1,16 +1,28 @@
+import functools
 import math
 import numpy as np
 import pandas as pd
 
-from structural_element import StructuralElement
+from structural_element import StructuralElement, compile_element_arrays
 from ship import Ship
+from ship import ShipContext
+from ship import as_ship_context
 from material import Material
+from material import calculate_kms
 
 class StructuralDesign:
-    def __init__(self, vessel: Ship, mat: Material) -> None:
-        self._vessel = vessel
+    def __init__(self, vessel: Ship | ShipContext, mat: Material, minimum_scantling: dict = None) -> None:
+        """
+            vessel: Ship or ShipContext
+            minimum_scantling: NSR minimum thicknesses by struct type, in mm.
+                               Computed from the vessel and the material when not given
+        """
+        self._vessel = as_ship_context(vessel)
         self._material = mat
-        self._compute_NSR_minimal_structural_requirements()
+        if minimum_scantling is None:
+            self._compute_NSR_minimal_structural_requirements()
+        else:
+            self._minimum_scantling = minimum_scantling
     
     @staticmethod
     def allowable_stress_factors(structure_item_i: str) -> np.ndarray:
@@ -31,14 +43,24 @@ class StructuralDesign:
         
         return limiting_stress_factor[structure_item_i]
 
-    def _select_limiting_stress_coefficient(self, structural_item: str) -> float:
+    @staticmethod
+    def _gather_allowable_stress_factors(struct_types: np.ndarray) -> np.ndarray:
+        """
+            Returns a num_elementsx3 array with the allowable stress factors
+            (sigma, tau and delta) of each structural type
+        """
+        f_factors = np.zeros((len(struct_types), 3))
+        for struct_type in np.unique(struct_types):
+            f_factors[struct_types == struct_type, :] = StructuralDesign.allowable_stress_factors(struct_type)
+        return f_factors
+
+    def _select_limiting_stress_coefficient(self, structural_item: str, factor_hts: float = 1.0) -> float:
         """
-            factor_hts is 1.0 for local loads. 
-            For global loads, custom values are to be computed and interpolated
+            factor_hts is the local loads f_hts of the element material,
+            1.0 up to 355 N/mm2 yield stress
         """
         f_factors = StructuralDesign.allowable_stress_factors(structural_item)
         factor_f1 = f_factors[0]
-        factor_hts = 1.0
         factor_fs = factor_f1*factor_hts
         return factor_fs
 
@@ -55,7 +77,8 @@ class StructuralDesign:
             beta = AR*(1.0-0.25*AR)
         else:
             beta = 1.0
-        f_sigma = self._select_limiting_stress_coefficient(structural_item.struct_type)
+        f_sigma = self._select_limiting_stress_coefficient(structural_item.struct_type,
+                                                           structural_item.material._hts_correction_factor("Local"))
         design_pressure = structural_item.design_pressure
         sigma_o = structural_item.material.minimum_yield_stress
         tp = 22.4*spacing*gamma*beta*math.sqrt(design_pressure/(f_sigma*sigma_o))*1e-3
@@ -96,34 +119,180 @@ class StructuralDesign:
         required_section_properties = np.array([Z, I, Aw])
         return required_section_properties
 
-    def _calculate_primary_member_property_sections(self, structural_item: StructuralElement) -> None:
+    def _calculate_primary_member_property_sections(self, structural_item: StructuralElement) -> np.ndarray:
         """
             Z is in cm3
             I is in cm4
             A is in cm2
         """
-        unsupported_span = self._vessel.transverse_span
-        spacing = structural_item.stiffener_spacing
+        spacing = structural_item._primary_member_spacing
+        unsupported_span = structural_item._primary_member_span
         design_pressure = structural_item.design_pressure
         sigma_o = structural_item.material.minimum_yield_stress
-        E_young = structural_item.material.young_modulus
+        E_young = structural_item.material.young_modulus/1e6
         tau_o = structural_item.material.shear_strength
-        struct_name = structural_item.name
+        struct_type = structural_item.struct_type
 
-        f_factors = StructuralDesign.allowable_stress_factors(struct_name)
-        f_sigma = f_factors[0]
-        f_tau = f_factors[1]
-        f_delta = f_factors[2]
+        f_factors = StructuralDesign.allowable_stress_factors(struct_type)
 
-        # Primary stiffening
-        phi_z = 1.0/12
-        phi_I = 1.0/384
-        phi_A = 0.5
+        Z, I, Aw = compute_primary_member_requirements(design_pressure, spacing, unsupported_span,
+                                                       f_factors[0], f_factors[1], f_factors[2],
+                                                       sigma_o, E_young, tau_o)
 
-        Z = (1000*phi_z*design_pressure*spacing*unsupported_span**2)/(f_sigma*sigma_o)
-        I = (1e5*phi_I*design_pressure*spacing*unsupported_span**3)/(f_delta*E_young)
-        Aw = (10*phi_A*design_pressure*spacing*unsupported_span)/(f_tau*tau_o)
+        required_section_properties = np.array([Z, I, Aw])
+        return required_section_properties
+
+    def calculate_primary_member_scantling(self, structure_list: list) -> None:
+        """
+            Web frames and girders of all the elements holding primary members,
+            checked at once. structure_list may gather the elements of several sections.
+            Margins are current/required - 1, positive when complied
+        """
+        element_arrays = compile_element_arrays(structure_list)
+        has_primary = element_arrays['num_primary_members'] != 0
+        primary_list = [struct_i for struct_i, has_primary_i in zip(structure_list, has_primary) if has_primary_i]
+
+        f_factors = StructuralDesign._gather_allowable_stress_factors(element_arrays['struct_type'][has_primary])
+        Z, I, Aw = compute_primary_member_requirements(element_arrays['design_pressure'][has_primary],
+                                                       element_arrays['primary_member_spacing'][has_primary],
+                                                       element_arrays['primary_member_span'][has_primary],
+                                                       f_factors[:, 0], f_factors[:, 1], f_factors[:, 2],
+                                                       element_arrays['yield_stress'][has_primary],
+                                                       element_arrays['young_modulus'][has_primary],
+                                                       element_arrays['shear_strength'][has_primary])
+
+        current_Z = element_arrays['primary_member_section_modulus'][has_primary]
+        current_I = element_arrays['primary_member_second_moment'][has_primary]
+        current_Aw = element_arrays['primary_member_area'][has_primary]
+
+        with np.errstate(divide='ignore', invalid='ignore'):
+            Z_margin = current_Z/Z - 1.0
+            I_margin = current_I/I - 1.0
+            Aw_margin = np.where(Aw > 0.0, current_Aw/Aw - 1.0, np.inf)
+
+        primary_plating_list = list(element_arrays['name'][has_primary])
+        primary_members_list = [struct_i._primary_member._name for struct_i in primary_list]
+
+        scantling_primary_info_dict = dict({'Primary member name': primary_members_list,
+                                            'Required Z [cm3]': Z,
+                                            'Current Z [cm3]': current_Z,
+                                            'Required I [cm4]': I,
+                                            'Current I [cm4]': current_I,
+                                            'Required Aw [cm2]': Aw,
+                                            'Current Aw [cm2]': current_Aw})
+
+        criteria_primary_info_dict = dict({'Primary member name': primary_members_list,
+                                           'Z margin': Z_margin,
+                                           'I margin': I_margin,
+                                           'Aw margin': Aw_margin,
+                                           'Z criteria': [self._assess_criteria(*values) for values in zip(Z, current_Z)],
+                                           'I criteria': [self._assess_criteria(*values) for values in zip(I, current_I)],
+                                           'Aw criteria': [self._assess_criteria(*values) for values in zip(Aw, current_Aw)]})
+
+        self._scantling_primary_info_pd = pd.DataFrame(data=scantling_primary_info_dict, index=primary_plating_list)
+        self._criteria_primary_info_pd = pd.DataFrame(data=criteria_primary_info_dict, index=primary_plating_list)
+
+    def print_primary_member_info(self) -> None:
+        print(self._scantling_primary_info_pd)
+        print(self._criteria_primary_info_pd)
     
+    def calculate_scantling_sensitivities(self, structure_list: list) -> dict:
+        """
+            Required scantlings of all the elements and their partial derivatives,
+            computed in closed form from the same expressions used by
+            _calculate_required_thickness and _calculate_secondary_member_property_sections
+
+            The returned dictionary has one entry per required value ('t', 'Z', 'I', 'Aw').
+            Each entry is a dictionary of arrays (one value per element):
+            * value: the required value
+            * pressure: derivative with respect to the design pressure, per kN/m2
+            * spacing: derivative with respect to the stiffener spacing, per mm
+            * span: derivative with respect to the unsupported span, per mm
+            * yield_stress: derivative with respect to the minimum yield stress, per N/mm2
+
+            t is in mm, and is the governing thickness, i.e. the NSR minimum is applied.
+            Where the minimum governs, the derivatives of t are zero.
+            The 'minimum_governs' and 'stiffened' entries are boolean masks.
+        """
+        element_arrays = compile_element_arrays(structure_list)
+        struct_types = element_arrays['struct_type']
+        design_pressure = element_arrays['design_pressure']
+        spacing = element_arrays['stiffener_spacing']
+        sigma_o = element_arrays['yield_stress']
+        E_young = element_arrays['young_modulus']
+        tau_o = element_arrays['shear_strength']
+        span = np.full_like(spacing, self._vessel.transverse_span, dtype=float)
+
+        f_factors = StructuralDesign._gather_allowable_stress_factors(struct_types)
+        f_sigma = f_factors[:, 0]
+        f_tau = f_factors[:, 1]
+        f_delta = f_factors[:, 2]
+
+        # Plating
+        gamma = 1.0
+        span_is_longer = span >= spacing
+        AR = np.where(span_is_longer, span/spacing, spacing/span)
+        dAR_dspan = np.where(span_is_longer, 1.0/spacing, -spacing/span**2)
+        dAR_dspacing = np.where(span_is_longer, -span/spacing**2, 1.0/span)
+        beta = np.where(AR <= 2.0, AR*(1.0 - 0.25*AR), 1.0)
+        dbeta_dAR = np.where(AR <= 2.0, 1.0 - 0.5*AR, 0.0)
+
+        f_sigma_plate = f_sigma*element_arrays['hts_factor_local']
+        with np.errstate(divide='ignore', invalid='ignore'):
+            tp = 22.4*spacing*gamma*beta*np.sqrt(design_pressure/(f_sigma_plate*sigma_o))*1e-3
+            dtp_dpressure = 22.4*spacing*gamma*beta*0.5/np.sqrt(design_pressure*f_sigma_plate*sigma_o)*1e-3
+            dtp_dspacing = tp/spacing + (tp/beta)*dbeta_dAR*dAR_dspacing
+            dtp_dspan = (tp/beta)*dbeta_dAR*dAR_dspan
+            dtp_dyield = -0.5*tp/sigma_o
+
+        minimum_thickness = np.array([self._minimum_scantling.get(struct_type, 0.0) for struct_type in struct_types])
+        minimum_governs = minimum_thickness > tp
+        t_required = np.where(minimum_governs, minimum_thickness, tp)
+
+        # Secondary stiffening
+        le = span/1000.
+        phi_z = 0.1
+        phi_I = 1.0/288
+        phi_A = 0.5
+
+        Z = (phi_z*design_pressure*spacing*le**2)/(f_sigma*sigma_o)
+        I = (100*phi_I*design_pressure*spacing*le**3)/(f_delta*E_young)
+        has_shear_factor = f_tau > 1e-5
+        with np.errstate(divide='ignore', invalid='ignore'):
+            Aw = np.where(has_shear_factor, (phi_A*design_pressure*spacing*le)/(100*f_tau*tau_o), 0.0)
+
+        dZ_dpressure = (phi_z*spacing*le**2)/(f_sigma*sigma_o)
+        dI_dpressure = (100*phi_I*spacing*le**3)/(f_delta*E_young)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            dAw_dpressure = np.where(has_shear_factor, (phi_A*spacing*le)/(100*f_tau*tau_o), 0.0)
+
+        sensitivities = dict()
+        sensitivities['t'] = dict(value=t_required,
+                                  pressure=np.where(minimum_governs, 0.0, dtp_dpressure),
+                                  spacing=np.where(minimum_governs, 0.0, dtp_dspacing),
+                                  span=np.where(minimum_governs, 0.0, dtp_dspan),
+                                  yield_stress=np.where(minimum_governs, 0.0, dtp_dyield))
+        sensitivities['Z'] = dict(value=Z,
+                                  pressure=dZ_dpressure,
+                                  spacing=Z/spacing,
+                                  span=2.0*Z/span,
+                                  yield_stress=-Z/sigma_o)
+        sensitivities['I'] = dict(value=I,
+                                  pressure=dI_dpressure,
+                                  spacing=I/spacing,
+                                  span=3.0*I/span,
+                                  yield_stress=np.zeros_like(I))
+        sensitivities['Aw'] = dict(value=Aw,
+                                   pressure=dAw_dpressure,
+                                   spacing=Aw/spacing,
+                                   span=Aw/span,
+                                   yield_stress=-Aw/sigma_o)
+        sensitivities['minimum_governs'] = minimum_governs
+        sensitivities['stiffened'] = element_arrays['num_stiffeners'] != 0
+        sensitivities['name'] = element_arrays['name']
+
+        return sensitivities
+
     def calculate_structural_scantling(self, structure_list: list) -> None:
         plating_list = list()
         stiffeners_list = list()
@@ -209,6 +378,13 @@ class StructuralDesign:
         self._criteria_plating_info_pd = pd.DataFrame(data=criteria_plating_info_dict, index=plating_list)
         self._criteria_stiffener_info_pd = pd.DataFrame(data=criteria_stiffener_info_dict, index=stiffened_plating_list)
 
+    def add_buckling_criteria(self, buckling) -> None:
+        """
+            Joins the criteria of a BucklingAssessment to the plating and stiffener criteria tables
+        """
+        self._criteria_plating_info_pd = self._criteria_plating_info_pd.join(buckling._criteria_plating_info_pd)
+        self._criteria_stiffener_info_pd = self._criteria_stiffener_info_pd.join(buckling._criteria_stiffener_info_pd)
+
     def print_scantling_info(self) -> None:
         print(self._scantling_plating_info_pd)
         print(self._scantling_stiffener_info_pd)
@@ -224,45 +400,92 @@ class StructuralDesign:
             return "Failed"
     
     def _compute_NSR_minimal_structural_requirements(self) -> None:
-        LR = self._vessel.L
-        B = self._vessel.B
-        T = self._vessel.T
-
-        if self._vessel.vessel_type == "NS1":
-            omega = 1.1
-        else:
-            omega = 1.0
-        
-        L1 = min(LR, 190)
-
-        sigma_o = self._material.minimum_yield_stress
-        sigma_u = self._material.ultimate_tensile_stress
-        kms = 635/(sigma_o + sigma_u)
-
-        kms_root_square = math.sqrt(kms)
-        LR_root_square = math.sqrt(LR)
-
-        bottom_shell_plating = max(kms_root_square*(0.4*LR_root_square + 2.0), 5.0*omega)
-        side_shell_plating = max(kms_root_square*(0.38*LR_root_square + 1.2), 4.0*omega)
-        keel_plate_breadth = max(7*LR + 340, 750)
-        keel_plate_thickness = omega*kms_root_square*1.35*L1**0.45
-
-        inner_bottom_plating = max(kms_root_square*(0.4*LR_root_square + 1.5), 4.0*omega)
-        centerline_girger_plating = max(kms_root_square*(0.9*LR_root_square + 1.0), 4.0*omega)
-        side_girder_plating = max(kms_root_square*0.72*LR_root_square, 3.5*omega)
-        double_bottom_depth = max(28*B + 205*math.sqrt(T), 630.)
-
-        watertight_bulkhead_plating = omega*kms_root_square*(0.38*LR_root_square + 1.0)
-
-        strength_deck_plating = omega*kms_root_square*(0.38*LR_root_square + 1.2)
-        internal_lower_deck_plating = omega*kms_root_square*(0.18*LR_root_square + 1.7)
-        exposed_deck_fwd_0_75LR = omega*kms_root_square*(0.015*LR_root_square + 5.5)
-        exposed_Deck_afr_0_75LR = omega*kms_root_square*(0.38*LR_root_square + 1.2)
-
-        self._minimum_scantling = dict()
-        self._minimum_scantling['Bottom'] = bottom_shell_plating
-        self._minimum_scantling['Keel'] = keel_plate_thickness
-        self._minimum_scantling['Side'] = side_shell_plating
-        self._minimum_scantling['Inner bottom'] = inner_bottom_plating
-        self._minimum_scantling['Strength deck'] = strength_deck_plating
-        self._minimum_scantling['Internal deck'] = internal_lower_deck_plating
\ No newline at end of file
+        minimum_scantling = _compute_cached_NSR_minimal_scantlings(self._vessel,
+                                                                   self._material.minimum_yield_stress,
+                                                                   self._material.ultimate_tensile_stress)
+        self._minimum_scantling = dict(minimum_scantling)
+
+
+@functools.lru_cache(maxsize=256)
+def _compute_cached_NSR_minimal_scantlings(context: ShipContext, sigma_o: float, sigma_u: float) -> dict:
+    """
+        NSR minima are computed once per ship context and material strength
+    """
+    omega = calculate_NSR_omega(context.vessel_type)
+    minimum_scantling = compute_NSR_minimal_scantlings(context.L, context.B, context.T,
+                                                       omega, sigma_o, sigma_u)
+    return {struct_type: float(value) for struct_type, value in minimum_scantling.items()}
+
+
+def compute_primary_member_requirements(design_pressure, spacing, span, f_sigma, f_tau, f_delta,
+                                        sigma_o, E_young, tau_o) -> tuple:
+    """
+        Required section modulus (cm3), second moment (cm4) and web area (cm2)
+        of web frames and girders. spacing and span are in mm, stresses and
+        Young's modulus in N/mm2. Web area is zero where there is no shear factor.
+        The arguments may be numpy arrays
+    """
+    spacing_m = np.asarray(spacing, dtype=float)/1000.
+    span_m = np.asarray(span, dtype=float)/1000.
+    f_tau = np.asarray(f_tau, dtype=float)
+
+    # Primary stiffening
+    phi_z = 1.0/12
+    phi_I = 1.0/384
+    phi_A = 0.5
+
+    Z = (1000*phi_z*design_pressure*spacing_m*span_m**2)/(f_sigma*sigma_o)
+    I = (1e5*phi_I*design_pressure*spacing_m*span_m**3)/(f_delta*E_young)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        Aw = np.where(f_tau > 1e-5, (10*phi_A*design_pressure*spacing_m*span_m)/(f_tau*tau_o), 0.0)
+
+    return Z, I, Aw
+
+
+def calculate_NSR_omega(vessel_type: str) -> float:
+    if vessel_type == "NS1":
+        omega = 1.1
+    else:
+        omega = 1.0
+    return omega
+
+
+def compute_NSR_minimal_scantlings(LR, B, T, omega, sigma_o, sigma_u) -> dict:
+    """
+        Minimum plating thicknesses, in mm, by struct type.
+        The arguments may be numpy arrays, in which case each value of the
+        returned dictionary is an array of their broadcast shape
+    """
+    L1 = np.minimum(LR, 190)
+
+    kms = calculate_kms(sigma_o, sigma_u)
+
+    kms_root_square = np.sqrt(kms)
+    LR_root_square = np.sqrt(LR)
+
+    bottom_shell_plating = np.maximum(kms_root_square*(0.4*LR_root_square + 2.0), 5.0*omega)
+    side_shell_plating = np.maximum(kms_root_square*(0.38*LR_root_square + 1.2), 4.0*omega)
+    keel_plate_breadth = np.maximum(7*LR + 340, 750)
+    keel_plate_thickness = omega*kms_root_square*1.35*L1**0.45
+
+    inner_bottom_plating = np.maximum(kms_root_square*(0.4*LR_root_square + 1.5), 4.0*omega)
+    centerline_girger_plating = np.maximum(kms_root_square*(0.9*LR_root_square + 1.0), 4.0*omega)
+    side_girder_plating = np.maximum(kms_root_square*0.72*LR_root_square, 3.5*omega)
+    double_bottom_depth = np.maximum(28*B + 205*np.sqrt(T), 630.)
+
+    watertight_bulkhead_plating = omega*kms_root_square*(0.38*LR_root_square + 1.0)
+
+    strength_deck_plating = omega*kms_root_square*(0.38*LR_root_square + 1.2)
+    internal_lower_deck_plating = omega*kms_root_square*(0.18*LR_root_square + 1.7)
+    exposed_deck_fwd_0_75LR = omega*kms_root_square*(0.015*LR_root_square + 5.5)
+    exposed_Deck_afr_0_75LR = omega*kms_root_square*(0.38*LR_root_square + 1.2)
+
+    minimum_scantling = dict()
+    minimum_scantling['Bottom'] = bottom_shell_plating
+    minimum_scantling['Keel'] = keel_plate_thickness
+    minimum_scantling['Side'] = side_shell_plating
+    minimum_scantling['Inner bottom'] = inner_bottom_plating
+    minimum_scantling['Strength deck'] = strength_deck_plating
+    minimum_scantling['Internal deck'] = internal_lower_deck_plating
+
+    return minimum_scantling
@@ -2,6 +2,7 @@ import math
 import numpy as np
 
 from material import Material
+from material import MATERIAL_REGISTRY
 from stiffeners import FlatBar
 
 class StructuralElement:
@@ -25,6 +26,12 @@ class StructuralElement:
         self._stiffener_area = 0.0
         self._stiffener_neutral_axis = 0.0
         self._stiffener_second_moment = 0.0
+        self._num_primary_members = 0
+        self._primary_member_spacing = 0.0
+        self._primary_member_span = 0.0
+        self._primary_member_area = 0.0
+        self._primary_member_section_modulus = 0.0
+        self._primary_member_second_moment = 0.0
     
     @property
     def name(self) -> str:
@@ -97,12 +104,20 @@ class StructuralElement:
     def insert_stiffeners(self, stiffener_type: str,
                           stiffener_name: str,
                           spacing: float,
-                          offset: float = 0.0):
+                          offset: float = 0.0,
+                          span: float = None):
+        """
+            span: span of the stiffeners between primary members, in mm.
+            When given, the effective plating accounts for shear lag
+        """
         if stiffener_type == 'FlatBar':
+            self._stiffener_type = stiffener_type
+            self._stiffener_name = stiffener_name
             self._secondary_stiffener = FlatBar(stiffener_name)
             plate_thickness = self.current_thickness
             self._stiffening_spacing = spacing
-            self._secondary_stiffener.calculate_stiffener_section_properties(plate_thickness, spacing)
+            self._stiffener_span = 0.0 if span is None else span
+            self._secondary_stiffener.calculate_stiffener_section_properties(plate_thickness, spacing, span)
             num_stiffeners = math.ceil((self._length - offset)/spacing)
             num_spacings = num_stiffeners - 1
             self._num_secondary_stiffeners = num_stiffeners
@@ -116,38 +131,105 @@ class StructuralElement:
                 error_msg = "Panel too short, stiffeners too spread, or maximum number of stiffeners reached"
                 raise Exception(error_msg)
     
+    def insert_primary_members(self, member_type: str,
+                               member_name: str,
+                               spacing: float,
+                               span: float = None):
+        """
+            Web frames or girders supporting the element.
+            spacing: distance between primary members along the ship, in mm
+            span: unsupported span of the primary members, in mm. Defaults to the element length
+
+            The effective plating is the element plating, reduced for shear lag over the span.
+            Area is the web area in cm2
+        """
+        if member_type == 'FlatBar':
+            if span is None:
+                span = self._length
+            self._primary_member_type = member_type
+            self._primary_member_name = member_name
+            self._primary_member = FlatBar(member_name)
+            self._primary_member.calculate_stiffener_section_properties(self.current_thickness, spacing, span)
+            self._num_primary_members = 1
+            self._primary_member_spacing = spacing
+            self._primary_member_span = span
+            self._primary_member_area = self._primary_member._height*self._primary_member._web_thickness/100.
+            self._primary_member_section_modulus = self._primary_member._total_section_modulus
+            self._primary_member_second_moment = self._primary_member._total_second_area_moment
+
+    def scaled(self, y_factor: float, z_factor: float) -> 'StructuralElement':
+        """
+            New element with the transverse (y) and vertical (z) coordinates scaled.
+            Thickness, material and stiffening (type, spacing and offset) are kept
+        """
+        start_pt = [self._start_point[0]*y_factor, self._start_point[1]*z_factor]
+        end_pt = [self._end_point[0]*y_factor, self._end_point[1]*z_factor]
+        scaled_element = StructuralElement(self._name, self._struct_type, self._material,
+                                           start_pt, end_pt, self._current_thickness)
+        self._copy_stiffening(scaled_element)
+        return scaled_element
+
+    def interpolated(self, other: 'StructuralElement', weight: float,
+                     thickness: float = None) -> 'StructuralElement':
+        """
+            New element with end points (and thickness, unless given) linearly
+            interpolated between this element (weight 0) and other (weight 1).
+            Name, type, material and stiffening are those of this element
+        """
+        start_pt = (1 - weight)*self._start_point + weight*other.start_point
+        end_pt = (1 - weight)*self._end_point + weight*other.end_point
+        if thickness is None:
+            thickness = (1 - weight)*self._current_thickness + weight*other.current_thickness
+        interpolated_element = StructuralElement(self._name, self._struct_type, self._material,
+                                                 start_pt, end_pt, thickness)
+        self._copy_stiffening(interpolated_element)
+        return interpolated_element
+
+    def _copy_stiffening(self, element: 'StructuralElement') -> None:
+        """
+            Inserts the stiffeners and primary members of this element in another one,
+            the primary member span being scaled with the element length
+        """
+        if self._num_secondary_stiffeners != 0:
+            element.insert_stiffeners(self._stiffener_type, self._stiffener_name,
+                                      self._stiffening_spacing, self._offset,
+                                      self._stiffener_span or None)
+        if self._num_primary_members != 0:
+            span_factor = element.length/self._length
+            element.insert_primary_members(self._primary_member_type, self._primary_member_name,
+                                           self._primary_member_spacing,
+                                           self._primary_member_span*span_factor)
+
     def compute_struct_section_properties(self) -> None:
         """
             Panel area is in m2
             Neutral axis of the panel is in m2
 
-            Stiffener area is in m2
-            Neutral axis of the stiffener is in m2
-
-            TODO: compute the second moment of area in a more efficient way
+            Stiffener area is the web area of all the stiffeners, in m2,
+            placed as in compile_stiffener_arrays
         """
         length_m = self._length/1000.
         thickness_m = self.current_thickness/1000.
-        # stiffener_area_m2 = self._stiffener_area/1e4
-        stiffener_area_m2 = 0.0
-        stiffener_neutral_axis_m = self._stiffener_neutral_axis/100.
-        stiffener_second_moment_local_m4 = self._stiffener_second_moment/1e8
+        stiffener_arrays = compile_stiffener_arrays([self])
+        stiffener_area_m2 = stiffener_arrays['area']
+        stiffener_neutral_axis_m = stiffener_arrays['z']
+        stiffener_second_moment_local_m4 = stiffener_arrays['second_moment']
         panel_neutral_axis_m = 0.5*(self._start_point[1] + self._end_point[1])/1000.
 
         panel_area_m2 = thickness_m*length_m
 
-        total_stiffener_area_m2 = self._num_secondary_stiffeners*stiffener_area_m2
+        total_stiffener_area_m2 = np.sum(stiffener_area_m2)
         element_area = panel_area_m2 + total_stiffener_area_m2
 
-        element_first_moment = (panel_area_m2*panel_neutral_axis_m) + (total_stiffener_area_m2*stiffener_neutral_axis_m)
+        element_first_moment = (panel_area_m2*panel_neutral_axis_m) + np.sum(stiffener_area_m2*stiffener_neutral_axis_m)
         element_neutral_axis = element_first_moment/element_area
 
         panel_second_moment_local_m = (1./12)*length_m*thickness_m**3
         panel_steiner_moment = panel_area_m2*(panel_neutral_axis_m - element_neutral_axis)**2
         panel_second_moment_baseline = panel_second_moment_local_m + panel_steiner_moment
 
-        stiffener_steiner_moment = total_stiffener_area_m2*(stiffener_neutral_axis_m - element_neutral_axis)**2
-        stiffener_second_moment_baseline = stiffener_second_moment_local_m4 + stiffener_steiner_moment
+        stiffener_steiner_moment = stiffener_area_m2*(stiffener_neutral_axis_m - element_neutral_axis)**2
+        stiffener_second_moment_baseline = np.sum(stiffener_second_moment_local_m4 + stiffener_steiner_moment)
 
         element_second_moment_baseline = panel_second_moment_baseline + stiffener_second_moment_baseline
 
@@ -167,4 +249,109 @@ class StructuralElement:
         print(self.name)
         print('Neutral axis: {:.3f} m'.format(self._element_neutral_axis))
         print('Area: {:.3f} m2'.format(self._element_area))
-        print('Inertia moment: {:.3e} m4'.format(self._element_second_moment))
\ No newline at end of file
+        print('Inertia moment: {:.3e} m4'.format(self._element_second_moment))
+
+def compile_element_arrays(structure_list: list) -> dict:
+    """
+        Gathers the scalar data of a list of structural elements into numpy arrays,
+        so the scantling and strength calculations can run for all the elements at once.
+
+        Lengths, thicknesses and spacings are in mm
+        Design pressures are in kN/m2
+        Stresses and Young's modulus are in N/mm2
+        material_index is the id of each element material in MATERIAL_REGISTRY,
+        and hts_factor_global/hts_factor_local its f_hts factors
+        Stiffener heights, web thicknesses and spans are in mm (zero span where
+        the fixed effective breadth applies),
+        stiffener areas in cm2 and second moments in cm4 (zero where unstiffened)
+        Primary member spacings and spans are in mm, web areas in cm2,
+        section moduli in cm3 and second moments in cm4 (zero where there are none)
+    """
+    element_arrays = dict()
+    element_arrays['name'] = np.array([struct_i.name for struct_i in structure_list], dtype=object)
+    element_arrays['struct_type'] = np.array([struct_i.struct_type for struct_i in structure_list], dtype=object)
+    element_arrays['start_point'] = np.array([struct_i.start_point for struct_i in structure_list], dtype=float).reshape(-1, 2)
+    element_arrays['end_point'] = np.array([struct_i.end_point for struct_i in structure_list], dtype=float).reshape(-1, 2)
+    element_arrays['length'] = np.array([struct_i.length for struct_i in structure_list], dtype=float)
+    element_arrays['thickness'] = np.array([struct_i.current_thickness for struct_i in structure_list], dtype=float)
+    element_arrays['design_pressure'] = np.array([struct_i.design_pressure for struct_i in structure_list], dtype=float)
+    element_arrays['stiffener_spacing'] = np.array([struct_i.stiffener_spacing for struct_i in structure_list], dtype=float)
+    element_arrays['num_stiffeners'] = np.array([struct_i._num_secondary_stiffeners for struct_i in structure_list], dtype=int)
+
+    # Material constants are gathered from the registry by material id
+    material_index = np.array([struct_i.material.material_id for struct_i in structure_list], dtype=int)
+    material_constants = MATERIAL_REGISTRY.constants
+    element_arrays['material_index'] = material_index
+    for key in ['yield_stress', 'young_modulus', 'shear_strength', 'hts_factor_global', 'hts_factor_local']:
+        element_arrays[key] = material_constants[key][material_index]
+
+    stiffeners = [struct_i._secondary_stiffener if struct_i._num_secondary_stiffeners != 0 else None
+                  for struct_i in structure_list]
+    element_arrays['stiffener_height'] = np.array([0.0 if stiffener is None else stiffener._height
+                                                   for stiffener in stiffeners], dtype=float)
+    element_arrays['stiffener_web_thickness'] = np.array([0.0 if stiffener is None else stiffener._web_thickness
+                                                          for stiffener in stiffeners], dtype=float)
+    element_arrays['stiffener_span'] = np.array([struct_i.stiffener_span for struct_i in structure_list], dtype=float)
+    element_arrays['stiffener_area'] = np.array([struct_i.stiffener_area for struct_i in structure_list], dtype=float)
+    element_arrays['stiffener_second_moment'] = np.array([struct_i.stiffener_second_moment for struct_i in structure_list], dtype=float)
+
+    element_arrays['num_primary_members'] = np.array([struct_i._num_primary_members for struct_i in structure_list], dtype=int)
+    element_arrays['primary_member_spacing'] = np.array([struct_i._primary_member_spacing for struct_i in structure_list], dtype=float)
+    element_arrays['primary_member_span'] = np.array([struct_i._primary_member_span for struct_i in structure_list], dtype=float)
+    element_arrays['primary_member_area'] = np.array([struct_i._primary_member_area for struct_i in structure_list], dtype=float)
+    element_arrays['primary_member_section_modulus'] = np.array([struct_i._primary_member_section_modulus for struct_i in structure_list], dtype=float)
+    element_arrays['primary_member_second_moment'] = np.array([struct_i._primary_member_second_moment for struct_i in structure_list], dtype=float)
+
+    return element_arrays
+
+
+def compile_stiffener_arrays(structure_list: list) -> dict:
+    """
+        One entry per longitudinal stiffener of the elements, placed as in
+        HullCrossSection._draw_secondary_stiffeners: from the start point, offset
+        and spacing along the element, with the web along the normal <-dy, dx>.
+
+        y and z are the web centroid, in m
+        area is the web area, in m2 (the attached plating belongs to the element)
+        second_moment and horizontal_second_moment are the local inertia moments
+        of the web about horizontal and vertical axes through its centroid, in m4
+        element is the position of the stiffened element in structure_list
+    """
+    stiffened = np.array([k for k, struct_i in enumerate(structure_list)
+                          if struct_i._num_secondary_stiffeners != 0], dtype=int)
+    stiffened_list = [structure_list[k] for k in stiffened]
+    counts = np.array([struct_i._num_secondary_stiffeners for struct_i in stiffened_list], dtype=int)
+
+    start_point = np.array([struct_i.start_point for struct_i in stiffened_list], dtype=float).reshape(-1, 2)
+    end_point = np.array([struct_i.end_point for struct_i in stiffened_list], dtype=float).reshape(-1, 2)
+    length = np.array([struct_i.length for struct_i in stiffened_list], dtype=float)
+    offset = np.array([struct_i._offset for struct_i in stiffened_list], dtype=float)
+    spacing = np.array([struct_i.stiffener_spacing for struct_i in stiffened_list], dtype=float)
+    plate_thickness = np.array([struct_i.current_thickness for struct_i in stiffened_list], dtype=float)
+    height = np.array([struct_i._secondary_stiffener._height for struct_i in stiffened_list], dtype=float)
+    web_thickness = np.array([struct_i._secondary_stiffener._web_thickness for struct_i in stiffened_list], dtype=float)
+
+    direction_vector = (end_point - start_point)/length[:, np.newaxis]
+    normal_vector = np.stack([-direction_vector[:, 1], direction_vector[:, 0]], axis=-1)
+
+    # Position of each stiffener within its element
+    index = np.repeat(np.arange(stiffened.size), counts)
+    position = np.arange(index.size) - np.repeat(np.cumsum(counts) - counts, counts)
+    distance = offset[index] + position*spacing[index]
+    centroid = (start_point[index] + distance[:, np.newaxis]*direction_vector[index]
+                + (0.5*(plate_thickness + height))[index, np.newaxis]*normal_vector[index])
+
+    # Web inertia about its own axes, rotated to the section axes
+    inertia_along_web = web_thickness*height**3/12.
+    inertia_across_web = height*web_thickness**3/12.
+    second_moment = inertia_along_web*normal_vector[:, 1]**2 + inertia_across_web*normal_vector[:, 0]**2
+    horizontal_second_moment = inertia_along_web*normal_vector[:, 0]**2 + inertia_across_web*normal_vector[:, 1]**2
+
+    stiffener_arrays = dict()
+    stiffener_arrays['y'] = centroid[:, 0]/1000.
+    stiffener_arrays['z'] = centroid[:, 1]/1000.
+    stiffener_arrays['area'] = (height*web_thickness)[index]/1e6
+    stiffener_arrays['second_moment'] = second_moment[index]/1e12
+    stiffener_arrays['horizontal_second_moment'] = horizontal_second_moment[index]/1e12
+    stiffener_arrays['element'] = stiffened[index]
+    return stiffener_arrays
@@ -0,0 +1,286 @@
+import math
+import time
+import numpy as np
+import pandas as pd
+
+from hull_cross_section import HullCrossSection
+from hull_cross_section import calculate_flange_bays
+from material import export_a131_material
+from ship import create_vessel
+from stiffeners import compute_flat_bar_effective_section_properties
+from structural_element import StructuralElement
+from structural_element import compile_element_arrays
+
+
+class UltimateStrength:
+    def __init__(self, hull_cs: HullCrossSection, max_plate_width: float = 500.,
+                 num_steps: int = 200, max_curvature_ratio: float = 4.0) -> None:
+        """
+        Ultimate hull girder bending capacity by the incremental-iterative (Smith) method
+
+        Variables
+        ----------
+
+        * hull_cs: hull cross section (half section, mirrored about the centreline)
+        * max_plate_width: width, in mm, of the strips unstiffened plating is divided into
+        * num_steps: number of curvature increments
+        * max_curvature_ratio: last curvature, as a multiple of the first-yield curvature
+
+        Each stiffener with its attached plating is one element, and unstiffened
+        plating is divided into strips. The load-shortening curves follow IACS UR S11A:
+        elasto-plastic in tension, plate buckling with a strain dependent slenderness
+        for the strips, and beam-column buckling with the Johnson-Ostenfeld correction
+        and effective plating for the stiffened elements.
+        The slenderness of a strip uses the breadth of its plating bay between
+        supports (see calculate_flange_bays), not the length of the whole element.
+        The stiffener span is the transverse span of the vessel
+        """
+        self._hull_cs = hull_cs
+        self._max_plate_width = max_plate_width
+        self._num_steps = num_steps
+        self._max_curvature_ratio = max_curvature_ratio
+        self._elements = self._discretise_section()
+
+    @property
+    def elements(self) -> dict:
+        return self._elements
+
+    def _discretise_section(self) -> dict:
+        """
+            Arrays with one value per Smith element: height z (m), area (m2, both sides),
+            yield stress and Young's modulus (N/mm2), yield strain, plate slenderness
+            s/t*sqrt(yield strain), share of the area in the stiffener web,
+            Euler column stress (N/mm2) and a stiffened mask
+        """
+        span_m = self._hull_cs.vessel.transverse_span/1000.
+        element_arrays = compile_element_arrays(self._hull_cs.structure_list)
+        piece_element, piece_length, piece_breadth = calculate_flange_bays(element_arrays['start_point'],
+                                                                           element_arrays['end_point'],
+                                                                           element_arrays['num_stiffeners'] == 0)
+        z, area, s_over_t, stiffener_area, sigma_E1, stiffened = [], [], [], [], [], []
+        yield_stress, young_modulus = [], []
+
+        for k, struct_i in enumerate(self._hull_cs.structure_list):
+            start_pt = struct_i.start_point
+            direction_vector = struct_i.end_point - struct_i.start_point
+            length = struct_i.length
+            t = struct_i.current_thickness
+
+            if struct_i._num_secondary_stiffeners != 0:
+                num_elements = struct_i._num_secondary_stiffeners
+                spacing = struct_i.stiffener_spacing
+                distance = struct_i._offset + spacing*np.arange(num_elements)
+                normal_z = direction_vector[0]/length
+                plate_width = length/num_elements
+                height = struct_i._secondary_stiffener._height
+                web_thickness = struct_i._secondary_stiffener._web_thickness
+
+                z_plate = start_pt[1] + (distance/length)*direction_vector[1]
+                z_web = z_plate + normal_z*0.5*(t + height)
+                plate_area = plate_width*t
+                web_area = height*web_thickness
+                z_element = (plate_area*z_plate + web_area*z_web)/(plate_area + web_area)
+
+                section_properties = compute_flat_bar_effective_section_properties(height, web_thickness, t, spacing,
+                                                                                   struct_i.stiffener_span)
+                euler_stress = (math.pi**2)*1e-4*(struct_i.material.young_modulus/1e6)*section_properties[3]/(section_properties[1]*span_m**2)
+
+                z.extend(z_element)
+                area.extend(np.full(num_elements, plate_area + web_area))
+                s_over_t.extend(np.full(num_elements, spacing/t))
+                stiffener_area.extend(np.full(num_elements, web_area/100.))
+                sigma_E1.extend(np.full(num_elements, euler_stress))
+                stiffened.extend(np.full(num_elements, True))
+            else:
+                num_elements = max(math.ceil(length/self._max_plate_width), 1)
+                strip_centre = (np.arange(num_elements) + 0.5)/num_elements
+                z.extend(start_pt[1] + strip_centre*direction_vector[1])
+                area.extend(np.full(num_elements, length*t/num_elements))
+                piece_end = np.cumsum(piece_length[piece_element == k])
+                strip_piece = np.minimum(np.searchsorted(piece_end, strip_centre*length), piece_end.shape[0] - 1)
+                s_over_t.extend(piece_breadth[piece_element == k][strip_piece]/t)
+                stiffener_area.extend(np.zeros(num_elements))
+                sigma_E1.extend(np.full(num_elements, np.inf))
+                stiffened.extend(np.full(num_elements, False))
+
+            yield_stress.extend(np.full(num_elements, struct_i.material.minimum_yield_stress))
+            young_modulus.extend(np.full(num_elements, struct_i.material.young_modulus/1e6))
+
+        # Stiffened elements first, so each load-shortening curve works on a contiguous slice
+        order = np.argsort(~np.array(stiffened, dtype=bool), kind='stable')
+        yield_stress = np.array(yield_stress)[order]
+        young_modulus = np.array(young_modulus)[order]
+        sigma_E1 = np.array(sigma_E1)[order]
+        yield_strain = yield_stress/young_modulus
+        elements = dict(z=np.array(z)[order]/1000.,
+                        area=2.0*np.array(area)[order]/1e6,
+                        yield_stress=yield_stress,
+                        young_modulus=young_modulus,
+                        yield_strain=yield_strain,
+                        slenderness=np.array(s_over_t)[order]*np.sqrt(yield_strain),
+                        stiffener_area_ratio=(np.array(stiffener_area)*100./np.array(area))[order],
+                        sigma_E1=sigma_E1,
+                        stiffened=np.array(stiffened, dtype=bool)[order],
+                        num_stiffened=int(np.count_nonzero(stiffened)))
+        return elements
+
+    def _calculate_first_yield_curvature(self) -> float:
+        """
+            Curvature, in 1/m, at which the furthest element from the elastic neutral axis yields
+        """
+        elements = self._elements
+        z_na = np.sum(elements['area']*elements['z'])/np.sum(elements['area'])
+        c = np.max(np.abs(elements['z'] - z_na))
+        yield_strain = np.min(elements['yield_stress']/elements['young_modulus'])
+        return yield_strain/c
+
+    def _find_neutral_axis(self, curvature: np.ndarray, tolerance: float = 1e-9,
+                           max_iterations: int = 50) -> np.ndarray:
+        """
+            Neutral axis height, in m, giving zero axial force at each curvature.
+            Regula falsi (Illinois variant) run for all the curvature steps at once;
+            the axial force is scaled by the full plastic force for the tolerance
+        """
+        elements = self._elements
+        direction = np.sign(curvature)
+        plastic_force = np.sum(elements['yield_stress']*elements['area'])
+
+        # With a hogging curvature, raising the neutral axis reduces the axial force
+        z_a = np.full(curvature.shape, elements['z'].min())
+        z_b = np.full(curvature.shape, elements['z'].max())
+        g_a = direction*self._calculate_axial_force(curvature, z_a)/plastic_force
+        g_b = direction*self._calculate_axial_force(curvature, z_b)/plastic_force
+
+        for _ in range(max_iterations):
+            z_c = z_b - g_b*(z_b - z_a)/(g_b - g_a)
+            g_c = direction*self._calculate_axial_force(curvature, z_c)/plastic_force
+            same_side = np.sign(g_c) == np.sign(g_b)
+            z_a = np.where(same_side, z_a, z_b)
+            g_a = np.where(same_side, 0.5*g_a, g_b)
+            z_b, g_b = z_c, g_c
+            if np.max(np.abs(g_c)) < tolerance:
+                break
+
+        return z_b
+
+    def _calculate_strain(self, curvature: np.ndarray, z_na: np.ndarray) -> np.ndarray:
+        return curvature[:, np.newaxis]*(self._elements['z'] - z_na[:, np.newaxis])
+
+    def _calculate_axial_force(self, curvature: np.ndarray, z_na: np.ndarray) -> np.ndarray:
+        stress = calculate_load_shortening_stress(self._calculate_strain(curvature, z_na), self._elements)
+        return stress @ self._elements['area']
+
+    def calculate_moment_curvature(self, sense: str = 'hogging') -> dict:
+        """
+            Moment-curvature curve for 'hogging' or 'sagging'.
+            Curvatures are in 1/m, moments in kN.m and neutral axes in m.
+            Sagging curvatures and moments are negative
+        """
+        sign = 1.0 if sense == 'hogging' else -1.0
+        curvature_y = self._calculate_first_yield_curvature()
+        curvature = sign*np.linspace(0.0, self._max_curvature_ratio*curvature_y, self._num_steps + 1)[1:]
+
+        z_na = self._find_neutral_axis(curvature)
+        strain = self._calculate_strain(curvature, z_na)
+        stress = calculate_load_shortening_stress(strain, self._elements)
+        lever_arm = self._elements['z'] - z_na[:, np.newaxis]
+        moment = 1000.*np.sum(stress*self._elements['area']*lever_arm, axis=1)
+
+        ultimate_index = np.argmax(sign*moment)
+        moment_curvature = dict(curvature=curvature, moment=moment, neutral_axis=z_na,
+                                ultimate_moment=moment[ultimate_index],
+                                ultimate_curvature=curvature[ultimate_index])
+        return moment_curvature
+
+    def run(self) -> dict:
+        self._results = dict(hogging=self.calculate_moment_curvature('hogging'),
+                             sagging=self.calculate_moment_curvature('sagging'))
+        return self._results
+
+    def print_ultimate_strength_info(self) -> None:
+        hogging = self._results['hogging']
+        sagging = self._results['sagging']
+        print("=================================")
+        print('Number of elements: {:d}'.format(self._elements['z'].shape[0]))
+        print('Ultimate hogging moment: {:.3f} kN.m'.format(hogging['ultimate_moment']))
+        print('Ultimate sagging moment: {:.3f} kN.m'.format(sagging['ultimate_moment']))
+        print("=================================")
+        curves = pd.DataFrame(data={'Hogging curvature [1/m]': hogging['curvature'],
+                                    'Hogging moment [kN.m]': hogging['moment'],
+                                    'Sagging curvature [1/m]': sagging['curvature'],
+                                    'Sagging moment [kN.m]': sagging['moment']})
+        print(curves.iloc[::max(len(curves)//10, 1)])
+
+
+def calculate_load_shortening_stress(strain: np.ndarray, elements: dict) -> np.ndarray:
+    """
+        Stress, in N/mm2, of each Smith element at the given strains (tension positive).
+        strain has shape (num_steps, num_elements), with the stiffened elements first
+    """
+    yield_stress = elements['yield_stress']
+    relative_strain = strain/elements['yield_strain']
+
+    # Compression
+    epsilon = np.maximum(-relative_strain, 1e-12)
+    beta_E = elements['slenderness']*np.sqrt(epsilon)
+    compressive_stress = np.empty_like(strain)
+    n = elements['num_stiffened']
+
+    # Stiffened plating: beam-column buckling with effective plating
+    sigma_E1 = elements['sigma_E1'][:n]
+    yield_stress_s = yield_stress[:n]
+    epsilon_s = epsilon[:, :n]
+    sigma_C1 = np.where(sigma_E1 <= 0.5*yield_stress_s*epsilon_s,
+                        sigma_E1/epsilon_s,
+                        yield_stress_s*(1.0 - np.minimum(epsilon_s, 1.0)*epsilon_s*yield_stress_s/(4.0*sigma_E1)))
+    effective_width_ratio = 1.0/np.maximum(beta_E[:, :n], 1.0)
+    stiffener_area_ratio = elements['stiffener_area_ratio'][:n]
+    compressive_stress[:, :n] = sigma_C1*(stiffener_area_ratio + (1.0 - stiffener_area_ratio)*effective_width_ratio)
+
+    # Unstiffened plating: plate buckling
+    inverse_beta_E = 1.0/np.maximum(beta_E[:, n:], 1.25)
+    compressive_stress[:, n:] = inverse_beta_E*(2.25 - 1.25*inverse_beta_E)*yield_stress[n:]
+
+    phi = np.clip(relative_strain, -1.0, 1.0)
+    stress = np.where(relative_strain >= 0.0, yield_stress, compressive_stress)*phi
+    return stress
+
+
+def test():
+    mat_a131 = export_a131_material()
+    vessel = create_vessel()
+
+    struct_0 = StructuralElement('Keel plating', 'Keel', mat_a131, [0.0, 0.0], [500.0, 0.0], 13.)
+    struct_1 = StructuralElement('Bottom shell plating', 'Bottom', mat_a131, [500.0, 0.0], [3000.0, 1500.0], 8.)
+    struct_1.insert_stiffeners('FlatBar', '160x7', 500, offset=400.)
+    struct_2 = StructuralElement('Side shell plating', 'Side', mat_a131, [3000.0, 1500.0], [10000.0, 8000.0], 6.)
+    struct_2.insert_stiffeners('FlatBar', '140x6', 500, offset=400.)
+    struct_3 = StructuralElement('Upper deck', 'Strength deck', mat_a131, [0.0, 8000.0], [10000.0, 8000.0], 7.)
+    struct_3.insert_stiffeners('FlatBar', '120x5', 500)
+    structure_list = [struct_0, struct_1, struct_2, struct_3]
+
+    long_pos = 60.
+    hull_cs = HullCrossSection(structure_list, long_pos, mat_a131, vessel)
+
+    ultimate_strength = UltimateStrength(hull_cs)
+    ultimate_strength.run()
+    ultimate_strength.print_ultimate_strength_info()
+
+    # Same section with about 2000 Smith elements
+    fine_struct_1 = StructuralElement('Bottom shell plating', 'Bottom', mat_a131, [500.0, 0.0], [3000.0, 1500.0], 8.)
+    fine_struct_1.insert_stiffeners('FlatBar', '160x7', 5, offset=4.)
+    fine_struct_2 = StructuralElement('Side shell plating', 'Side', mat_a131, [3000.0, 1500.0], [10000.0, 8000.0], 6.)
+    fine_struct_2.insert_stiffeners('FlatBar', '140x6', 10, offset=4.)
+    fine_struct_3 = StructuralElement('Upper deck', 'Strength deck', mat_a131, [0.0, 8000.0], [10000.0, 8000.0], 7.)
+    fine_struct_3.insert_stiffeners('FlatBar', '120x5', 20)
+    fine_hull_cs = HullCrossSection([struct_0, fine_struct_1, fine_struct_2, fine_struct_3], long_pos, mat_a131, vessel)
+
+    start_time = time.perf_counter()
+    fine_ultimate_strength = UltimateStrength(fine_hull_cs)
+    fine_ultimate_strength.run()
+    elapsed_time = time.perf_counter() - start_time
+    print('{:d} elements solved in {:.3f} s'.format(fine_ultimate_strength.elements['z'].shape[0], elapsed_time))
+
+
+if __name__ == '__main__':
+    test()
@@ -1,5 +1,6 @@
 import numpy as np
 import matplotlib.pyplot as plt
+from matplotlib.patches import Wedge
 
 import os
 import sys
@@ -167,6 +168,279 @@ class Rectangle:
         self.position = rotated_point + rotation_point
         #return self.position, self.angle
 
+    def transform(self, transform):
+        """apply an affine transform to the rectangle"""
+        self.position = transform.apply_to_points(self.position)
+        self.angle = transform.apply_to_angles(self.angle)
+
+
+
+class ReadOnlyRectangle(Rectangle):
+    """Rectangle of a read-only geometry, see RectanglesBasedGeometry.freeze"""
+    def __setattr__(self, name, value):
+        raise AttributeError('read-only rectangle cannot be modified')
+
+
+class Arc:
+    def __init__(self, radius, thickness, center, start_angle, sweep_angle):
+        """This class represents a circular arc of constant thickness (an annular sector), which is
+        defined by its mid-thickness radius, its center and its angular extent. Its section properties
+        are computed in closed form, and it can replace a rectangle in a rectangles based geometry
+
+        Args:
+            radius (float): radius of the mid-thickness line
+            thickness (float): thickness, centered on the mid-thickness line
+            center (array-like): center with respect to the universal axis
+            start_angle (float): polar angle of the start point, in degrees
+            sweep_angle (float): angular extent in degrees, positive counterclockwise
+        """
+        self.radius = radius
+        self.thickness = thickness
+        self.center = np.array(center, dtype=float)
+        self.start_angle = start_angle
+        self.sweep_angle = sweep_angle
+
+    @property
+    def _limits(self):
+        # inner and outer radii, and polar angles (radians) bounding the arc in increasing order
+        start = np.radians(self.start_angle)
+        end = np.radians(self.start_angle + self.sweep_angle)
+        return self.radius - 0.5*self.thickness, self.radius + 0.5*self.thickness, min(start, end), max(start, end)
+
+    @property
+    def area(self):
+        """Area of the arc"""
+        return abs(np.radians(self.sweep_angle))*self.radius*self.thickness
+
+    @property
+    def _moments_wrt_center(self):
+        # first and second moments of area about the center, (x, y) and (xx, yy, xy)
+        r_i, r_o, phi_a, phi_b = self._limits
+        k3, k4 = (r_o**3 - r_i**3)/3, (r_o**4 - r_i**4)/4
+        Sx = k3*(np.sin(phi_b) - np.sin(phi_a))
+        Sy = k3*(np.cos(phi_a) - np.cos(phi_b))
+        Ixx = k4*(0.5*(phi_b - phi_a) + 0.25*(np.sin(2*phi_b) - np.sin(2*phi_a)))
+        Iyy = k4*(0.5*(phi_b - phi_a) - 0.25*(np.sin(2*phi_b) - np.sin(2*phi_a)))
+        Ixy = k4*0.5*(np.sin(phi_b)**2 - np.sin(phi_a)**2)
+        return Sx, Sy, Ixx, Iyy, Ixy
+
+    @property
+    def centroid(self):
+        """Centroid of the arc"""
+        Sx, Sy, _, _, _ = self._moments_wrt_center
+        return self.center + np.array([Sx, Sy])/self.area
+
+    @property
+    def inertia(self):
+        """Moments of inertia of the arc, with respect to axes parallel to the cartesian axes,
+        centered on the centroid
+        """
+        area = self.area
+        Sx, Sy, Ixx, Iyy, Ixy = self._moments_wrt_center
+        cx, cy = Sx/area, Sy/area
+        Iyp = Iyy - area*cy*cy
+        Izp = Ixx - area*cx*cx
+        Iyzp = Ixy - area*cx*cy
+        return dict(Iy=Iyp, Iz=Izp, Ix=Iyp + Izp, Iyz=Iyzp, Iyp=Iyp, Izp=Izp, Iyzp=Iyzp)
+
+    def compute_inertia_wrt_parallel_axes(self, axes_center):
+        I = self.inertia
+        area = self.area
+        d = axes_center - self.centroid
+        dy, dz = d[0], d[1]
+        Iya = I['Iyp'] + dz*dz*area
+        Iza = I['Izp'] + dy*dy*area
+        Ixa = I['Ix'] + (dz*dz + dy*dy)*area
+        Iyza = I['Iyzp'] + dy*dz*area
+        return dict(Iya=Iya, Iza=Iza, Ixa=Ixa, Iyza=Iyza)
+
+    @property
+    def section_arrays(self):
+        """section properties as a single part, see compute_rectangles_section_arrays"""
+        I = self.inertia
+        return dict(area=np.array([self.area]), centroid=self.centroid.reshape(1, 2),
+                    Iyp=np.array([I['Iyp']]), Izp=np.array([I['Izp']]), Iyzp=np.array([I['Iyzp']]))
+
+    @property
+    def bounding_box(self):
+        """bounding box of the arc, from its end points and the extreme points of the outer edge"""
+        r_i, r_o, phi_a, phi_b = self._limits
+        phis = [phi_a, phi_b, phi_a, phi_b]
+        radii = [r_i, r_i, r_o, r_o]
+        for k in range(int(np.ceil(phi_a/(0.5*np.pi))), int(np.floor(phi_b/(0.5*np.pi))) + 1):
+            phis.append(0.5*np.pi*k)
+            radii.append(r_o)
+        xs = self.center[0] + np.array(radii)*np.cos(phis)
+        ys = self.center[1] + np.array(radii)*np.sin(phis)
+        return xs.min(), xs.max(), ys.min(), ys.max()
+
+    def patch(self, edgecolor='gray', facecolor='silver', fill=True, line_width=1.5):
+        _, r_o, phi_a, phi_b = self._limits
+        return Wedge(center=(self.center[0], self.center[1]), r=r_o,
+                     theta1=np.degrees(phi_a), theta2=np.degrees(phi_b), width=self.thickness,
+                     edgecolor=edgecolor, facecolor=facecolor, fill=fill, lw=line_width)
+
+    def __repr__(self):
+        class_name = type(self).__name__
+        return f"{class_name}(radius={self.radius}, thickness={self.thickness}, center={self.center}, start_angle(deg)={self.start_angle}, sweep_angle(deg)={self.sweep_angle})"
+
+    def __str__(self) -> str:
+        return f"Arc of radius {self.radius} and thickness {self.thickness}, centered at {self.center}, from {self.start_angle} degrees sweeping {self.sweep_angle} degrees"
+
+    def transform(self, transform):
+        """apply an affine transform to the arc, the start point remaining the start point"""
+        self.center = transform.apply_to_points(self.center)
+        self.start_angle = transform.apply_to_angles(self.start_angle)
+        if transform.reflection:
+            self.sweep_angle = -self.sweep_angle
+
+    def move(self, displacement):
+        """move the arc"""
+        self.transform(AffineTransform.translation(displacement))
+
+    def rotate(self, rotation_point, angle):
+        """rotate the arc"""
+        self.transform(AffineTransform.rotation(angle, rotation_point))
+
+
+class AffineTransform:
+    def __init__(self, matrix=None, angle=0, reflection=False):
+        """Affine transform of the plane, stored as a 3x3 matrix acting on homogeneous coordinates,
+        together with the change it gives to orientations: an angle becomes angle + self.angle,
+        or self.angle - angle for reflections. Transforms are composed with @, (t2 @ t1) applies
+        t1 first and then t2, so that any sequence of moves, rotations and mirrorings is applied
+        to the positions and angles of a geometry in a single operation
+
+        Args:
+            matrix (array-like): 3x3 matrix, identity by default
+            angle (float): rotation of orientations, in degrees
+            reflection (bool): True if the transform reverses orientations
+        """
+        self.matrix = np.eye(3) if matrix is None else np.array(matrix, dtype=float)
+        self.angle = angle
+        self.reflection = reflection
+
+    @classmethod
+    def translation(cls, displacement):
+        matrix = np.eye(3)
+        matrix[:2, 2] = displacement
+        return cls(matrix)
+
+    @classmethod
+    def rotation(cls, angle, rotation_point=(0.0, 0.0)):
+        """rotation by angle degrees, positive counterclockwise, about the rotation point"""
+        theta = np.radians(angle)
+        matrix = np.eye(3)
+        matrix[:2, :2] = [[np.cos(theta), -np.sin(theta)], [np.sin(theta), np.cos(theta)]]
+        rotation_point = np.array(rotation_point, dtype=float)
+        matrix[:2, 2] = rotation_point - matrix[:2, :2].dot(rotation_point)
+        return cls(matrix, angle)
+
+    @classmethod
+    def mirror(cls, axis_point, axis_angle):
+        """reflection about the line through axis_point with the given angle in degrees,
+        e.g. mirror([0, 0], 90) mirrors about the vertical axis
+        """
+        theta = np.radians(2*axis_angle)
+        matrix = np.eye(3)
+        matrix[:2, :2] = [[np.cos(theta), np.sin(theta)], [np.sin(theta), -np.cos(theta)]]
+        axis_point = np.array(axis_point, dtype=float)
+        matrix[:2, 2] = axis_point - matrix[:2, :2].dot(axis_point)
+        return cls(matrix, 2*axis_angle, reflection=True)
+
+    def __matmul__(self, other):
+        sign = -1 if self.reflection else 1
+        return AffineTransform(self.matrix.dot(other.matrix), self.angle + sign*other.angle,
+                               self.reflection != other.reflection)
+
+    def then(self, other):
+        """transform applying this one first and then the other"""
+        return other @ self
+
+    def apply_to_points(self, points):
+        points = np.asarray(points, dtype=float)
+        return points.dot(self.matrix[:2, :2].T) + self.matrix[:2, 2]
+
+    def apply_to_angles(self, angles):
+        if self.reflection:
+            return self.angle - angles
+        return angles + self.angle
+
+    def __repr__(self):
+        return f"AffineTransform(matrix={self.matrix.tolist()}, angle={self.angle}, reflection={self.reflection})"
+
+
+def compute_rectangles_section_arrays(width, height, position, angle):
+    """Vectorised counterpart of Rectangle.area, centroid and inertia, for many rectangles at once
+
+    Args:
+        width, height, angle (array-like): one value per rectangle, angles in degrees
+        position (array-like): n x 2 reference points
+
+    Returns a dict of arrays: area, centroid (n x 2) and the centroidal moments of inertia
+    Iyp, Izp, Iyzp with respect to axes parallel to the cartesian axes
+    """
+    width = np.asarray(width, dtype=float)
+    height = np.asarray(height, dtype=float)
+    position = np.asarray(position, dtype=float).reshape(-1, 2)
+    theta = np.radians(np.asarray(angle, dtype=float))
+    unit_direction = np.stack([np.cos(theta), np.sin(theta)], axis=-1)
+
+    Iy = (width*height**3)/12
+    Iz = (height*width**3)/12
+    Iyp = 0.5*(Iy + Iz) + 0.5*(Iy - Iz)*np.cos(-2*theta)
+    Izp = 0.5*(Iy + Iz) - 0.5*(Iy - Iz)*np.cos(-2*theta)
+    Iyzp = 0.5*(Iy - Iz)*np.sin(-2*theta)
+    return dict(area=width*height, centroid=position + unit_direction*(0.5*width)[:, np.newaxis],
+                Iyp=Iyp, Izp=Izp, Iyzp=Iyzp)
+
+
+def is_integer(value):
+    # angles are printed as they were given, integers or floats
+    return isinstance(value, (int, np.integer))
+
+
+def compute_rectangles_bounding_boxes(width, height, position, angle):
+    """bounding boxes of many rectangles, from their corner points, as an n x 4 array
+    of (min_x, max_x, min_y, max_y) rows
+    """
+    width = np.asarray(width, dtype=float).reshape(-1, 1)
+    height = np.asarray(height, dtype=float).reshape(-1, 1)
+    position = np.asarray(position, dtype=float).reshape(-1, 2)
+    theta = np.radians(np.asarray(angle, dtype=float)).ravel()
+    unit_direction = np.stack([np.cos(theta), np.sin(theta)], axis=-1)
+    unit_normal = np.stack([-np.sin(theta), np.cos(theta)], axis=-1)
+
+    upper_left = position + 0.5*height*unit_normal
+    lower_left = position - 0.5*height*unit_normal
+    corners = np.stack([upper_left, lower_left,
+                        lower_left + width*unit_direction, upper_left + width*unit_direction])
+    min_xy, max_xy = corners.min(axis=0), corners.max(axis=0)
+    return np.column_stack([min_xy[:, 0], max_xy[:, 0], min_xy[:, 1], max_xy[:, 1]])
+
+
+def combine_section_arrays(section_arrays, axes_center=None):
+    """Area, centroid and moments of inertia of a set of parts given by their section arrays
+    (see compute_rectangles_section_arrays), with respect to axes parallel to the cartesian
+    axes centered on axes_center, or on the centroid of the set when it is not given
+    """
+    area = np.concatenate([arrays['area'] for arrays in section_arrays])
+    centroids = np.concatenate([arrays['centroid'] for arrays in section_arrays]).reshape(-1, 2)
+    total_area = area.sum()
+    centroid = (area[:, np.newaxis]*centroids).sum(axis=0)/total_area
+    if axes_center is None:
+        axes_center = centroid
+    d = np.asarray(axes_center, dtype=float) - centroids
+    dy, dz = d[:, 0], d[:, 1]
+    Iyp = np.concatenate([arrays['Iyp'] for arrays in section_arrays])
+    Izp = np.concatenate([arrays['Izp'] for arrays in section_arrays])
+    Iyzp = np.concatenate([arrays['Iyzp'] for arrays in section_arrays])
+    Iy = np.sum(Iyp + dz*dz*area)
+    Iz = np.sum(Izp + dy*dy*area)
+    Ix = np.sum(Iyp + Izp + (dz*dz + dy*dy)*area)
+    Iyz = np.sum(Iyzp + dy*dz*area)
+    return dict(area=total_area, centroid=centroid, inertia=dict(Iy=Iy, Iz=Iz, Ix=Ix, Iyz=Iyz))
+
         
 class RectanglesBasedGeometry:
     """This class is used to represent a single geometry compound of rectangles
@@ -174,6 +448,20 @@ class RectanglesBasedGeometry:
     def __init__(self, rectangles):
         self.components = rectangles
 
+    def __setattr__(self, name, value):
+        if self.__dict__.get('_read_only', False):
+            raise AttributeError(f'read-only {type(self).__name__} cannot be modified')
+        super().__setattr__(name, value)
+
+    def freeze(self):
+        """makes the geometry and its rectangles read-only, any later change raises an error"""
+        for rect in self.components:
+            if isinstance(rect, Rectangle):
+                rect.angle = rect.angle % 360
+                rect.position.setflags(write=False)
+                rect.__class__ = ReadOnlyRectangle
+        object.__setattr__(self, '_read_only', True)
+
     @property
     def area(self):
         a = 0.0
@@ -203,6 +491,19 @@ class RectanglesBasedGeometry:
             Iyz += Irect['Iyza']
         return dict(Iy=Iy, Iz=Iz, Ix=Ix, Iyz=Iyz)
 
+    @property
+    def rectangle_arrays(self):
+        """width, height, position (n x 2) and angle of the rectangles, as arrays"""
+        return dict(width=np.array([rect.width for rect in self.components], dtype=float),
+                    height=np.array([rect.height for rect in self.components], dtype=float),
+                    position=np.array([rect.position for rect in self.components], dtype=float).reshape(-1, 2),
+                    angle=np.array([rect.angle for rect in self.components], dtype=float))
+
+    @property
+    def section_arrays(self):
+        """area, centroid and centroidal inertia of each part, see compute_rectangles_section_arrays"""
+        return compute_rectangles_section_arrays(**self.rectangle_arrays)
+
     def compute_inertia_wrt_paralell_axes(self, axes_center):
         # area inertia with respect to parallel axes of the compound geometry
         Iy, Iz, Ix, Iyz = 0.0, 0.0, 0.0, 0.0
@@ -232,15 +533,8 @@ class RectanglesBasedGeometry:
 
     @property
     def bounding_box(self):
-        xs, ys = [], []
-        for rect in self.components:
-            min_x, max_x, min_y, max_y = rect.bounding_box
-            xs.append(min_x)
-            xs.append(max_x)
-            ys.append(min_y)
-            ys.append(max_y)
-        min_x, max_x, min_y, max_y = min(xs), max(xs), min(ys), max(ys)
-        return min_x, max_x, min_y, max_y
+        boxes = compute_rectangles_bounding_boxes(**self.rectangle_arrays)
+        return boxes[:, 0].min(), boxes[:, 1].max(), boxes[:, 2].min(), boxes[:, 3].max()
                     
     def plot(self, edgecolor='gray', facecolor='silver', fill=True, line_width=1.5, zoom_factor=10):    
         fig = plt.gcf()
@@ -260,61 +554,50 @@ class RectanglesBasedGeometry:
         ax.set_aspect('equal', adjustable='box')
         plt.show()
 
+    def transform(self, transform):
+        """apply an affine transform to all the rectangles, positions and angles being transformed at once"""
+        arrays = self.rectangle_arrays
+        self._update_rectangles(transform.apply_to_points(arrays['position']),
+                                transform.apply_to_angles(arrays['angle']), transform)
+
+    def _update_rectangles(self, positions, angles, transform):
+        # stores the transformed positions and angles of the rectangles, the subclasses
+        # keeping their own definition (position, angle...) in step with them
+        keep_integers = is_integer(transform.angle)
+        for rect, position, angle in zip(self.components, positions, angles.tolist()):
+            rect.position = position
+            rect.angle = int(angle) if keep_integers and is_integer(rect.angle) else angle
+
     def move(self, displacement):
-        for rect in self.components:
-            rect.move(displacement)
+        self.transform(AffineTransform.translation(displacement))
 
     def rotate(self, rotation_point, angle):
-        for rect in self.components:
-            rect.rotate(rotation_point, angle)
+        self.transform(AffineTransform.rotation(angle, rotation_point))
 
 
 class RectanglesBasedGeometries:
     def __init__(self, geometries) -> None:
         self.geometries = geometries
 
+    def _combine(self, axes_center=None):
+        # the parts of every geometry are gathered as arrays and summed at once
+        return combine_section_arrays([geometry.section_arrays for geometry in self.geometries], axes_center)
+
     @property
     def area(self):
-        a = 0.0
-        for geometry in self.geometries:
-            for rect in geometry.components:
-                a += rect.area
-        return a
+        return self._combine()['area']
 
     @property
     def centroid(self):
-        a = 0.0
-        c = np.array([0.0, 0.0])
-        for geometry in self.geometries:
-            for rect in geometry.components:
-                a += rect.area
-                c += rect.centroid * rect.area
-        return c/a
+        return self._combine()['centroid']
 
     @property
     def inertia(self):
     # area inertia with respect to centroid axes of the set of geometries
-        centroid = self.centroid
-        Iy, Iz, Ix, Iyz = 0.0, 0.0, 0.0, 0.0
-        for geometry in self.geometries:
-            for rect in geometry.components:
-                Irect = rect.compute_inertia_wrt_parallel_axes(centroid)
-                Iy += Irect['Iya']
-                Iz += Irect['Iza']
-                Ix += Irect['Ixa']
-                Iyz += Irect['Iyza']
-        return dict(Iy=Iy, Iz=Iz, Ix=Ix, Iyz=Iyz)    
+        return self._combine()['inertia']
     
     def compute_inertia_wrt_parallel_axes(self, axes_center):
-        Iy, Iz, Ix, Iyz = 0.0, 0.0, 0.0, 0.0
-        for geometry in self.geometries:
-            for rect in geometry.components:
-                Irect = rect.compute_inertia_wrt_parallel_axes(axes_center)
-                Iy += Irect['Iya']
-                Iz += Irect['Iza']
-                Ix += Irect['Ixa']
-                Iyz += Irect['Iyza']
-        return dict(Iy=Iy, Iz=Iz, Ix=Ix, Iyz=Iyz)
+        return self._combine(axes_center)['inertia']
 
     @property
     def section_properties(self):
@@ -324,16 +607,8 @@ class RectanglesBasedGeometries:
 
     @property
     def bounding_box(self):
-        xs, ys = [], []
-        for geometry in self.geometries:
-            for rect in geometry.components:
-                min_x, max_x, min_y, max_y = rect.bounding_box
-                xs.append(min_x)
-                xs.append(max_x)
-                ys.append(min_y)
-                ys.append(max_y)   
-        min_x, max_x, min_y, max_y = min(xs), max(xs), min(ys), max(ys)
-        return min_x, max_x, min_y, max_y
+        boxes = np.array([geometry.bounding_box for geometry in self.geometries], dtype=float).reshape(-1, 4)
+        return boxes[:, 0].min(), boxes[:, 1].max(), boxes[:, 2].min(), boxes[:, 3].max()
                     
     def plot(self, edgecolor='gray', facecolor='silver', fill=True, line_width=1.5, zoom_factor=3000):    
         fig = plt.gcf()
@@ -354,6 +629,35 @@ class RectanglesBasedGeometries:
         ax.set_aspect('equal', adjustable='box')
         plt.show()
 
+    def transform(self, transform):
+        """apply an affine transform to every geometry of the set. The rectangles of all the rectangles
+        based geometries are transformed at once, the other geometries (plate and stiffener arrays, arcs)
+        transform their own arrays
+        """
+        gathered = []
+        for geometry in self.geometries:
+            if type(geometry).transform is RectanglesBasedGeometry.transform:
+                gathered.append(geometry)
+            else:
+                geometry.transform(transform)
+        if not gathered:
+            return
+        rectangles = [rect for geometry in gathered for rect in geometry.components]
+        positions = transform.apply_to_points(np.array([rect.position for rect in rectangles], dtype=float).reshape(-1, 2))
+        angles = transform.apply_to_angles(np.array([rect.angle for rect in rectangles], dtype=float))
+        splits = np.cumsum([len(geometry.components) for geometry in gathered])[:-1]
+        for geometry, positions_i, angles_i in zip(gathered, np.split(positions, splits), np.split(angles, splits)):
+            geometry._update_rectangles(positions_i, angles_i, transform)
+
+    def move(self, displacement):
+        self.transform(AffineTransform.translation(displacement))
+
+    def rotate(self, rotation_point, angle):
+        self.transform(AffineTransform.rotation(angle, rotation_point))
+
+    def mirror(self, axis_point, axis_angle):
+        self.transform(AffineTransform.mirror(axis_point, axis_angle))
+
     def __str__(self) -> str:
         msg = ''
         for i, geometry in enumerate(self.geometries):
@@ -2,7 +2,9 @@ from geometry import RectanglesBasedGeometries
 from stiffeners import FlatBar, Angle, Bulb, Tee
 from materials import Steel
 from platings import FlatPlate
-import copy
+from profiles import StiffenerProfile, StiffenerGroup
+from contextlib import contextmanager
+import numpy as np
 
 class StiffenedPanel(RectanglesBasedGeometries):
     def __init__(self, name=None, type=None, inner_space=None) -> None:
@@ -10,9 +12,35 @@ class StiffenedPanel(RectanglesBasedGeometries):
         self.type = type
         self.inner_space = inner_space
         self._plating = None
+        # stiffeners added in groups are kept as flyweights in _stiffener_group, and
+        # _stiffeners maps their ids to the group itself until they are edited
         self._stiffeners = dict()
+        self._stiffener_group = StiffenerGroup()
         self._stiffeners_counter = 0
         self._stiffeners_spacing = 0
+        self._batch_depth = 0
+
+    @classmethod
+    def from_arrays(cls, plate, stiffener, relative_positions, relative_angle=90, name=None, type=None, inner_space=None):
+        """panel made of a plating and stiffeners of a single profile at the given positions along the plating"""
+        panel = cls(name, type, inner_space)
+        with panel.batch():
+            panel.set_plating(plate)
+            panel.add_stiffeners(relative_positions, relative_angle, stiffener)
+        return panel
+
+    @contextmanager
+    def batch(self):
+        """defers the update of the components until the end of the block, so that many
+        platings and stiffeners are added in linear time
+        """
+        self._batch_depth += 1
+        try:
+            yield self
+        finally:
+            self._batch_depth -= 1
+            if self._batch_depth == 0:
+                self._create()
 
     @property
     def plating(self):
@@ -20,26 +48,45 @@ class StiffenedPanel(RectanglesBasedGeometries):
 
     @property
     def stiffeners(self):
-        return self._stiffeners
+        """all the stiffeners by id, grouped stiffeners being given as read-only views"""
+        return {id: self.view_stiffener(id) for id in self._stiffeners}
     
     @property
     def num_stiffeners(self):
         return len(self._stiffeners)
 
+    @property
+    def stiffener_ids(self):
+        return list(self._stiffeners)
+
     def _create(self):
+        if self._batch_depth:
+            return
         components = []
         components.append(self._plating)
         for _,stiffener in self._stiffeners.items():
-            components.append(stiffener)
+            if stiffener is not self._stiffener_group:
+                components.append(stiffener)
+        if len(self._stiffener_group):
+            components.append(self._stiffener_group)
         super().__init__(components)
 
+    def promote_stiffeners(self, ids=None):
+        """copy on write: grouped stiffeners (all of them by default) become stand-alone objects,
+        keeping their ids and order
+        """
+        ids = self._stiffener_group.ids if ids is None else [id for id in ids if self._stiffeners[id] is self._stiffener_group]
+        for id, (profile, position, angle, mirrored) in zip(ids, self._stiffener_group.remove(ids)):
+            self._stiffeners[id] = profile.instantiate(position, angle, mirrored)
+        self._create()
+
     def set_plating(self, plate):
         self._plating = plate
         self._create()
 
     def add_stiffener(self, relative_position, relative_angle, stiffener, id=None):
-        stiffener.position = self._plating.position + relative_position*self._plating.unit_direction + 0.5*self._plating.thickness*self._plating.unit_normal
-        stiffener.angle = self._plating.angle + relative_angle
+        stiffener.position = self._plating.point_at(relative_position) + 0.5*self._plating.thickness*self._plating.unit_normal_at(relative_position)
+        stiffener.angle = self._plating.angle_at(relative_position) + relative_angle
         if id is not None:
             self._stiffeners[id] = stiffener
         else:
@@ -48,36 +95,80 @@ class StiffenedPanel(RectanglesBasedGeometries):
         self._create()
 
     def remove_stiffener(self, id):
+        if self._stiffeners[id] is self._stiffener_group:
+            self._stiffener_group.remove([id])
         del self._stiffeners[id]
         self._create()
 
     def get_stiffener(self, id):
+        """stiffener to be edited, a grouped stiffener becomes a stand-alone object.
+        Use view_stiffener to only read it
+        """
+        if self._stiffeners[id] is self._stiffener_group:
+            self.promote_stiffeners([id])
         return self._stiffeners[id]
 
+    def view_stiffener(self, id):
+        """stiffener to be read, a grouped stiffener is given as a transient read-only object
+        and stays in the group
+        """
+        if self._stiffeners[id] is self._stiffener_group:
+            return self._stiffener_group.view(id)
+        return self._stiffeners[id]
+
+    def stiffeners_bounding_boxes(self):
+        """bounding box of each stiffener, in the order of stiffener_ids, as a n x 4 array"""
+        boxes = np.zeros((self.num_stiffeners, 4))
+        grouped = np.array([stiffener is self._stiffener_group for stiffener in self._stiffeners.values()], dtype=bool)
+        if grouped.any():
+            grouped_ids = [id for id, stiffener in self._stiffeners.items() if stiffener is self._stiffener_group]
+            boxes[grouped] = self._stiffener_group.bounding_boxes(grouped_ids)
+        if not grouped.all():
+            boxes[~grouped] = [stiffener.bounding_box for stiffener in self._stiffeners.values() if stiffener is not self._stiffener_group]
+        return boxes
+
     def add_stiffeners_group(self, relative_position, relative_angle, spacing, stiffener, count):
-        for i in range(count):
-            stiffener_i = copy.deepcopy(stiffener)
-            relative_pos_i = relative_position + spacing*i
-            self.add_stiffener(relative_pos_i, relative_angle, stiffener_i)
+        self.add_stiffeners(relative_position + spacing*np.arange(count), relative_angle, stiffener)
         self._stiffeners_spacing = max(self._stiffeners_spacing, spacing)
+
+    def add_stiffeners(self, relative_positions, relative_angle, stiffener):
+        """adds stiffeners of the profile of the given stiffener at several positions along the plating"""
+        profile = StiffenerProfile.from_stiffener(stiffener)
+        relative_positions = np.asarray(relative_positions, dtype=float).ravel()
+        count = relative_positions.size
+        positions = (self._plating.point_at(relative_positions)
+                     + 0.5*self._plating.thickness*self._plating.unit_normal_at(relative_positions))
+        ids = range(self._stiffeners_counter + 1, self._stiffeners_counter + count + 1)
+        self._stiffener_group.add(ids, profile, positions, self._plating.angle_at(relative_positions) + relative_angle)
+        for id in ids:
+            self._stiffeners[id] = self._stiffener_group
+        self._stiffeners_counter += count
+        self._create()
             
     def reverse_stiffeners_orientation(self):
         for _,stiffener in self._stiffeners.items():
-            disp = -1*stiffener.web.unit_direction*self._plating.thickness
-            stiffener.move(disp)
-            stiffener.angle += 180
+            if stiffener is not self._stiffener_group:
+                disp = -1*stiffener.web.unit_direction*self._plating.thickness
+                stiffener.move(disp)
+                stiffener.angle += 180
+        self._stiffener_group.reverse_orientation(self._plating.thickness)
         self._create()
         
     def __str__(self) -> str:
         msg = f'Stiffened panel "{self.name}":\n'
         msg += f' Plate: {self._plating}\n'
         for i, stiffener in self._stiffeners.items():
-            msg += f' Stiffener {i}: {stiffener}\n'
+            if stiffener is self._stiffener_group:
+                msg += f' Stiffener {i}: {self._stiffener_group.describe(i)}\n'
+            else:
+                msg += f' Stiffener {i}: {stiffener}\n'
         return msg
     
     def set_stiffeners_angle(self, new_angle):
         for _, stiffener in self._stiffeners.items():
-            stiffener.angle = new_angle
+            if stiffener is not self._stiffener_group:
+                stiffener.angle = new_angle
+        self._stiffener_group.set_angles(new_angle)
         self._create()
 
     def update(self):
@@ -176,6 +267,17 @@ if __name__ == '__main__':
         panel.plot()
 
 
+    def test3():
+        steel = Steel(name='steel_A131',properties=dict(yield_strength=235e6,
+                                                            poisson_ratio=0.3,
+                                                            young_modulus=2.1e11))
+        plate = FlatPlate.from_endpoints(initial_point=[0,0], final_point=[2000, 0], thickness=10, material=steel)
+        stiffener = Bulb(length=100, thickness=6.35, material=steel)
+        panel = StiffenedPanel.from_arrays(plate, stiffener, relative_positions=[150, 450, 750, 1050, 1350], name='bottom_panel')
+        print(panel)
+        print(panel.section_properties)
+        panel.plot()
+
         
     test2()
         
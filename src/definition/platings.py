@@ -4,9 +4,21 @@ import sys
 import os
 sys.path.append(os.path.dirname(__file__))
 
-from geometry import Rectangle, RectanglesBasedGeometry
+from geometry import (AffineTransform, Arc, Rectangle, RectanglesBasedGeometry, combine_section_arrays,
+                      compute_rectangles_bounding_boxes, compute_rectangles_section_arrays)
 from materials import Steel
 
+
+def compute_lengths_and_angles(initial_points, final_points):
+    """lengths and angles in degrees, in [0, 360), of the segments joining n x 2 arrays of points"""
+    dif = np.asarray(final_points, dtype=float) - np.asarray(initial_points, dtype=float)
+    lengths = np.linalg.norm(dif, axis=-1)
+    angles = np.degrees(np.arctan2(dif[..., 1], dif[..., 0])) % 360
+    # a tiny negative angle wraps to 360.0 after rounding
+    angles = np.where(angles >= 360.0, angles - 360.0, angles)[()]
+    return lengths, angles
+
+
 class FlatPlate(RectanglesBasedGeometry):
     def __init__(self, length, thickness, position, angle, material):
         self._length = length
@@ -70,12 +82,8 @@ class FlatPlate(RectanglesBasedGeometry):
     def plate(self):
         return self._plate
 
-    def move(self, displacement):
-        super().move(displacement)
-        self._position = self._plate.position
-        
-    def rotate(self, rotation_point, angle):
-        super().rotate(rotation_point, angle)
+    def _update_rectangles(self, positions, angles, transform):
+        super()._update_rectangles(positions, angles, transform)
         self._angle = self._plate.angle
         self._position = self._plate.position
 
@@ -85,31 +93,7 @@ class FlatPlate(RectanglesBasedGeometry):
     @classmethod
     def from_endpoints(cls, initial_point, final_point, thickness, material):
         position = np.array(initial_point)
-        dif = np.array(final_point) - np.array(initial_point)
-        length = np.linalg.norm(dif)
-        unit_dir = dif/length
-
-        x, y = unit_dir[0], unit_dir[1]
-
-        with np.errstate(divide='raise'):
-            try:
-                theta = np.degrees(np.arctan(abs(y)/abs(x)))
-            except:
-                x = 1e-16
-                theta = np.degrees(np.arctan(abs(y)/abs(x)))
-        
-        if x >= 0 and y >= 0:    # vector in first quadrant
-            angle = theta
-        elif x <= 0 and y >= 0:  # vector in second quadrant
-            angle = 180 - theta
-        elif x <= 0 and y <= 0:  # vector in third quadrant
-            angle = 180 + theta
-        elif x >= 0 and y <= 0:  # vector in fourth quadrant
-            angle = 360 - theta
-
-        if angle >= 360:
-            angle = angle - 360
-
+        length, angle = compute_lengths_and_angles(initial_point, final_point)
         return cls(length, thickness, position, angle, material)
 
     @property
@@ -128,6 +112,252 @@ class FlatPlate(RectanglesBasedGeometry):
     def end_point(self):
         return self.start_point + self.plate.unit_direction*self.plate.width
 
+    def point_at(self, distance):
+        """points of the plate line at the given distances from the start point"""
+        distance = np.asarray(distance, dtype=float)
+        return self.position + distance[..., np.newaxis]*self.unit_direction
+
+    def angle_at(self, distance):
+        return self.angle
+
+    def unit_normal_at(self, distance):
+        return self.unit_normal
+
+
+class CurvedPlate(RectanglesBasedGeometry):
+    def __init__(self, radius, thickness, center, start_angle, sweep_angle, material):
+        """Plate bent as a circular arc, e.g. a bilge or flare strake. The plate runs from the point
+        of the arc at start_angle, counterclockwise for positive sweep angles
+
+        Args:
+            radius (float): radius of the mid-thickness line
+            thickness (float): thickness
+            center (array-like): center of the arc
+            start_angle, sweep_angle (float): polar angle of the start point and angular extent, in degrees
+            material (Material): material
+        """
+        self._radius = radius
+        self._thickness = thickness
+        self._center = np.array(center, dtype=float)
+        self._start_angle = start_angle
+        self._sweep_angle = sweep_angle
+        self._material = material
+        self._arc = None
+        self._create()
+
+    def _create(self):
+        self._arc = Arc(self._radius, self._thickness, self._center, self._start_angle, self._sweep_angle)
+        super().__init__([self._arc])
+
+    @classmethod
+    def from_three_points(cls, initial_point, middle_point, final_point, thickness, material):
+        """plate along the circular arc from initial_point to final_point passing through middle_point"""
+        p0, pm, p1 = (np.array(point, dtype=float) for point in [initial_point, middle_point, final_point])
+        # center at the intersection of the perpendicular bisectors of the chords
+        A = np.array([pm - p0, p1 - pm])
+        b = 0.5*np.array([pm.dot(pm) - p0.dot(p0), p1.dot(p1) - pm.dot(pm)])
+        center = np.linalg.solve(A, b)
+        radius = np.linalg.norm(p0 - center)
+        phi_0, phi_m, phi_1 = (np.degrees(np.arctan2(*(point - center)[::-1])) for point in [p0, pm, p1])
+        sweep_angle = (phi_1 - phi_0) % 360
+        if (phi_m - phi_0) % 360 > sweep_angle:
+            sweep_angle = sweep_angle - 360
+        return cls(radius, thickness, center, phi_0, sweep_angle, material)
+
+    @property
+    def radius(self):
+        return self._radius
+
+    @property
+    def thickness(self):
+        return self._thickness
+
+    @thickness.setter
+    def thickness(self, new_thickness):
+        self._thickness = new_thickness
+        self._create()
+
+    @property
+    def material(self):
+        return self._material
+
+    @material.setter
+    def material(self, new_material):
+        self._material = new_material
+        self._create()
+
+    @property
+    def arc(self):
+        return self._arc
+
+    @property
+    def length(self):
+        return abs(np.radians(self._sweep_angle))*self._radius
+
+    @property
+    def section_arrays(self):
+        return self._arc.section_arrays
+
+    @property
+    def bounding_box(self):
+        return self._arc.bounding_box
+
+    def _polar_angle_at(self, distance):
+        # polar angle (radians) of the points at the given distances along the plate
+        return np.radians(self._start_angle) + np.sign(self._sweep_angle)*np.asarray(distance, dtype=float)/self._radius
+
+    def point_at(self, distance):
+        """points of the mid-thickness line at the given distances (arc lengths) from the start point"""
+        phi = self._polar_angle_at(distance)
+        return self._center + self._radius*np.stack([np.cos(phi), np.sin(phi)], axis=-1)
+
+    def angle_at(self, distance):
+        """angle in degrees of the tangent to the plate at the given distances"""
+        return np.degrees(self._polar_angle_at(distance)) + 90*np.sign(self._sweep_angle)
+
+    def unit_normal_at(self, distance):
+        theta = np.radians(self.angle_at(distance))
+        return np.stack([-np.sin(theta), np.cos(theta)], axis=-1)
+
+    @property
+    def position(self):
+        return self.point_at(0.0)
+
+    @property
+    def angle(self):
+        return self.angle_at(0.0)
+
+    @property
+    def unit_direction(self):
+        theta = np.radians(self.angle)
+        return np.array([np.cos(theta), np.sin(theta)])
+
+    @property
+    def unit_normal(self):
+        return self.unit_normal_at(0.0)
+
+    @property
+    def start_point(self):
+        return self.point_at(0.0)
+
+    @property
+    def end_point(self):
+        return self.point_at(self.length)
+
+    def transform(self, transform):
+        self._arc.transform(transform)
+        self._center = self._arc.center
+        self._start_angle = self._arc.start_angle
+        self._sweep_angle = self._arc.sweep_angle
+
+    def __str__(self):
+        return f"Curved PL{self.thickness} with {self.length} length, {self.material.name}, radius {self.radius} centered at {self._center}, from {self._start_angle} degrees sweeping {self._sweep_angle} degrees"
+
+
+class PlateCollection:
+    def __init__(self, lengths, thicknesses, positions, angles, material_ids, materials):
+        """Array-backed set of flat plates, each plate being one row of the arrays. It behaves as a
+        rectangles based geometry and can be added as a whole to a transverse section
+
+        Args:
+            lengths, thicknesses, angles (array-like): one value per plate, angles in degrees
+            positions (array-like): n x 2 start points
+            material_ids (array-like): index of the material of each plate in materials
+            materials (list): materials of the plates
+        """
+        self.lengths = np.asarray(lengths, dtype=float).ravel()
+        self.thicknesses = np.broadcast_to(np.asarray(thicknesses, dtype=float), self.lengths.shape).copy()
+        self.positions = np.asarray(positions, dtype=float).reshape(-1, 2)
+        self.angles = np.asarray(angles, dtype=float).ravel()
+        self.material_ids = np.broadcast_to(np.asarray(material_ids, dtype=int), self.lengths.shape).copy()
+        self.materials = list(materials)
+
+    @classmethod
+    def from_endpoints(cls, initial_points, final_points, thicknesses, material_ids, materials):
+        """plates joining the rows of two n x 2 arrays of points, lengths and angles being computed at once"""
+        lengths, angles = compute_lengths_and_angles(np.reshape(initial_points, (-1, 2)), np.reshape(final_points, (-1, 2)))
+        return cls(lengths, thicknesses, initial_points, angles, material_ids, materials)
+
+    def __len__(self):
+        return self.lengths.size
+
+    def __getitem__(self, k):
+        """stand-alone FlatPlate of the k-th plate"""
+        return FlatPlate(self.lengths[k], self.thicknesses[k], self.positions[k].copy(), self.angles[k],
+                         self.materials[self.material_ids[k]])
+
+    @property
+    def unit_directions(self):
+        theta = np.radians(self.angles)
+        return np.column_stack([np.cos(theta), np.sin(theta)])
+
+    @property
+    def unit_normals(self):
+        theta = np.radians(self.angles)
+        return np.column_stack([-np.sin(theta), np.cos(theta)])
+
+    @property
+    def start_points(self):
+        return self.positions
+
+    @property
+    def end_points(self):
+        return self.positions + self.unit_directions*self.lengths[:, np.newaxis]
+
+    @property
+    def rectangle_arrays(self):
+        return dict(width=self.lengths, height=self.thicknesses, position=self.positions, angle=self.angles)
+
+    @property
+    def section_arrays(self):
+        return compute_rectangles_section_arrays(**self.rectangle_arrays)
+
+    @property
+    def components(self):
+        """rectangles of every plate, created on request (plotting, printing)"""
+        return [Rectangle(width, height, position, angle) for width, height, position, angle
+                in zip(self.lengths, self.thicknesses, self.positions, self.angles)]
+
+    @property
+    def area(self):
+        return combine_section_arrays([self.section_arrays])['area']
+
+    @property
+    def centroid(self):
+        return combine_section_arrays([self.section_arrays])['centroid']
+
+    @property
+    def inertia(self):
+        return combine_section_arrays([self.section_arrays])['inertia']
+
+    def compute_inertia_wrt_paralell_axes(self, axes_center):
+        return combine_section_arrays([self.section_arrays], axes_center)['inertia']
+
+    def bounding_boxes(self):
+        """bounding box of each plate, as a n x 4 array"""
+        return compute_rectangles_bounding_boxes(**self.rectangle_arrays)
+
+    @property
+    def bounding_box(self):
+        boxes = self.bounding_boxes()
+        return boxes[:, 0].min(), boxes[:, 1].max(), boxes[:, 2].min(), boxes[:, 3].max()
+
+    def transform(self, transform):
+        self.positions = transform.apply_to_points(self.positions)
+        self.angles = transform.apply_to_angles(self.angles)
+
+    def move(self, displacement):
+        self.transform(AffineTransform.translation(displacement))
+
+    def rotate(self, rotation_point, angle):
+        self.transform(AffineTransform.rotation(angle, rotation_point))
+
+    def __str__(self) -> str:
+        msg = ''
+        for k in range(len(self)):
+            msg += f"Plate {k}: {self[k]}\n"
+        return msg
+
 
 if __name__ == '__main__':
 
@@ -192,6 +422,23 @@ if __name__ == '__main__':
         plate = FlatPlate.from_endpoints(initial_point, final_point, 6.35, material)
         print(plate)
         plate.plot()
+
+    def test6():
+        import time
+        material = Steel(name='steel_A131',properties=dict(yield_strength=235e6,
+                                                           poisson_ratio=0.3,
+                                                           young_modulus=2.1e11))
+        theta = np.linspace(0, 2*np.pi, 10001)
+        points = np.column_stack([5000*np.cos(theta), 3000*np.sin(theta)])
+        start = time.perf_counter()
+        plates = PlateCollection.from_endpoints(points[:-1], points[1:], 8.0, 0, [material])
+        print(f'{len(plates)} plates created in {time.perf_counter() - start:.4f} s')
+        start = time.perf_counter()
+        single_plates = [FlatPlate.from_endpoints(points[k], points[k + 1], 8.0, material) for k in range(len(plates))]
+        print(f'{len(single_plates)} single plates created in {time.perf_counter() - start:.4f} s')
+        print(plates[2500])
+        print(single_plates[2500])
+        print(plates.inertia)
     
     test3()
 
@@ -0,0 +1,364 @@
+import numpy as np
+from copy import deepcopy
+from geometry import AffineTransform, Rectangle, combine_section_arrays, compute_rectangles_bounding_boxes, is_integer
+
+import os
+import sys
+
+sys.path.append(os.path.dirname(os.path.dirname(__file__)))
+
+
+class StiffenerProfile:
+    def __init__(self, profile_id, stiffener):
+        """Immutable profile definition shared by every stiffener of the same shape and material.
+        The profile is kept at the origin with angle 0 (web along the x axis), together with its
+        rectangles as arrays and its section properties, which are computed only once
+
+        Args:
+            profile_id (int): index of the profile in the registry
+            stiffener (FlatBar, Angle, Bulb or Tee): stiffener taken as a template, it is not modified
+        """
+        prototype = deepcopy(stiffener)
+        prototype.position = np.array([0.0, 0.0])
+        prototype.angle = 0.0
+        rectangle_arrays = prototype.rectangle_arrays
+        for array in rectangle_arrays.values():
+            array.setflags(write=False)
+        properties = combine_section_arrays([prototype.section_arrays])
+
+        self.profile_id = profile_id
+        self.description = str(prototype).split(' at ')[0]
+        self.rectangle_arrays = rectangle_arrays
+        self.area = properties['area']
+        self.centroid = properties['centroid']
+        self.inertia = properties['inertia']
+        self._prototype = prototype
+        self._frozen = True
+
+    def __setattr__(self, name, value):
+        if getattr(self, '_frozen', False):
+            raise AttributeError(f'stiffener profile "{self.description}" is immutable')
+        super().__setattr__(name, value)
+
+    def __repr__(self):
+        return f"StiffenerProfile(profile_id={self.profile_id}, {self.description})"
+
+    @staticmethod
+    def key(stiffener):
+        """key identifying the shape and material of a stiffener, whatever its position and angle"""
+        prototype = deepcopy(stiffener)
+        prototype.position = np.array([0.0, 0.0])
+        prototype.angle = 0.0
+        rectangle_arrays = prototype.rectangle_arrays
+        values = np.round(np.concatenate([rectangle_arrays['width'], rectangle_arrays['height'],
+                                          rectangle_arrays['position'].ravel(), rectangle_arrays['angle']]), 9)
+        return (type(stiffener).__name__, str(stiffener.material), tuple(values))
+
+    @classmethod
+    def from_stiffener(cls, stiffener):
+        return PROFILE_REGISTRY.intern(stiffener)
+
+    def instantiate(self, position, angle, mirrored=False):
+        """stand-alone stiffener object of this profile at the given position and angle,
+        mirrored about its web axis if required
+        """
+        stiffener = deepcopy(self._prototype)
+        stiffener.position = np.array(position, dtype=float)
+        stiffener.angle = angle
+        if mirrored:
+            stiffener.transform(AffineTransform.mirror(position, angle))
+        return stiffener
+
+    def view(self, position, angle, mirrored=False):
+        """read-only stiffener of this profile at the given position and angle"""
+        stiffener = self.instantiate(position, angle % 360, mirrored)
+        stiffener.freeze()
+        return stiffener
+
+    def rotated_inertia(self, angle, mirrored=False):
+        """centroidal moments of inertia of the profile rotated by the given angles (degrees),
+        with respect to axes parallel to the cartesian axes
+        """
+        theta = np.radians(np.asarray(angle, dtype=float))
+        c, s = np.cos(theta), np.sin(theta)
+        Iy, Iz, Iyz = self.inertia['Iy'], self.inertia['Iz'], self.inertia['Iyz']
+        if mirrored:
+            Iyz = -Iyz
+        Iyp = c*c*Iy + s*s*Iz + 2*s*c*Iyz
+        Izp = s*s*Iy + c*c*Iz - 2*s*c*Iyz
+        Iyzp = s*c*(Iz - Iy) + (c*c - s*s)*Iyz
+        return Iyp, Izp, Iyzp
+
+
+class ProfileRegistry:
+    """Registry interning stiffener profiles, so that equal profiles are defined only once"""
+    def __init__(self):
+        self._profiles = []
+        self._profile_ids = dict()
+
+    def intern(self, stiffener):
+        key = StiffenerProfile.key(stiffener)
+        if key not in self._profile_ids:
+            self._profile_ids[key] = len(self._profiles)
+            self._profiles.append(StiffenerProfile(len(self._profiles), stiffener))
+        return self._profiles[self._profile_ids[key]]
+
+    def __getitem__(self, profile_id):
+        return self._profiles[profile_id]
+
+    def __len__(self):
+        return len(self._profiles)
+
+
+PROFILE_REGISTRY = ProfileRegistry()
+
+
+def rotate_points(points, angle):
+    """rotation of n x 2 points about the origin by n angles in degrees"""
+    theta = np.radians(np.asarray(angle, dtype=float))
+    c, s = np.cos(theta), np.sin(theta)
+    points = np.asarray(points, dtype=float)
+    return np.stack([c*points[..., 0] - s*points[..., 1], s*points[..., 0] + c*points[..., 1]], axis=-1)
+
+
+class StiffenerGroup:
+    def __init__(self):
+        """Set of stiffeners stored as flyweights: each stiffener is only its id, the id of a shared
+        profile, its position, its angle and whether it is mirrored about its web axis. It behaves
+        as a rectangles based geometry, whose rectangles are generated from the profiles when
+        required. Transforms are composed and applied to the arrays only when they are next used
+        """
+        self._ids = []
+        self._rows = dict()
+        self._profile_ids = np.zeros(0, dtype=int)
+        self._positions = np.zeros((0, 2))
+        self._angles = np.zeros(0)
+        self._integer_angles = np.zeros(0, dtype=bool)
+        self._mirrored = np.zeros(0, dtype=bool)
+        self._pending_transform = None
+
+    def _apply_pending_transform(self):
+        if self._pending_transform is not None:
+            transform, self._pending_transform = self._pending_transform, None
+            self._positions = transform.apply_to_points(self._positions)
+            self._angles = transform.apply_to_angles(self._angles)
+            self._integer_angles &= is_integer(transform.angle)
+            self._mirrored ^= transform.reflection
+
+    def __len__(self):
+        return len(self._ids)
+
+    def __contains__(self, id):
+        return id in self._rows
+
+    @property
+    def ids(self):
+        return list(self._ids)
+
+    def add(self, ids, profile, positions, angles):
+        """adds stiffeners of the given profile, positions is a n x 2 array and angles a scalar or n array"""
+        self._apply_pending_transform()
+        ids = list(ids)
+        angles_input = angles
+        positions = np.asarray(positions, dtype=float).reshape(-1, 2)
+        angles = np.broadcast_to(np.asarray(angles, dtype=float), (len(ids),))
+        for k, id in enumerate(ids):
+            self._rows[id] = len(self._ids) + k
+        self._ids.extend(ids)
+        self._profile_ids = np.concatenate([self._profile_ids, np.full(len(ids), profile.profile_id)])
+        self._positions = np.concatenate([self._positions, positions])
+        self._angles = np.concatenate([self._angles, angles])
+        self._integer_angles = np.concatenate([self._integer_angles, np.full(len(ids), is_integer(angles_input))])
+        self._mirrored = np.concatenate([self._mirrored, np.zeros(len(ids), dtype=bool)])
+
+    def get(self, id):
+        """profile, position, angle and mirroring of a stiffener"""
+        self._apply_pending_transform()
+        row = self._rows[id]
+        angle = int(self._angles[row]) if self._integer_angles[row] else self._angles[row]
+        return PROFILE_REGISTRY[self._profile_ids[row]], self._positions[row].copy(), angle, self._mirrored[row]
+
+    def view(self, id):
+        """read-only stand-alone stiffener, the stiffener staying in the group"""
+        profile, position, angle, mirrored = self.get(id)
+        return profile.view(position, angle, mirrored)
+
+    def remove(self, ids):
+        """removes stiffeners at once and returns the profile, position, angle and mirroring
+        of each, in the order of ids
+        """
+        ids = list(ids)
+        removed = [self.get(id) for id in ids]
+        kept = np.ones(len(self._ids), dtype=bool)
+        kept[[self._rows[id] for id in ids]] = False
+        self._ids = [id for id, kept_i in zip(self._ids, kept) if kept_i]
+        self._profile_ids = self._profile_ids[kept]
+        self._positions = self._positions[kept]
+        self._angles = self._angles[kept]
+        self._integer_angles = self._integer_angles[kept]
+        self._mirrored = self._mirrored[kept]
+        self._rows = {id: k for k, id in enumerate(self._ids)}
+        return removed
+
+    def describe(self, id):
+        profile, position, angle, _ = self.get(id)
+        if angle >= 360:
+            angle = angle - 360
+        return f"{profile.description} at {position} with orientation {angle} degrees"
+
+    def set_angles(self, new_angle):
+        self._apply_pending_transform()
+        self._angles[:] = new_angle
+        self._integer_angles[:] = is_integer(new_angle)
+
+    def reverse_orientation(self, plate_thickness):
+        """moves the stiffeners to the other side of a plate of the given thickness and turns them by 180 degrees"""
+        self._apply_pending_transform()
+        theta = np.radians(self._angles)
+        self._positions -= plate_thickness*np.column_stack([np.cos(theta), np.sin(theta)])
+        self._angles += 180
+
+    def _profiles(self):
+        # rows of the stiffeners of each profile, mirrored or not
+        self._apply_pending_transform()
+        for profile_id in np.unique(self._profile_ids):
+            for mirrored in [False, True]:
+                rows = np.flatnonzero((self._profile_ids == profile_id) & (self._mirrored == mirrored))
+                if rows.size:
+                    yield PROFILE_REGISTRY[profile_id], mirrored, rows
+
+    def _member_rectangle_arrays(self):
+        # rectangles of each profile placed at every stiffener, with shape (stiffeners, rectangles of the profile)
+        for profile, mirrored, rows in self._profiles():
+            local = profile.rectangle_arrays
+            local_positions, local_angles = local['position'], local['angle']
+            if mirrored:
+                local_positions, local_angles = local_positions*[1.0, -1.0], -local_angles
+            angles = self._angles[rows][:, np.newaxis]
+            positions = self._positions[rows][:, np.newaxis, :] + rotate_points(local_positions[np.newaxis, :, :], angles)
+            shape = (rows.size, local['width'].size)
+            yield rows, dict(width=np.broadcast_to(local['width'], shape), height=np.broadcast_to(local['height'], shape),
+                             position=positions, angle=angles + local_angles)
+
+    @property
+    def rectangle_arrays(self):
+        arrays = [member_arrays for _, member_arrays in self._member_rectangle_arrays()]
+        if not arrays:
+            return dict(width=np.zeros(0), height=np.zeros(0), position=np.zeros((0, 2)), angle=np.zeros(0))
+        return {name: np.concatenate([array[name].reshape(-1, 2) if name == 'position' else array[name].ravel()
+                                      for array in arrays]) for name in arrays[0]}
+
+    @property
+    def section_arrays(self):
+        # one part per stiffener: the profile properties moved by the parallel axis theorem
+        area, centroid = np.zeros(len(self)), np.zeros((len(self), 2))
+        Iyp, Izp, Iyzp = np.zeros(len(self)), np.zeros(len(self)), np.zeros(len(self))
+        for profile, mirrored, rows in self._profiles():
+            local_centroid = profile.centroid*[1.0, -1.0] if mirrored else profile.centroid
+            area[rows] = profile.area
+            centroid[rows] = self._positions[rows] + rotate_points(local_centroid, self._angles[rows])
+            Iyp[rows], Izp[rows], Iyzp[rows] = profile.rotated_inertia(self._angles[rows], mirrored)
+        return dict(area=area, centroid=centroid, Iyp=Iyp, Izp=Izp, Iyzp=Iyzp)
+
+    @property
+    def components(self):
+        """rectangles of every stiffener, created on request (plotting, printing)"""
+        arrays = self.rectangle_arrays
+        return [Rectangle(width, height, position, angle) for width, height, position, angle
+                in zip(arrays['width'], arrays['height'], arrays['position'], arrays['angle'])]
+
+    @property
+    def area(self):
+        return self.section_arrays['area'].sum()
+
+    @property
+    def centroid(self):
+        return combine_section_arrays([self.section_arrays])['centroid']
+
+    @property
+    def inertia(self):
+        return combine_section_arrays([self.section_arrays])['inertia']
+
+    def compute_inertia_wrt_paralell_axes(self, axes_center):
+        return combine_section_arrays([self.section_arrays], axes_center)['inertia']
+
+    def bounding_boxes(self, ids=None):
+        """bounding box of each stiffener, in the order of ids (all stiffeners by default)"""
+        boxes = np.zeros((len(self), 4))
+        for rows, arrays in self._member_rectangle_arrays():
+            rectangle_boxes = compute_rectangles_bounding_boxes(**arrays).reshape(rows.size, -1, 4)
+            boxes[rows] = np.column_stack([rectangle_boxes[:, :, 0].min(axis=1), rectangle_boxes[:, :, 1].max(axis=1),
+                                           rectangle_boxes[:, :, 2].min(axis=1), rectangle_boxes[:, :, 3].max(axis=1)])
+        if ids is not None:
+            boxes = boxes[[self._rows[id] for id in ids]]
+        return boxes
+
+    @property
+    def bounding_box(self):
+        boxes = self.bounding_boxes()
+        return boxes[:, 0].min(), boxes[:, 1].max(), boxes[:, 2].min(), boxes[:, 3].max()
+
+    def transform(self, transform):
+        """composes the transform with the pending ones, the arrays are updated when next used"""
+        self._pending_transform = transform if self._pending_transform is None else transform @ self._pending_transform
+
+    def move(self, displacement):
+        self.transform(AffineTransform.translation(displacement))
+
+    def rotate(self, rotation_point, angle):
+        self.transform(AffineTransform.rotation(angle, rotation_point))
+
+    def __str__(self) -> str:
+        msg = ''
+        for id in self._ids:
+            msg += f"Stiffener {id}: {self.describe(id)}\n"
+        return msg
+
+
+if __name__ == '__main__':
+    def test1():
+        import sys
+        import time
+        from materials import Steel
+        from stiffeners import Bulb
+
+        steel = Steel(name='steel_A131',properties=dict(yield_strength=235e6,
+                                                            poisson_ratio=0.3,
+                                                            young_modulus=2.1e11))
+        bulb = Bulb(length=100, thickness=6.35, material=steel)
+        profile = StiffenerProfile.from_stiffener(bulb)
+        print(profile, profile is StiffenerProfile.from_stiffener(deepcopy(bulb)))
+
+        count = 1000
+        positions = np.column_stack([500.0*np.arange(count), np.zeros(count)])
+        group = StiffenerGroup()
+        start = time.perf_counter()
+        group.add(range(count), profile, positions, 90)
+        print(f'group of {count} stiffeners: {time.perf_counter() - start:.4f} s')
+        start = time.perf_counter()
+        copies = [profile.instantiate(position, 90) for position in positions]
+        print(f'{count} deep copies: {time.perf_counter() - start:.4f} s')
+
+        def deep_size(obj, seen=None):
+            seen = set() if seen is None else seen
+            if id(obj) in seen:
+                return 0
+            seen.add(id(obj))
+            size = sys.getsizeof(obj)
+            if isinstance(obj, dict):
+                size += sum(deep_size(k, seen) + deep_size(v, seen) for k, v in obj.items())
+            elif isinstance(obj, (list, tuple)):
+                size += sum(deep_size(v, seen) for v in obj)
+            elif hasattr(obj, '__dict__'):
+                size += deep_size(vars(obj), seen)
+            return size
+        seen = {id(steel)}
+        print(f'bytes per stiffener: group {deep_size(group, set(seen))/count:.0f}, copies {deep_size(copies, set(seen))/count:.0f}')
+
+        group_properties = combine_section_arrays([group.section_arrays])
+        copies_properties = combine_section_arrays([copy.section_arrays for copy in copies])
+        print(np.isclose(group_properties['area'], copies_properties['area']),
+              np.allclose(group_properties['centroid'], copies_properties['centroid']),
+              all(np.isclose(group_properties['inertia'][k], copies_properties['inertia'][k]) for k in ['Iy', 'Iz', 'Ix', 'Iyz']))
+
+    test1()
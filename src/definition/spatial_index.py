@@ -0,0 +1,165 @@
+import numpy as np
+
+
+class IntervalIndex:
+    """Static index over closed intervals [lower, upper], built once and queried many times.
+
+    Queries return the positions of the matching intervals, in increasing order.
+    below/above are binary searches over the sorted bounds, and crossing/overlapping
+    use a centered interval tree, so every query costs O(log n + k) for k hits
+    """
+    def __init__(self, lower, upper):
+        self._lower = np.asarray(lower, dtype=float).ravel()
+        self._upper = np.asarray(upper, dtype=float).ravel()
+        if self._lower.shape != self._upper.shape:
+            raise ValueError('lower and upper bounds must have the same size')
+        if np.any(self._upper < self._lower):
+            raise ValueError('upper bounds must not be smaller than lower bounds')
+
+        self._order_by_lower = np.argsort(self._lower, kind='stable')
+        self._sorted_lower = self._lower[self._order_by_lower]
+        self._order_by_upper = np.argsort(self._upper, kind='stable')
+        self._sorted_upper = self._upper[self._order_by_upper]
+        self._root = self._build(np.arange(self._lower.size))
+
+    def _build(self, ids):
+        if ids.size == 0:
+            return None
+        center = np.median(0.5*(self._lower[ids] + self._upper[ids]))
+        left = ids[self._upper[ids] < center]
+        right = ids[self._lower[ids] > center]
+        here = ids[(self._lower[ids] <= center) & (self._upper[ids] >= center)]
+
+        by_lower = here[np.argsort(self._lower[here], kind='stable')]
+        by_upper = here[np.argsort(-self._upper[here], kind='stable')]
+        node = dict(center=center,
+                    by_lower=by_lower, lower=self._lower[by_lower],
+                    by_upper=by_upper, upper=-self._upper[by_upper],
+                    left=self._build(left), right=self._build(right))
+        return node
+
+    @property
+    def size(self):
+        return self._lower.size
+
+    @property
+    def lower(self):
+        return self._lower
+
+    @property
+    def upper(self):
+        return self._upper
+
+    @property
+    def extent(self):
+        """smallest interval containing every indexed interval"""
+        return self._sorted_lower[0], self._sorted_upper[-1]
+
+    def below(self, value):
+        """intervals lying entirely at or below value (upper <= value)"""
+        count = np.searchsorted(self._sorted_upper, value, side='right')
+        return np.sort(self._order_by_upper[:count])
+
+    def above(self, value):
+        """intervals lying entirely at or above value (lower >= value)"""
+        first = np.searchsorted(self._sorted_lower, value, side='left')
+        return np.sort(self._order_by_lower[first:])
+
+    def crossing(self, value):
+        """intervals containing value (lower <= value <= upper)"""
+        hits = []
+        node = self._root
+        while node is not None:
+            if value < node['center']:
+                count = np.searchsorted(node['lower'], value, side='right')
+                hits.append(node['by_lower'][:count])
+                node = node['left']
+            elif value > node['center']:
+                count = np.searchsorted(node['upper'], -value, side='right')
+                hits.append(node['by_upper'][:count])
+                node = node['right']
+            else:
+                hits.append(node['by_lower'])
+                break
+        if not hits:
+            return np.zeros(0, dtype=int)
+        return np.sort(np.concatenate(hits))
+
+    def overlapping(self, lower, upper):
+        """intervals sharing at least one point with [lower, upper]"""
+        first = np.searchsorted(self._sorted_lower, lower, side='right')
+        last = np.searchsorted(self._sorted_lower, upper, side='right')
+        starting_inside = self._order_by_lower[first:last]
+        return np.sort(np.concatenate([self.crossing(lower), starting_inside]))
+
+    def within(self, lower, upper):
+        """intervals lying entirely inside [lower, upper]"""
+        hits = self.overlapping(lower, upper)
+        return hits[(self._lower[hits] >= lower) & (self._upper[hits] <= upper)]
+
+
+class BoundingBoxIndex:
+    """Index over axis-aligned bounding boxes (min_x, max_x, min_y, max_y).
+
+    The vertical extents are kept in an IntervalIndex; horizontal bounds are
+    checked only on the boxes returned by the vertical query
+    """
+    def __init__(self, bounding_boxes):
+        boxes = np.asarray(bounding_boxes, dtype=float).reshape(-1, 4)
+        self._min_x, self._max_x = boxes[:, 0], boxes[:, 1]
+        self._min_y, self._max_y = boxes[:, 2], boxes[:, 3]
+        self._y_index = IntervalIndex(self._min_y, self._max_y)
+
+    @property
+    def size(self):
+        return self._y_index.size
+
+    @property
+    def y_index(self):
+        return self._y_index
+
+    @property
+    def bounding_box(self):
+        """bounding box of every indexed box"""
+        min_y, max_y = self._y_index.extent
+        return self._min_x.min(), self._max_x.max(), min_y, max_y
+
+    def overlapping(self, min_x, max_x, min_y, max_y):
+        """boxes intersecting the given box"""
+        hits = self._y_index.overlapping(min_y, max_y)
+        return hits[(self._min_x[hits] <= max_x) & (self._max_x[hits] >= min_x)]
+
+    def within(self, min_x, max_x, min_y, max_y):
+        """boxes lying entirely inside the given box"""
+        hits = self._y_index.within(min_y, max_y)
+        return hits[(self._min_x[hits] >= min_x) & (self._max_x[hits] <= max_x)]
+
+    def containing(self, x, y):
+        """boxes containing the point (x, y)"""
+        hits = self._y_index.crossing(y)
+        return hits[(self._min_x[hits] <= x) & (self._max_x[hits] >= x)]
+
+
+if __name__ == '__main__':
+    def test1():
+        rng = np.random.default_rng(0)
+        lower = rng.uniform(0, 10000, 500)
+        upper = lower + rng.uniform(0, 2000, 500)
+        index = IntervalIndex(lower, upper)
+        for value in [0.0, 2500.0, 7000.0, 11000.0]:
+            assert np.array_equal(index.crossing(value), np.flatnonzero((lower <= value) & (upper >= value)))
+            assert np.array_equal(index.below(value), np.flatnonzero(upper <= value))
+            assert np.array_equal(index.above(value), np.flatnonzero(lower >= value))
+        assert np.array_equal(index.overlapping(3000.0, 4000.0), np.flatnonzero((lower <= 4000.0) & (upper >= 3000.0)))
+        assert np.array_equal(index.within(3000.0, 6000.0), np.flatnonzero((lower >= 3000.0) & (upper <= 6000.0)))
+        print(index.crossing(2500.0))
+
+    def test2():
+        boxes = [(0, 500, 0, 10), (500, 3000, 0, 1500), (3000, 10000, 1500, 8000), (0, 10000, 7990, 8000)]
+        index = BoundingBoxIndex(boxes)
+        print(index.overlapping(0, 1000, 0, 100))
+        print(index.containing(5000, 7995))
+        print(index.bounding_box)
+
+    test1()
+    test2()
@@ -1,5 +1,5 @@
 import numpy as np
-from geometry import Rectangle, RectanglesBasedGeometry
+from geometry import AffineTransform, Rectangle, RectanglesBasedGeometry
 from materials import Steel
 
 
@@ -66,12 +66,8 @@ class FlatBar(RectanglesBasedGeometry):
     def web(self):
         return self._web
 
-    def move(self, displacement):
-        super().move(displacement)
-        self._position = self._web.position
-        
-    def rotate(self, rotation_point, angle):
-        super().rotate(rotation_point, angle)
+    def _update_rectangles(self, positions, angles, transform):
+        super()._update_rectangles(positions, angles, transform)
         self._angle = self._web.angle
         self._position = self._web.position
 
@@ -90,6 +86,8 @@ class Angle(RectanglesBasedGeometry):
         self._position = position
         self._angle = angle
         self._material = material
+        # handedness: True when the flange lies on the other side of the web, after a mirroring
+        self._mirrored = False
 
         self._web = None
         self._flange = None
@@ -100,6 +98,8 @@ class Angle(RectanglesBasedGeometry):
         flange_position = self._position + 0.5*self._web.height*self._web.unit_normal + (self._web.width + 0.5*self._flange_thickness)*self._web.unit_direction
         flange_angle = self._web.angle - 90
         self._flange = Rectangle(width=self._flange_length, height=self._flange_thickness, position=flange_position, angle=flange_angle)
+        if self._mirrored:
+            self._flange.transform(AffineTransform.mirror(self._position, self._angle))
         super().__init__([self._web, self._flange])
     
     @property
@@ -173,18 +173,20 @@ class Angle(RectanglesBasedGeometry):
     def flange(self):
         return self._flange
 
-    def move(self, displacement):
-        super().move(displacement)
-        self._position = self._web.position
-        
-    def rotate(self, rotation_point, angle):
-        super().rotate(rotation_point, angle)
+    def _update_rectangles(self, positions, angles, transform):
+        super()._update_rectangles(positions, angles, transform)
         self._angle = self._web.angle
         self._position = self._web.position
+        self._mirrored = self._mirrored != transform.reflection
         
+    @property
+    def mirrored(self):
+        return self._mirrored
+
     def flip_flange(self):
-        rotation_point = self._web.position + (0.5*self._flange.height + self._web.width)*self._web.unit_direction
-        self._flange.rotate(rotation_point=rotation_point, angle=180)
+        # the flange turned about the web axis is the flange mirrored about it
+        self._mirrored = not self._mirrored
+        self._create()
 
     def reverse_orientation(self):
         super().rotate(self._position, 180)
@@ -215,11 +217,14 @@ class Bulb(Angle):
         self._position = position
         self._angle = angle
         self._material = material
+        self._mirrored = False
+        self._web = None
+        self._flange = None
         self._create_equivalent_angle()
 
     def _create_equivalent_angle(self):
-        web_length, web_thickness, flange_length, flange_thickness = self._get_equivalent_angle_dimensions()
-        super().__init__(web_length, web_thickness, flange_length, flange_thickness, self._material, self._position, self._angle)
+        self._web_length, self._web_thickness, self._flange_length, self._flange_thickness = self._get_equivalent_angle_dimensions()
+        self._create()
 
     def _get_equivalent_angle_dimensions(self):
         if self._length <= 120:
@@ -375,12 +380,8 @@ class Tee(RectanglesBasedGeometry):
     def flange(self):
         return self._flange
 
-    def move(self, displacement):
-        super().move(displacement)
-        self._position = self._web.position
-        
-    def rotate(self, rotation_point, angle):
-        super().rotate(rotation_point, angle)
+    def _update_rectangles(self, positions, angles, transform):
+        super()._update_rectangles(positions, angles, transform)
         self._angle = self._web.angle
         self._position = self._web.position
         
@@ -1,15 +1,44 @@
 from geometry import RectanglesBasedGeometries
 from panels import StiffenedPanel
-from platings import FlatPlate
+from platings import FlatPlate, PlateCollection, CurvedPlate
 from materials import Steel
 from stiffeners import Bulb, Angle, Tee
+from spatial_index import BoundingBoxIndex
 from copy import deepcopy
+from contextlib import contextmanager
+import numpy as np
 
 class TransverseSection(RectanglesBasedGeometries):
     def __init__(self, name=None) -> None:
         self.name = name
         self._stiffened_panels = dict()
         self._stiffened_panels_counter = 0
+        self._plate_collections = []
+        self._spatial_index = None
+        self._indexed_components = None
+        self._batch_depth = 0
+
+    @classmethod
+    def from_panels(cls, panels, name=None):
+        """transverse section made of the given stiffened panels, created once"""
+        transverse_section = cls(name)
+        with transverse_section.batch():
+            for panel in panels:
+                transverse_section.add_stiffened_panel(panel)
+        return transverse_section
+
+    @contextmanager
+    def batch(self):
+        """defers the update of the components until the end of the block, so that many
+        panels are added in linear time
+        """
+        self._batch_depth += 1
+        try:
+            yield self
+        finally:
+            self._batch_depth -= 1
+            if self._batch_depth == 0:
+                self._create()
     
     @property
     def stiffened_panels(self):
@@ -19,13 +48,19 @@ class TransverseSection(RectanglesBasedGeometries):
     def num_stiffened_panels(self):
         return len(self._stiffened_panels)
 
-    def _create(self):
-        components = []
+    def _collect_geometries(self):
+        geometries = []
         for _, panel in self._stiffened_panels.items():
-            components.append(panel.plating)
-            for _, stiffener in panel.stiffeners.items():
-                components.append(stiffener)
-        super().__init__(components)
+            geometries.extend(panel.geometries)
+        geometries.extend(self._plate_collections)
+        return geometries
+
+    def _create(self):
+        if self._batch_depth:
+            return
+        super().__init__(self._collect_geometries())
+        self._spatial_index = None
+        self._indexed_components = None
     
     def update(self):
         self._create()
@@ -38,6 +73,15 @@ class TransverseSection(RectanglesBasedGeometries):
             self._stiffened_panels[self._stiffened_panels_counter] = panel
         self._create()
 
+    def transform(self, transform):
+        super().transform(transform)
+        self._spatial_index = None
+
+    def add_plates(self, plates):
+        """adds an array-backed collection of unstiffened plates as a whole"""
+        self._plate_collections.append(plates)
+        self._create()
+
     def remove_stiffened_panel(self, id):
         del self._stiffened_panels[id]
         self._create()
@@ -54,6 +98,63 @@ class TransverseSection(RectanglesBasedGeometries):
         for _, panel in self._stiffened_panels.items():
             print(panel)
 
+    def _components_bounding_boxes(self):
+        # one entry per plating and per stiffener, grouped stiffeners included, with its current bounding box
+        components, boxes = [], []
+        for _, panel in self._stiffened_panels.items():
+            components.append((panel, None))
+            components.extend((panel, id) for id in panel.stiffener_ids)
+            boxes.append([panel.plating.bounding_box])
+            boxes.append(panel.stiffeners_bounding_boxes())
+        for plates in self._plate_collections:
+            components.extend((plates, k) for k in range(len(plates)))
+            boxes.append(plates.bounding_boxes())
+        return components, np.concatenate(boxes).reshape(-1, 4)
+
+    @property
+    def spatial_index(self):
+        """bounding box index of the platings and stiffeners, built on first use after each update
+        of the section (panels moved or edited afterwards are indexed again after update())
+        """
+        if self._spatial_index is None:
+            self._indexed_components, boxes = self._components_bounding_boxes()
+            self._spatial_index = BoundingBoxIndex(boxes)
+        return self._spatial_index
+
+    def _get_components(self, indices):
+        components = []
+        for i in indices:
+            owner, id = self._indexed_components[i]
+            if isinstance(owner, PlateCollection):
+                # plates of a collection are returned as stand-alone copies
+                components.append(owner[id])
+            else:
+                # grouped stiffeners are returned as read-only views and stay in their groups
+                components.append(owner.plating if id is None else owner.view_stiffener(id))
+        return components
+
+    @property
+    def bounding_box(self):
+        """bounding box of the current geometry, computed from the component arrays on every call"""
+        _, boxes = self._components_bounding_boxes()
+        return boxes[:, 0].min(), boxes[:, 1].max(), boxes[:, 2].min(), boxes[:, 3].max()
+
+    def components_below(self, z):
+        """platings and stiffeners lying entirely at or below the height z"""
+        return self._get_components(self.spatial_index.y_index.below(z))
+
+    def components_above(self, z):
+        """platings and stiffeners lying entirely at or above the height z"""
+        return self._get_components(self.spatial_index.y_index.above(z))
+
+    def components_crossing(self, z):
+        """platings and stiffeners cut by the horizontal line at the height z"""
+        return self._get_components(self.spatial_index.y_index.crossing(z))
+
+    def components_in_box(self, min_y, max_y, min_z, max_z):
+        """platings and stiffeners intersecting the given box"""
+        return self._get_components(self.spatial_index.overlapping(min_y, max_y, min_z, max_z))
+
     @property
     def section_modulus(self):
         centroid = self.centroid
@@ -181,6 +282,8 @@ if __name__ == '__main__':
         transverse_section.print_stiffened_panels()
         transverse_section.plot()
         print(transverse_section.section_properties)
+        print(f'{len(transverse_section.components_crossing(6000))} components cross z = 6000 mm')
+        print(f'{len(transverse_section.components_below(1250))} components lie below z = 1250 mm')
 
         return transverse_section
 
@@ -212,5 +315,89 @@ if __name__ == '__main__':
         print(transverse_section.section_properties)
         print(transverse_section.section_modulus)
 
+    def test4():
+        import time
+        from stiffeners import FlatBar
+        steel = Steel(name='A131', properties=dict(yield_strength=235e6, poisson_ratio=0.3, young_modulus=2.1e11))
+
+        def build(num_panels, stiffeners_per_panel):
+            transverse_section = TransverseSection(name='bulk')
+            with transverse_section.batch():
+                for k in range(num_panels):
+                    panel = StiffenedPanel(name=f'panel {k}')
+                    with panel.batch():
+                        panel.set_plating(FlatPlate.from_endpoints(initial_point=[0, 1000*k], final_point=[50000, 1000*k],
+                                                                   thickness=10, material=steel))
+                        for i in range(stiffeners_per_panel):
+                            panel.add_stiffener(relative_position=500*i, relative_angle=90,
+                                                stiffener=FlatBar(web_length=100, thickness=8, material=steel))
+                    transverse_section.add_stiffened_panel(panel)
+            return transverse_section
+
+        for num_panels in [25, 50, 100]:
+            start = time.perf_counter()
+            transverse_section = build(num_panels, 99)
+            elapsed = time.perf_counter() - start
+            num_components = num_panels*100
+            print(f'{num_components} components built in {elapsed:.3f} s ({1e6*elapsed/num_components:.1f} us per component)')
+        print(transverse_section.section_properties)
+
+    def test5():
+        from geometry import AffineTransform
+        half_section = test0()
+        mirrored_section = deepcopy(half_section)
+        mirrored_section.mirror(axis_point=[0, 0], axis_angle=90)
+        print(mirrored_section.section_properties)
+
+        # the flyweight stiffeners give the same properties once converted to stand-alone objects
+        for _, panel in mirrored_section.stiffened_panels.items():
+            panel.promote_stiffeners()
+        mirrored_section.update()
+        print(mirrored_section.section_properties)
+
+        # composed transforms are applied at once
+        transform = AffineTransform.translation([0, -1000]).then(AffineTransform.rotation(30, [0, 0]))
+        moved_section = deepcopy(half_section)
+        moved_section.transform(transform)
+        print(moved_section.section_properties)
+        moved_section = deepcopy(half_section)
+        moved_section.move([0, -1000])
+        moved_section.rotate([0, 0], 30)
+        print(moved_section.section_properties)
+
+    def test6():
+        transverse_section = test0()
+        steel = Steel(name='A131', properties=dict(yield_strength=235e6, poisson_ratio=0.3, young_modulus=2.1e11))
+        # bulwark plates given as lofted points above the deck edge
+        z = np.linspace(8750, 9750, 11)
+        y = -6470 - 0.02*(z - 8750)
+        points = np.column_stack([y, z])
+        bulwark = PlateCollection.from_endpoints(points[:-1], points[1:], thicknesses=6.0, material_ids=0, materials=[steel])
+        transverse_section.add_plates(bulwark)
+        print(transverse_section.section_properties)
+        print(f'{len(transverse_section.components_above(9000))} components lie above z = 9000 mm')
+
+    def test7():
+        from geometry import RectanglesBasedGeometries
+        steel = Steel(name='A131', properties=None)
+        # bilge strake through the points f, h and i of test0 as a single arc
+        bilge = CurvedPlate.from_three_points(initial_point=[-6648, 3250], middle_point=[-5697.53, 1769.34],
+                                              final_point=[-4876.26, 1211.99], thickness=9, material=steel)
+        print(bilge)
+        print(RectanglesBasedGeometries([bilge]).section_properties)
+
+        # chains of flat plates along the same arc converge to the arc properties
+        for num_plates in [3, 30, 300]:
+            points = bilge.point_at(np.linspace(0, bilge.length, num_plates + 1))
+            chain = PlateCollection.from_endpoints(points[:-1], points[1:], 9, 0, [steel])
+            inertia = chain.inertia
+            print(f"{num_plates} flat plates: area = {chain.area:.1f}, Iy = {inertia['Iy']:.6e}, Iz = {inertia['Iz']:.6e}, Iyz = {inertia['Iyz']:.6e}")
+
+        panel = StiffenedPanel(name='bilge')
+        panel.set_plating(bilge)
+        panel.add_stiffeners_group(relative_position=500, relative_angle=90, spacing=500, stiffener=Bulb(length=140, thickness=7, material=steel), count=3)
+        print(panel)
+        print(panel.section_properties)
+        panel.plot()
 
     test3()